@@ -1,12 +1,12 @@
 @echo off
 title FEH Data Fetcher - Interactive Launcher
 echo.
-python "src\launcher.py"
+python "src\launcher.py" %*
 
 echo.
-echo 🧹 Auto-cleaning Python cache files...
-python "src\cache_cleanup\clean_cache.py"
+echo 🧹 Removing stale Python cache files...
+python "src\cache_cleanup\clean_cache.py" --stale
 
 echo.
-echo ✅ All done! Cache cleaned automatically.
+echo ✅ All done! Bytecode of the current sources is kept for a fast next start.
 pause
@@ -0,0 +1,4 @@
+"""
+Benchmarks Package
+This package holds reproducible performance benchmarks for the fetcher's hot paths.
+"""
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Sidecar index benchmark
+Compares single-hero lookup and replacement through the byte-offset sidecar index
+against a full scan, on a synthetic database scaled up from the real hero tables.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from save_hero import csv_operations
+from save_hero.csv_index import build_index_from_file, read_rows_for_key, write_index
+
+TABLES = ["passives.csv", "weapons.csv"]
+
+
+def scale_table(source: str, target: str, factor: int):
+    """Write a copy of a hero table with every hero duplicated factor times under new Keys"""
+    with open(source, "r", encoding="utf-8") as f:
+        header, *lines = f.read().splitlines()
+    with open(target, "w", encoding="utf-8") as f:
+        f.write(header + "\n")
+        for copy in range(factor):
+            suffix = f"_x{copy}" if copy else ""
+            for line in lines:
+                key, _, rest = line.partition(",")
+                f.write(f"{key}{suffix},{rest}\n")
+
+
+def bench_csv_index(folder_path: str, factor: int = 10, lookups: int = 200) -> dict:
+    """Run the benchmark and return its results"""
+    results = {"factor": factor, "lookups": lookups, "tables": {}}
+    work_dir = tempfile.mkdtemp(prefix="fehtcher_bench_")
+    try:
+        for table in TABLES:
+            filename = os.path.join(work_dir, table)
+            scale_table(os.path.join(folder_path, table), filename, factor)
+
+            start = time.perf_counter()
+            keys = build_index_from_file(filename)
+            write_index(filename, keys)
+            build_s = time.perf_counter() - start
+
+            sample = random.Random(0).choices(sorted(keys), k=lookups)
+            indexed_us = _per_call_us(lambda key: read_rows_for_key(filename, key), sample)
+            scan_us = _per_call_us(lambda key: _full_scan(filename, key), sample[:max(1, lookups // 10)])
+
+            header = _header(filename)
+            indexed_write_us = _per_call_us(lambda key: _replace(header, filename, key), sample[:20])
+            csv_operations.WRITE_SIDECAR_INDEXES = False
+            try:
+                full_write_us = _per_call_us(lambda key: _replace(header, filename, key), sample[:20])
+            finally:
+                csv_operations.WRITE_SIDECAR_INDEXES = True
+
+            results["tables"][table] = {
+                "rows": sum(1 for _ in open(filename, encoding="utf-8")) - 1,
+                "bytes": os.path.getsize(filename),
+                "index_build_s": build_s,
+                "lookup_indexed_us": indexed_us,
+                "lookup_full_scan_us": scan_us,
+                "lookup_speedup": scan_us / indexed_us if indexed_us else None,
+                "replace_indexed_us": indexed_write_us,
+                "replace_full_rewrite_us": full_write_us,
+            }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def _per_call_us(function, arguments: list) -> float:
+    """Return the mean latency of function in microseconds over the arguments"""
+    start = time.perf_counter()
+    for argument in arguments:
+        function(argument)
+    return (time.perf_counter() - start) / len(arguments) * 1e6
+
+
+def _full_scan(filename: str, key: str) -> list[str]:
+    """Baseline: read the whole table and keep one hero's lines"""
+    with open(filename, "r", encoding="utf-8") as f:
+        return [line for line in f.read().splitlines()[1:] if line.partition(",")[0] == key]
+
+
+def _header(filename: str) -> str:
+    with open(filename, "r", encoding="utf-8") as f:
+        return f.readline().rstrip("\n")
+
+
+def _replace(header: str, filename: str, key: str):
+    """Rewrite one hero's rows through hero_skills_to_file"""
+    lines = [header] + read_rows_for_key(filename, key)
+    csv_operations._invalidate_file_cache(filename)
+    csv_operations.hero_skills_to_file(header, lines, filename, "Key")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sidecar byte-offset index")
+    parser.add_argument("--folder", default="database", help="Database folder holding the source tables")
+    parser.add_argument("--factor", type=int, default=10, help="Scale factor of the synthetic tables")
+    parser.add_argument("--lookups", type=int, default=200, help="Single-hero lookups per table")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = bench_csv_index(args.folder, args.factor, args.lookups)
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Database read API benchmark
+Measures the memory footprint of the parsed tables and the lookup latency of the
+Database class against hand-parsing the CSV files on every request.
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+import tracemalloc
+
+from hero_database import Database
+
+
+def bench_database(folder_path: str, repeat: int = 1000) -> dict:
+    """Run the benchmark and return its results"""
+    results = {"folder": folder_path, "repeat": repeat}
+
+    # Cold load of every table, with traced memory
+    tracemalloc.start()
+    start = time.perf_counter()
+    db = Database(folder_path)
+    db.info()
+    for table_name in db.skill_table_names():
+        db.skill_table(table_name)
+    for skill_type in db.catalog_names():
+        db.catalog(skill_type)
+    db.related_heroes().components()
+    db.manuals()
+    results["cold_load_s"] = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results["memory_bytes"] = current
+    results["peak_memory_bytes"] = peak
+
+    hero_keys = db.hero_keys()
+    if not hero_keys:
+        return results
+    skill_names = [row["Name"] for row in db.skill_table("weapons")][:repeat] or ["Iron Sword"]
+
+    results["lookup_us"] = {
+        "hero": _per_call_us(lambda key: db.hero(key), hero_keys, repeat),
+        "skills_of": _per_call_us(lambda key: db.skills_of(key), hero_keys, repeat),
+        "related": _per_call_us(lambda key: db.related(key), hero_keys, repeat),
+        "heroes_with_skill": _per_call_us(lambda name: db.heroes_with_skill(name), skill_names, repeat),
+        "skill": _per_call_us(lambda name: db.skill(name), skill_names, repeat),
+    }
+
+    # Baseline: hand-parse the CSVs on each request (a few calls are enough)
+    baseline_calls = max(1, min(20, repeat))
+    results["baseline_us"] = {
+        "hero": _per_call_us(lambda key: _scan_info(folder_path, key), hero_keys, baseline_calls),
+        "skills_of": _per_call_us(lambda key: _scan_skills(db, folder_path, key), hero_keys, baseline_calls),
+    }
+    return results
+
+
+def _per_call_us(function, arguments: list, calls: int) -> float:
+    """Return the mean latency of function in microseconds over calls arguments"""
+    start = time.perf_counter()
+    for i in range(calls):
+        function(arguments[i % len(arguments)])
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def _scan_info(folder_path: str, key: str):
+    """Baseline: find a hero by reading info.csv from disk"""
+    with open(os.path.join(folder_path, "info.csv"), "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            if row["Key"] == key:
+                return row
+    return None
+
+
+def _scan_skills(db: Database, folder_path: str, key: str) -> dict:
+    """Baseline: collect a hero's rows by reading every skill table from disk"""
+    skills = {}
+    for table_name in db.skill_table_names():
+        with open(os.path.join(folder_path, f"{table_name}.csv"), "r", encoding="utf-8", newline="") as f:
+            rows = [row for row in csv.DictReader(f) if row["Key"] == key]
+        if rows:
+            skills[table_name] = rows
+    return skills
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Database read API")
+    parser.add_argument("--folder", default="database", help="Database folder to read")
+    parser.add_argument("--repeat", type=int, default=1000, help="Lookups per measurement")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = bench_database(args.folder, args.repeat)
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Integrity checker benchmark
+Times validate_database on a synthetic database scaled up from today's roster (or on a given
+folder), with its peak traced memory, against loading every table through the Database
+read API, which is what the ad-hoc checking scripts did before comparing the tables.
+"""
+
+import argparse
+import json
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from hero_database import Database, validate_database
+from .synthetic import generate_database, scaled_roster
+
+
+def bench_integrity(folder_path: str = None, factor: float = 10, repeat: int = 3, seed: int = 0) -> dict:
+    """
+    Validate the database repeat times (the median is reported).
+
+    Args:
+        folder_path: Database folder to validate (default: a synthetic one of factor x today's roster)
+        factor: Roster size of the synthetic database, relative to today's
+        repeat: Runs per measure
+        seed: Seed of the synthetic database
+    """
+    work_dir = None
+    if folder_path is None:
+        work_dir = tempfile.mkdtemp(prefix="bench_integrity_")
+        folder_path = work_dir
+        generate_database(folder_path, scaled_roster(factor), seed)
+    try:
+        durations, baseline = [], []
+        report = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            report = validate_database(folder_path)
+            durations.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            __load_every_table(folder_path)
+            baseline.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        validate_database(folder_path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        tracemalloc.start()
+        __load_every_table(folder_path)
+        _, baseline_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        if work_dir is not None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "folder": None if work_dir else folder_path,
+        "factor": factor if work_dir else None,
+        "files": len(report["files"]),
+        "rows": sum(report["files"].values()),
+        "violations": report["counts"],
+        "validate_s": statistics.median(durations),
+        "validate_peak_memory_bytes": peak,
+        "load_every_table_s": statistics.median(baseline),
+        "load_every_table_peak_memory_bytes": baseline_peak,
+    }
+
+
+def __load_every_table(folder_path: str):
+    """Parse and index every table with a fresh Database (the starting point of the ad-hoc checks)"""
+    db = Database(folder_path)
+    db.info()
+    for table_name in db.skill_table_names():
+        db.skill_table(table_name)
+    for skill_type in db.catalog_names():
+        db.catalog(skill_type)
+    db.related_heroes()
+    db.manuals()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the single-pass database integrity checker")
+    parser.add_argument("--folder", default=None, help="Database folder to validate (default: a synthetic one)")
+    parser.add_argument("--factor", type=float, default=10, help="Roster size of the synthetic database relative to today's")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measure")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = bench_integrity(args.folder, args.factor, args.repeat, args.seed)
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
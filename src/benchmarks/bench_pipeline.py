@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Pipeline benchmark - Offline end-to-end timing against a recorded wiki corpus
+Serves a recorded corpus (by default a synthetic one, generated on the fly) through the local
+mock wiki and times bootstrap, hero page fetch/parse, conversion and saving, with an optional
+regression check against a baseline.
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import instrumentation
+from bootstrap import bootstrap_database
+from fetcher import fetch_hero_data
+from hero_data_to_csv import hero_table_to_csv_data
+from save_hero import save_hero_to_files, flush_skill_indexes
+from .corpus import load_manifest
+from .mock_wiki import MockWiki
+from .synthetic import generate_corpus
+
+# Baseline of the default synthetic corpus, measured with --json (see README.md)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Heroes of the default synthetic corpus
+DEFAULT_SYNTHETIC_HEROES = 200
+
+# Metrics compared with --baseline (lower is better)
+REGRESSION_METRICS = ["bootstrap_s", "fetch_per_hero_ms", "convert_per_hero_ms", "save_per_hero_ms"]
+
+
+def bench_pipeline(corpus_dir: str = None, folder_path: str = None, heroes: int = None, repeat: int = 3,
+                   latency: float = 0.0, bandwidth: float = None, synthetic_heroes: int = DEFAULT_SYNTHETIC_HEROES,
+                   seed: int = 0) -> dict:
+    """
+    Run the benchmark and return its results.
+
+    Args:
+        corpus_dir: Recorded corpus served by the mock wiki (None generates a synthetic corpus of
+                    synthetic_heroes heroes from seed in a temporary folder)
+        folder_path: Existing database copied as the starting point of the save benchmark
+                     (None saves into an empty database)
+        heroes: Number of recorded heroes to use (None for all of them)
+        repeat: Repetitions of the bootstrap/fetch/convert passes (best run is kept)
+        latency, bandwidth: Network conditions simulated by the mock wiki
+    """
+    if corpus_dir is None:
+        corpus_dir = tempfile.mkdtemp(prefix="fehtcher_corpus_")
+        try:
+            generate_corpus(corpus_dir, synthetic_heroes, seed)
+            results = bench_pipeline(corpus_dir, folder_path, heroes, repeat, latency, bandwidth)
+        finally:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+        # Same name on every machine, so baselines of the default corpus compare
+        results["corpus"] = f"synthetic:{synthetic_heroes}:{seed}"
+        return results
+
+    hero_infos = load_manifest(corpus_dir)["heroes"][:heroes]
+    results = {"corpus": corpus_dir, "heroes": len(hero_infos), "repeat": repeat,
+               "latency_s": latency, "bandwidth_bps": bandwidth}
+
+    with MockWiki(corpus_dir, latency, bandwidth) as wiki, contextlib.redirect_stdout(io.StringIO()):
+        results["bootstrap_s"] = min(_timed(bootstrap_database) for _ in range(repeat))
+
+        # Fetch keeps the per-stage split (http_wait/html_parse/extract) of the best pass
+        best = None
+        for _ in range(repeat):
+            instrumentation.METRICS.reset()
+            start = time.perf_counter()
+            pages = [fetch_hero_data(hero_info) for hero_info in hero_infos]
+            elapsed = time.perf_counter() - start
+            if best is None or elapsed < best[0]:
+                best = (elapsed, _stage_totals(instrumentation.METRICS, ["http_wait", "html_parse", "extract"]))
+        results["fetch_per_hero_ms"] = _per_hero_ms(best[0], hero_infos)
+        results["fetch_stages_ms"] = {name: _per_hero_ms(total, hero_infos) for name, total in best[1].items()}
+        results["http_requests"] = wiki.requests
+
+    convert_s = min(
+        _timed(lambda: [hero_table_to_csv_data(hero_info["hero_id"], _without_portraits(page))
+                        for hero_info, page in zip(hero_infos, pages)])
+        for _ in range(repeat)
+    )
+    results["convert_per_hero_ms"] = _per_hero_ms(convert_s, hero_infos)
+
+    work_dir = tempfile.mkdtemp(prefix="fehtcher_bench_")
+    try:
+        database = os.path.join(work_dir, "database")
+        if folder_path:
+            shutil.copytree(folder_path, database, ignore=shutil.ignore_patterns("icons", "portraits", "reports"))
+
+        def save_all():
+            for hero_info, page in zip(hero_infos, pages):
+                save_hero_to_files(hero_info, copy.deepcopy(page), database, download_images=False)
+            flush_skill_indexes()
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            save_s = _timed(save_all)
+        results["save_per_hero_ms"] = _per_hero_ms(save_s, hero_infos)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def compare_to_baseline(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Return a message for every metric that got slower than baseline by more than threshold (0.1 = 10%)"""
+    regressions = []
+    for metric in REGRESSION_METRICS:
+        before, after = baseline.get(metric), results.get(metric)
+        if before and after is not None and after > before * (1 + threshold):
+            regressions.append(f"{metric}: {before:.3f} -> {after:.3f} (+{(after / before - 1) * 100:.1f}%)")
+    return regressions
+
+
+def _timed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def _per_hero_ms(seconds: float, hero_infos: list) -> float:
+    return seconds / len(hero_infos) * 1000 if hero_infos else 0.0
+
+
+def _stage_totals(metrics, names: list[str]) -> dict[str, float]:
+    """Return the total seconds recorded for each stage"""
+    return {name: sum(seconds for seconds, _ in metrics.stages.get(name, ())) for name in names}
+
+
+def _without_portraits(page: dict) -> dict:
+    """Deep copy of fetched hero data as save_hero_to_files hands it to the converter"""
+    page = copy.deepcopy(page)
+    page.pop("Portraits", None)
+    return page
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the fetch/convert/save pipeline offline")
+    parser.add_argument("--corpus", default=None,
+                        help="Recorded corpus folder (default: a synthetic corpus generated on the fly)")
+    parser.add_argument("--synthetic-heroes", type=int, default=DEFAULT_SYNTHETIC_HEROES,
+                        help="Heroes of the synthetic corpus generated without --corpus")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic corpus")
+    parser.add_argument("--folder", help="Existing database to start the save benchmark from")
+    parser.add_argument("--heroes", type=int, help="Limit the number of recorded heroes used")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions (best run is kept)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per request")
+    parser.add_argument("--bandwidth", type=float, default=None, help="Simulated bytes per second")
+    parser.add_argument("--baseline", nargs="?", const=DEFAULT_BASELINE,
+                        help="Baseline JSON results to compare against (alone: benchmarks/baseline.json)")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown vs baseline (0.10 = 10%%)")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = bench_pipeline(args.corpus, args.folder, args.heroes, args.repeat, args.latency, args.bandwidth,
+                             args.synthetic_heroes, args.seed)
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if (baseline.get("corpus"), baseline.get("heroes")) != (results["corpus"], results["heroes"]):
+            print(f"Warning: the baseline was measured on {baseline.get('corpus')} ({baseline.get('heroes')} heroes)")
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        for message in regressions:
+            print(f"Regression: {message}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
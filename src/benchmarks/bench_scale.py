@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Storage scaling benchmark
+Times save_hero_to_files on synthetic rosters at several multiples of today's size:
+a full refresh into an empty database (up to --max-full heroes) and an incremental
+update of a sample of heroes in a pre-generated database, with peak traced memory.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from save_hero import save_hero_to_files, flush_skill_indexes
+from save_hero import csv_index, csv_operations, skill_index
+from .synthetic import generate_database, scaled_roster, synthetic_hero
+
+
+def bench_scale(factors: list[float], updates: int = 20, max_full: int = 2000,
+                memory_updates: int = 3, seed: int = 0) -> dict:
+    """
+    Run the benchmark and return its results.
+
+    Args:
+        factors: Roster sizes as multiples of today's roster
+        updates: Heroes re-saved (with changed skills) for the incremental measurement
+        max_full: Largest roster saved hero by hero for the full refresh measurement
+        memory_updates: Heroes re-saved under tracemalloc for the peak memory figure
+    """
+    results = {"updates": updates, "max_full": max_full, "scales": []}
+    for factor in factors:
+        roster_size = scaled_roster(factor)
+        scale = {"factor": factor, "heroes": roster_size}
+        work_dir = tempfile.mkdtemp(prefix="fehtcher_scale_")
+        try:
+            if roster_size <= max_full:
+                scale["full_refresh"] = _full_refresh(os.path.join(work_dir, "full"), roster_size, seed)
+                _reset_caches()
+
+            database = os.path.join(work_dir, "database")
+            start = time.perf_counter()
+            scale["rows"] = generate_database(database, roster_size, seed)
+            scale["generate_s"] = time.perf_counter() - start
+            scale["database_bytes"] = _folder_size(database)
+            _reset_caches()
+
+            scale["incremental"] = _incremental(database, roster_size, updates, memory_updates, seed)
+            scale["full_refresh_estimate_s"] = scale["incremental"]["per_hero_ms"] * roster_size / 1000
+        finally:
+            _reset_caches()
+            shutil.rmtree(work_dir, ignore_errors=True)
+        results["scales"].append(scale)
+    return results
+
+
+def _full_refresh(folder_path: str, roster_size: int, seed: int) -> dict:
+    """Save every hero of the roster into an empty database, one save_hero_to_files call each"""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for index in range(roster_size):
+            hero_info, page_data = synthetic_hero(index, roster_size, seed)
+            save_hero_to_files(hero_info, page_data, folder_path, download_images=False)
+        flush_skill_indexes()
+    elapsed = time.perf_counter() - start
+    return {"total_s": elapsed, "per_hero_ms": elapsed / roster_size * 1000}
+
+
+def _incremental(folder_path: str, roster_size: int, updates: int, memory_updates: int, seed: int) -> dict:
+    """Re-save a spread of existing heroes with a new revision of their skills"""
+    step = max(1, roster_size // max(updates, 1))
+    indexes = list(range(0, roster_size, step))[:updates]
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for index in indexes:
+            hero_info, page_data = synthetic_hero(index, roster_size, seed, revision=1)
+            start = time.perf_counter()
+            save_hero_to_files(hero_info, page_data, folder_path, download_images=False)
+            # One update per run: the skill index is written once, with the hero
+            flush_skill_indexes()
+            timings.append(time.perf_counter() - start)
+
+        # Peak memory is measured separately: tracemalloc slows the saves down
+        tracemalloc.start()
+        try:
+            for index in indexes[:memory_updates]:
+                hero_info, page_data = synthetic_hero(index, roster_size, seed, revision=2)
+                save_hero_to_files(hero_info, page_data, folder_path, download_images=False)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    steady = timings[1:] or timings
+    return {
+        "heroes": len(timings),
+        "first_hero_ms": timings[0] * 1000 if timings else 0.0,
+        "per_hero_ms": sum(steady) / len(steady) * 1000 if steady else 0.0,
+        "max_hero_ms": max(timings) * 1000 if timings else 0.0,
+        "peak_traced_bytes": peak,
+    }
+
+
+def _reset_caches():
+    """Drop the module-level caches that point into a removed database folder"""
+    csv_operations._file_exists_cache.clear()
+    csv_operations._related_heroes_graphs.clear()
+    csv_index._index_cache.clear()
+    skill_index._skill_indexes.clear()
+
+
+def _folder_size(folder_path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(folder_path) for name in names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark save_hero_to_files on synthetic rosters")
+    parser.add_argument("--factors", default="1,10", help="Comma-separated roster multiples (e.g. 1,10,100)")
+    parser.add_argument("--updates", type=int, default=20, help="Heroes re-saved per incremental measurement")
+    parser.add_argument("--max-full", type=int, default=2000, help="Largest roster measured with a full refresh")
+    parser.add_argument("--memory-updates", type=int, default=3, help="Heroes re-saved under tracemalloc")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    factors = [float(factor) for factor in args.factors.split(",") if factor.strip()]
+    results = bench_scale(factors, args.updates, args.max_full, args.memory_updates, args.seed)
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Query server load test
+Sends a mix of hero and skill lookups to the query server over keep-alive connections and
+reports requests per second, latency percentiles and the response cache hit rate.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+from hero_database import Database
+from instrumentation.metrics import percentile
+from query_server import QueryServer
+
+# Request paths per hero Key and per skill Name
+HERO_PATHS = ("/heroes/{}", "/heroes/{}/skills", "/heroes/{}/related", "/heroes/{}/manuals")
+SKILL_PATHS = ("/skills/{}", "/skills/{}/heroes")
+
+
+def bench_server(folder_path: str, url: str = None, requests: int = 20000, connections: int = 32,
+                 distinct: int = None, cache_entries: int = None, seed: int = 0) -> dict:
+    """
+    Run the load test against url, or against a server started on a thread of this process
+    (which then shares the interpreter with the clients). distinct limits the number of
+    different paths requested, to measure a given working set.
+    """
+    targets = request_targets(folder_path, distinct, seed)
+    server, thread, loop = None, None, None
+    if url is None:
+        options = {"watch_interval": 0}
+        if cache_entries is not None:
+            options["cache_entries"] = cache_entries
+        server = QueryServer(folder_path, port=0, **options)
+        loop = asyncio.new_event_loop()
+        started = threading.Event()
+        thread = threading.Thread(target=_run_server, args=(server, loop, started), daemon=True)
+        thread.start()
+        started.wait()
+        url = f"http://{server.host}:{server.port}"
+
+    try:
+        results = asyncio.run(_load(url, targets, requests, connections))
+        results["stats"] = asyncio.run(_load(url, ["/stats"], 1, 1, keep_bodies=True))["bodies"][0]
+    finally:
+        if server is not None:
+            asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+    results.update({"url": url, "connections": connections, "distinct_paths": len(targets)})
+    return results
+
+
+def request_targets(folder_path: str, distinct: int = None, seed: int = 0) -> list[str]:
+    """Paths of every endpoint for every hero Key and hero skill Name, shuffled"""
+    db = Database(folder_path)
+    names = set()
+    for table_name in db.skill_table_names():
+        names.update(row["Name"] for row in db.skill_table(table_name))
+    targets = [path.format(quote(key, safe="")) for key in db.hero_keys() for path in HERO_PATHS]
+    targets += [path.format(quote(name, safe="")) for name in sorted(names) for path in SKILL_PATHS]
+    random.Random(seed).shuffle(targets)
+    return targets[:distinct] if distinct else targets
+
+
+async def _load(url: str, targets: list[str], requests: int, connections: int, keep_bodies: bool = False) -> dict:
+    """Send requests (cycling through targets) over concurrent connections"""
+    address = urlsplit(url)
+    latencies, statuses, cache_states, bodies = [], {}, {}, []
+    sent = 0
+
+    async def client():
+        nonlocal sent
+        reader, writer = await asyncio.open_connection(address.hostname, address.port)
+        try:
+            while sent < requests:
+                target = targets[sent % len(targets)]
+                sent += 1
+                start = time.perf_counter()
+                writer.write(f"GET {target} HTTP/1.1\r\nHost: {address.netloc}\r\n\r\n".encode("latin-1"))
+                status = int((await reader.readline()).split()[1])
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers["content-length"]))
+                latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+                cache_state = headers.get("x-cache", "NONE")
+                cache_states[cache_state] = cache_states.get(cache_state, 0) + 1
+                if keep_bodies:
+                    bodies.append(json.loads(body))
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(connections)))
+    seconds = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "seconds": seconds,
+        "rps": len(latencies) / seconds if seconds else 0.0,
+        "latency_ms": {name: percentile(latencies, fraction) * 1000
+                       for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0))},
+        "statuses": statuses,
+        "cache": cache_states,
+        "bodies": bodies,
+    }
+
+
+def _run_server(server: QueryServer, loop, started: threading.Event):
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(server.start())
+    started.set()
+    loop.run_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the database query server")
+    parser.add_argument("--folder", default="database", help="Database folder (request paths are built from it)")
+    parser.add_argument("--url", default=None,
+                        help="Server to test, e.g. http://127.0.0.1:8080 (default: start one in this process)")
+    parser.add_argument("--requests", type=int, default=20000, help="Total requests")
+    parser.add_argument("--connections", type=int, default=32, help="Concurrent keep-alive connections")
+    parser.add_argument("--distinct", type=int, default=None, help="Only request this many different paths")
+    parser.add_argument("--cache-entries", type=int, default=None, help="Cache size of the in-process server")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = bench_server(args.folder, args.url, args.requests, args.connections, args.distinct, args.cache_entries)
+    results.pop("bodies")
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
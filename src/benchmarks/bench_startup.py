@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark
+Runs the launcher in fresh interpreters under -X importtime and reports the wall time, the
+import time and the most expensive imports of: importing it, --help, and a quick
+--only run on a copy of the database served from the listing snapshot. Each case is
+measured cold (no bytecode, as after the old full cache cleanup) and warm (bytecode kept).
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from .mock_wiki import MockWiki
+
+# The src/ folder of this checkout
+SOURCE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Third-party packages a quick run should not need to import
+HEAVY_MODULES = ("bs4", "requests", "tqdm", "lxml")
+
+
+def bench_startup(source_root: str = SOURCE_ROOT, folder_path: str = None, only: list[str] = None,
+                  corpus_dir: str = None, repeat: int = 5, top: int = 10) -> dict:
+    """
+    Measure every case cold and warm.
+
+    Args:
+        source_root: src/ folder to run (e.g. another checkout, to compare)
+        folder_path: Database folder copied for the --only run (no run case without it)
+        only: Categories passed to --only
+        corpus_dir: Serve this recorded corpus for the listings instead of the wiki
+        repeat: Runs per case and bytecode state (the median is reported)
+        top: Number of most expensive top-level imports listed
+    """
+    work_dir = tempfile.mkdtemp(prefix="bench_startup_")
+    # A copy of the sources, whose bytecode the cold runs can remove
+    sources = os.path.join(work_dir, "src")
+    shutil.copytree(source_root, sources, ignore=shutil.ignore_patterns("__pycache__", "*.pyc"))
+    cases = {
+        "import": [sys.executable, "-X", "importtime", "-c", "import launcher"],
+        "help": [sys.executable, "-X", "importtime", "launcher.py", "--help"],
+    }
+    wiki = None
+    try:
+        env = dict(os.environ, PYTHONPATH=sources)
+        # Bytecode persistence is what is measured
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        env.pop("PYTHONPYCACHEPREFIX", None)
+        if corpus_dir:
+            wiki = MockWiki(corpus_dir, patch_utils=False).start()
+            env["FEHTCHER_WIKI_URL"] = wiki.url
+        cwd = {name: sources for name in cases}
+        if folder_path:
+            run_dir = os.path.join(work_dir, "run")
+            shutil.copytree(folder_path, os.path.join(run_dir, "database"))
+            run = [sys.executable, "-X", "importtime", os.path.join(sources, "launcher.py"), "--no-pause",
+                   "--listings-ttl", "1000000"]
+            for category in only or ["manuals"]:
+                run += ["--only", category]
+            # Saves the listing snapshot the measured runs start from
+            __run(run[:1] + run[3:], run_dir, env)
+            cases["only"], cwd["only"] = run, run_dir
+
+        results = {"python": sys.version.split()[0], "source_root": source_root, "cases": {}}
+        for name, command in cases.items():
+            results["cases"][name] = {
+                # Bytecode of the sources removed before every run, as the full cache cleanup did
+                "cold": __measure(command, cwd[name], env, repeat, top, sources),
+                # Bytecode kept from a first unmeasured run
+                "warm": __measure(command, cwd[name], env, repeat, top, None),
+            }
+    finally:
+        if wiki is not None:
+            wiki.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def parse_importtime(stderr: str) -> dict[str, tuple[int, int, int]]:
+    """module -> (self us, cumulative us, depth) from -X importtime output (first import of each module)"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # One space after the bar, then two per nesting level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.setdefault(name.strip(), (int(self_us), int(cumulative_us), depth))
+    return modules
+
+
+def __measure(command: list[str], cwd: str, env: dict, repeat: int, top: int, clean_root: str = None) -> dict:
+    """
+    Median wall and import times of repeat runs, with the top-level imports of the last one.
+    The bytecode under clean_root is removed before every run (cold); without it, a first
+    unmeasured run writes the bytecode the measured runs load (warm).
+    """
+    if clean_root is None:
+        __run(command, cwd, env)
+    walls, imports, modules = [], [], {}
+    for _ in range(repeat):
+        if clean_root is not None:
+            for folder, _, _ in os.walk(clean_root):
+                if os.path.basename(folder) == "__pycache__":
+                    shutil.rmtree(folder, ignore_errors=True)
+        start = time.perf_counter()
+        stderr = __run(command, cwd, env)
+        walls.append(time.perf_counter() - start)
+        modules = parse_importtime(stderr)
+        imports.append(sum(cumulative for _, cumulative, depth in modules.values() if depth == 0))
+    top_level = sorted(((name, cumulative) for name, (_, cumulative, depth) in modules.items() if depth <= 1),
+                       key=lambda item: item[1], reverse=True)
+    return {
+        "wall_ms": statistics.median(walls) * 1000,
+        "import_ms": statistics.median(imports) / 1000,
+        "top_imports_ms": {name: cumulative / 1000 for name, cumulative in top_level[:top]},
+        "heavy_imported": [name for name in HEAVY_MODULES if name in modules],
+    }
+
+
+def __run(command: list[str], cwd: str, env: dict) -> str:
+    """Run command and return its stderr (raises if it fails)"""
+    completed = subprocess.run(command, cwd=cwd, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="replace")
+    if completed.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} exited with {completed.returncode}:\n{completed.stderr[-2000:]}")
+    return completed.stderr
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the launcher startup (import time, cold and warm bytecode)")
+    parser.add_argument("--source", default=SOURCE_ROOT, help="src/ folder to run (default: this checkout)")
+    parser.add_argument("--folder", default=None,
+                        help="Database folder copied for a quick --only run (no run measured without it)")
+    parser.add_argument("--only", action="append", default=None, help="Category of the --only run (default: manuals)")
+    parser.add_argument("--corpus", default=None, help="Serve this corpus for the listings (default: the wiki)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case and bytecode state")
+    parser.add_argument("--top", type=int, default=10, help="Most expensive imports listed per case")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = bench_startup(os.path.abspath(args.source), args.folder, args.only, args.corpus, args.repeat, args.top)
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Watch mode freshness benchmark
+Runs the watcher against the mock wiki, edits hero pages through its recent changes API and
+reports how long each edit took to reach the database (freshness latency), with the cost of
+the idle polls and the requests made per edit.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from instrumentation.metrics import percentile
+from save_hero import CsvSink
+from watcher import WikiWatcher
+from .corpus import load_manifest
+from .mock_wiki import MockWiki
+
+
+def bench_watch(corpus_dir: str, edits: int = 20, poll_interval: float = 1.0, spacing: float = 0.5,
+                latency: float = 0.0, seed: int = 0) -> dict:
+    """
+    Catch up on the corpus into a temporary database, then edit `edits` random hero pages
+    `spacing` seconds apart while the watcher polls every poll_interval seconds.
+    """
+    heroes = load_manifest(corpus_dir)["heroes"]
+    edited_pages = random.Random(seed).sample([hero["url_id"] for hero in heroes], min(edits, len(heroes)))
+    hero_ids = {hero["url_id"]: hero["hero_id"] for hero in heroes}
+    folder = tempfile.mkdtemp(prefix="bench_watch_")
+    saved_at, cycles = {}, []
+    caught_up = threading.Event()
+
+    def on_cycle(summary):
+        now = time.perf_counter()
+        for hero_id in summary["saved"]:
+            saved_at.setdefault(hero_id, []).append(now)
+        cycles.append(summary)
+        caught_up.set()
+
+    try:
+        with MockWiki(corpus_dir, latency) as wiki, contextlib.redirect_stdout(io.StringIO()):
+            watcher = WikiWatcher(folder, None, CsvSink(folder), poll_interval, download_images=False,
+                                  on_cycle=on_cycle, api_url=wiki.api_url)
+            thread = threading.Thread(target=watcher.run, daemon=True)
+            start = time.perf_counter()
+            thread.start()
+            caught_up.wait()
+            catch_up_s = time.perf_counter() - start
+            requests_before = wiki.requests
+
+            edited_at = {}
+            for page in edited_pages:
+                edited_at[page] = time.perf_counter()
+                wiki.edit(page)
+                time.sleep(spacing)
+            # Wait for the last edits to be picked up
+            deadline = time.perf_counter() + poll_interval * 3 + 30
+            while time.perf_counter() < deadline and not all(
+                    any(saved > edited_at[page] for saved in saved_at.get(hero_ids[page], ())) for page in edited_pages):
+                time.sleep(0.05)
+            watcher.stop()
+            thread.join()
+            requests = wiki.requests - requests_before
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    latencies = sorted(min((saved for saved in saved_at.get(hero_ids[page], ()) if saved > edited_at[page]),
+                           default=float("inf")) - edited_at[page] for page in edited_pages)
+    polls = cycles[1:]
+    idle = [cycle["duration_s"] for cycle in polls if not cycle["changes"]]
+    busy = [cycle for cycle in polls if cycle["changes"]]
+    return {
+        "heroes": len(heroes),
+        "edits": len(edited_pages),
+        "poll_interval_s": poll_interval,
+        "catch_up_s": catch_up_s,
+        "freshness_s": {name: percentile(latencies, fraction)
+                        for name, fraction in (("p50", 0.5), ("p90", 0.9), ("max", 1.0))},
+        "missed": sum(1 for latency in latencies if latency == float("inf")),
+        "polls": len(polls),
+        "idle_poll_ms": sum(idle) / len(idle) * 1000 if idle else None,
+        "busy_cycle_ms": sum(cycle["duration_s"] for cycle in busy) / len(busy) * 1000 if busy else None,
+        "requests_per_edit": requests / len(edited_pages) if edited_pages else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how fast watch mode picks up wiki edits")
+    parser.add_argument("--corpus", required=True, help="Recorded or synthetic corpus served by the mock wiki")
+    parser.add_argument("--edits", type=int, default=20, help="Hero pages edited")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between two polls")
+    parser.add_argument("--spacing", type=float, default=0.5, help="Seconds between two edits")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added before each mock response")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = bench_watch(args.corpus, args.edits, args.poll_interval, args.spacing, args.latency, args.seed)
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
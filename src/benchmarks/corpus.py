@@ -0,0 +1,53 @@
+"""
+Wiki corpus - Recorded wiki pages on disk
+A corpus is a folder holding raw page HTML under pages/ and a manifest.json that maps
+wiki page names to files and lists the heroes whose pages were recorded.
+"""
+
+import os
+import json
+from urllib.parse import quote
+
+MANIFEST_FILE = "manifest.json"
+PAGES_FOLDER = "pages"
+
+# Listing pages read by bootstrap_database
+INDEX_PAGES = ["List_of_Heroes", "Weapon_Refinery", "Resplendent_Heroes", "Combat_Manuals"]
+
+
+def page_filename(page: str) -> str:
+    """Return the corpus-relative file of a wiki page"""
+    return f"{PAGES_FOLDER}/{quote(page, safe='')}.html"
+
+
+def load_manifest(corpus_dir: str) -> dict:
+    """Load a corpus manifest ({"pages": {page: file}, "heroes": [hero info, ...]})"""
+    path = os.path.join(corpus_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No corpus manifest at {path} (record one with benchmarks.record_corpus)")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(corpus_dir: str, manifest: dict):
+    with open(os.path.join(corpus_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+
+def write_page(corpus_dir: str, manifest: dict, page: str, content: bytes):
+    """Store a page's raw HTML in the corpus and register it in the manifest"""
+    filename = page_filename(page)
+    path = os.path.join(corpus_dir, filename)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+    manifest.setdefault("pages", {})[page] = filename
+
+
+def read_page(corpus_dir: str, manifest: dict, page: str):
+    """Return a page's raw HTML, or None if it was not recorded"""
+    filename = manifest.get("pages", {}).get(page)
+    if filename is None:
+        return None
+    with open(os.path.join(corpus_dir, filename), "rb") as f:
+        return f.read()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Mock wiki server - Local HTTP stand-in for the FEH wiki
+Serves a recorded corpus at http://127.0.0.1:<port>/wiki/<page> with configurable
+latency and bandwidth, so the fetch pipeline can be measured without network access.
+Pages can be edited while it runs: the edits are listed by a MediaWiki-style recent
+changes API at /api.php, which the watch mode of the launcher polls.
+"""
+
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import utils
+from .corpus import load_manifest, read_page
+
+CHUNK_SIZE = 16 * 1024
+
+
+class MockWiki:
+    """Serve a corpus in a background thread; use as a context manager"""
+
+    def __init__(self, corpus_dir: str, latency: float = 0.0, bandwidth: float = None,
+                 host: str = "127.0.0.1", port: int = 0, patch_utils: bool = True):
+        """
+        Args:
+            corpus_dir: Recorded corpus folder (see benchmarks/corpus.py)
+            latency: Seconds to wait before answering each request
+            bandwidth: Bytes per second the body is throttled to (None for unlimited)
+            patch_utils: Point utils.WIKI_URL at this server while it runs
+        """
+        self.corpus_dir = corpus_dir
+        self.manifest = load_manifest(corpus_dir)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.patch_utils = patch_utils
+        self.requests = 0
+        # Recent changes (oldest first) and the content of edited pages
+        self.changes = []
+        self._edited = {}
+        self._changes_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self.__handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+        self._previous_url = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/wiki"
+
+    @property
+    def api_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api.php"
+
+    def edit(self, page: str, content: bytes = None) -> dict:
+        """Record an edit of a page (replacing its content if given); returns the recent change entry"""
+        with self._changes_lock:
+            if content is not None:
+                self._edited[page] = content
+            change = {
+                "type": "edit",
+                "ns": 0,
+                "title": page.replace("_", " "),
+                "rcid": len(self.changes) + 1,
+                "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            }
+            self.changes.append(change)
+        return change
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-wiki", daemon=True)
+        self._thread.start()
+        if self.patch_utils:
+            self._previous_url = utils.WIKI_URL
+            utils.WIKI_URL = self.url
+        return self
+
+    def stop(self):
+        if self.patch_utils and self._previous_url is not None:
+            utils.WIKI_URL = self._previous_url
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def route(self, path: str):
+        """Return (status, body) for a request path; override to add endpoints"""
+        parts = urlsplit(path)
+        path = parts.path
+        if path == "/api.php":
+            return self.__api(parse_qs(parts.query))
+        if not path.startswith("/wiki/"):
+            return 404, b"Not found"
+        page = unquote(path[len("/wiki/"):])
+        content = self._edited.get(page) or read_page(self.corpus_dir, self.manifest, page)
+        if content is None:
+            return 404, b"Page not recorded"
+        return 200, content
+
+    def __api(self, query: dict):
+        """list=recentchanges of the MediaWiki API: rcstart, rcdir, rclimit, rcnamespace and rccontinue"""
+        option = lambda name, default=None: query.get(name, [default])[0]
+        if option("action") != "query" or option("list") != "recentchanges":
+            return 400, b'{"error": {"code": "badparams"}}'
+        newer = option("rcdir", "older") == "newer"
+        limit = int(option("rclimit", 10))
+        with self._changes_lock:
+            changes = list(self.changes)
+        if option("rcnamespace") is not None:
+            namespaces = {int(ns) for ns in option("rcnamespace").split("|")}
+            changes = [change for change in changes if change["ns"] in namespaces]
+        if not newer:
+            changes.reverse()
+        if option("rcstart"):
+            start = option("rcstart")
+            changes = [change for change in changes if (change["timestamp"] >= start if newer else change["timestamp"] <= start)]
+        if option("rccontinue"):
+            timestamp, rcid = option("rccontinue").split("|")
+            position = (timestamp, int(rcid))
+            changes = [change for change in changes
+                       if ((change["timestamp"], change["rcid"]) >= position if newer
+                           else (change["timestamp"], change["rcid"]) <= position)]
+        result = {"batchcomplete": True, "query": {"recentchanges": changes[:limit]}}
+        if len(changes) > limit:
+            result["continue"] = {"rccontinue": f"{changes[limit]['timestamp']}|{changes[limit]['rcid']}", "continue": "-||"}
+        return 200, json.dumps(result).encode("utf-8")
+
+    def __handler_class(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                mock.requests += 1
+                if mock.latency:
+                    time.sleep(mock.latency)
+                status, body = mock.route(self.path)
+                self.send_response(status)
+                if self.path.startswith("/api.php"):
+                    self.send_header("Content-Type", "application/json; charset=utf-8")
+                else:
+                    self.send_header("Content-Type", "text/html; charset=utf-8" if status == 200 else "text/plain")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                for start in range(0, len(body), CHUNK_SIZE):
+                    chunk = body[start:start + CHUNK_SIZE]
+                    self.wfile.write(chunk)
+                    if mock.bandwidth:
+                        time.sleep(len(chunk) / mock.bandwidth)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a recorded wiki corpus locally")
+    parser.add_argument("--corpus", required=True, help="Recorded corpus folder")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added before each response")
+    parser.add_argument("--bandwidth", type=float, default=None, help="Bytes per second per response")
+    args = parser.parse_args()
+
+    server = MockWiki(args.corpus, args.latency, args.bandwidth, port=args.port, patch_utils=False).start()
+    print(f"Serving {args.corpus} at {server.url}")
+    print(f"Run the launcher against it with FEHTCHER_WIKI_URL={server.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
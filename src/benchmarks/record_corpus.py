@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Corpus recorder
+Records the listing pages and a deterministic sample of hero pages from the wiki
+into a corpus folder that benchmarks.mock_wiki can serve offline.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+
+import requests
+
+import utils
+from bootstrap import bootstrap_database
+from .corpus import INDEX_PAGES, save_manifest, write_page
+from .mock_wiki import MockWiki
+
+
+def record_corpus(corpus_dir: str, hero_count: int = 300):
+    """Record the index pages and hero_count hero pages (heroes, refines and resplendents)"""
+    os.makedirs(corpus_dir, exist_ok=True)
+    manifest = {"pages": {}, "heroes": []}
+    session = requests.Session()
+
+    for page in INDEX_PAGES:
+        print(f"Recording {page}...")
+        write_page(corpus_dir, manifest, page, session.get(utils.wiki_page_url(page), timeout=60).content)
+    save_manifest(corpus_dir, manifest)
+
+    # Parse the recorded listings locally to pick the hero pages
+    with MockWiki(corpus_dir), contextlib.redirect_stdout(io.StringIO()):
+        data = bootstrap_database()
+    heroes = [hero for category in ("heroes", "refines", "resplendents") for hero in data[category].values()]
+    heroes.sort(key=lambda hero: (hero["category"], hero["hero_id"]))
+    step = max(1, len(heroes) // hero_count) if hero_count else 1
+    selected = heroes[::step][:hero_count]
+
+    for i, hero in enumerate(selected, 1):
+        print(f"Recording hero {i}/{len(selected)}: {hero['url_id']}")
+        page = hero["url_id"]
+        if page not in manifest["pages"]:
+            write_page(corpus_dir, manifest, page, session.get(utils.wiki_page_url(page), timeout=60).content)
+        manifest["heroes"].append(hero)
+    save_manifest(corpus_dir, manifest)
+    print(f"Recorded {len(manifest['pages'])} pages to {corpus_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record wiki pages for offline benchmarks")
+    parser.add_argument("--corpus", default="benchmarks/corpus", help="Corpus folder to write")
+    parser.add_argument("--heroes", type=int, default=300, help="Number of hero pages to record")
+    args = parser.parse_args()
+    record_corpus(args.corpus, args.heroes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Synthetic roster - Deterministic hero pages and databases at N times today's roster
+Heroes are generated from their index alone (same index, same hero), with row counts per
+table matching the current database. They can be written as a complete CSV database,
+as a wiki corpus served by benchmarks.mock_wiki, or fed directly to save_hero_to_files.
+"""
+
+import argparse
+import csv
+import html
+import os
+import random
+
+from hero_data_to_csv import hero_table_to_csv_data
+from save_hero.csv_index import build_index_from_file, write_index
+from save_hero.skill_index import SkillIndex
+from .corpus import save_manifest, write_page
+
+# Heroes in the current roster; scale factors are relative to it
+BASE_ROSTER = 1400
+
+# Variants per character (they list each other as related heroes)
+FAMILY_SIZE = 3
+
+SYLLABLES = ["al", "bel", "cor", "da", "el", "fir", "gra", "hel", "is", "jor", "ka", "lu",
+             "mar", "nor", "os", "pe", "qui", "ra", "sel", "tor", "ul", "ve", "wyn", "xa", "yl", "ze"]
+TITLE_WORDS = ["Brave", "Fallen", "Legendary", "Mythic", "Winter", "Summer", "Spring", "Bridal",
+               "Harvest", "Ninja", "Dancing", "Resplendent", "Starry", "Crimson", "Verdant", "Azure"]
+TITLE_NOUNS = ["Blade", "Heart", "Wing", "Flame", "Dream", "Lance", "Shield", "Bow",
+               "Princess", "Prince", "Knight", "Sage", "Flier", "Tactician", "Dragon", "Hero"]
+WEAPON_TYPES = {"Red Sword": "Sword", "Blue Lance": "Lance", "Green Axe": "Axe", "Red Tome": "Tome",
+                "Colorless Bow": "Bow", "Colorless Dagger": "Dagger", "Colorless Staff": "Staff",
+                "Blue Breath": "Breath", "Green Beast": "Beast"}
+MOVE_TYPES = ["Infantry", "Armored", "Cavalry", "Flying"]
+STATS = ["Atk", "Spd", "Def", "Res"]
+PASSIVE_KINDS = {"A": ["Bond", "Stance", "Solo", "Finish", "Boost"],
+                 "B": ["Breaker", "Pulse", "Guard", "Tempo", "Shield"],
+                 "C": ["Tactic", "Menace", "Rein", "Hone", "Smoke"]}
+ASSISTS = ["Reposition", "Draw Back", "Swap", "Pivot", "Shove", "Smite", "Rally Atk/Spd",
+           "Rally Def/Res", "Rally Up Atk", "Ardent Sacrifice", "Reciprocal Aid", "Physic",
+           "Harsh Command", "Future Vision", "Dance", "Sing", "Play"]
+SPECIALS = ["Moonbow", "Glimmer", "Bonfire", "Iceberg", "Luna", "Aether", "Draconic Aura",
+            "Galeforce", "Astra", "Sol", "Noontime", "Ignis", "Blue Flame", "Deadeye", "Miracle"]
+ARTISTS = ["Kozaki Yusuke", "Maeshima Shigeki", "Sachiko Wada", "Mayo", "Daisuke Izuka", "Yamada Kotaro"]
+
+
+def scaled_roster(factor: float) -> int:
+    """Number of heroes of a roster factor times today's size"""
+    return max(1, int(BASE_ROSTER * factor))
+
+
+def hero_key(index: int) -> str:
+    """Return the Key of the hero at an index"""
+    return _character_name(index // FAMILY_SIZE) + "_" + _title(index).replace(" ", "_")
+
+
+def synthetic_hero(index: int, roster_size: int, seed: int = 0, revision: int = 0) -> tuple[dict, dict]:
+    """
+    Return (hero_info, hero_page_data) for one hero, shaped like the bootstrap listing entry
+    and the fetch_hero_data output. revision changes the hero's skills and stats but not its
+    identity, which is how incremental updates are simulated.
+    """
+    character = index // FAMILY_SIZE
+    name = _character_name(character)
+    title = _title(index)
+    key = hero_key(index)
+    identity = random.Random(f"{seed}:{index}")
+    build = random.Random(f"{seed}:{index}:{revision}")
+    weapon_type = identity.choice(list(WEAPON_TYPES))
+    weapon = WEAPON_TYPES[weapon_type]
+
+    info = [
+        ["Name", name],
+        ["Title", title],
+        ["Standard Artist", identity.choice(ARTISTS)],
+        ["Description", f"A {title.lower()} from the synthetic realm of {name.upper()}, eager to test the database."],
+        ["Rarities", identity.choice(["3–4", "4–5", "5", "4SR"])],
+        ["Weapon Type", weapon_type],
+        ["Move Type", identity.choice(MOVE_TYPES)],
+        ["Voice ActorEN", identity.choice(ARTISTS)],
+        ["Voice ActorJP", identity.choice(ARTISTS)],
+        ["Release Date", f"{2017 + index * 8 // max(roster_size, 1)}-{identity.randint(1, 12):02d}-{identity.randint(1, 28):02d}"],
+        ["Entry", "Heroes"],
+        ["Version", f"{1 + index * 8 // max(roster_size, 1)}.{build.randint(0, 11)}"],
+        ["Internal ID", f"PID_{name}({index})"],
+        ["Origin", f"{identity.randint(0, 2 ** 40):011d}"],
+    ]
+    related = [hero_key(other) for other in range(character * FAMILY_SIZE, min((character + 1) * FAMILY_SIZE, roster_size))
+               if other != index]
+    icon_url = f"https://static.wikia.nocookie.net/feheroes_gamepedia_en/images/{key}_Face_FC.webp"
+
+    page_data = {
+        "Info": info,
+        "Related Heroes": ",".join(related),
+        "Portraits": {"Portrait": icon_url.replace("_Face_FC", "_Face")},
+        "Weapons": _weapons_table(build, weapon, name, index),
+        "Assists": _table(["Name", "Range", "Description", "SP", "Default", "Unlock"],
+                          [[assist, "1", f'"Assist {assist}, used by {name}."', "150", "4", "4"]
+                           for assist in build.sample(ASSISTS, 1 if build.random() < 0.65 else 0)]),
+        "Specials": _table(["Name", "Cooldown", "Description", "SP", "Default", "Unlock"],
+                           [[special, str(build.randint(2, 5)), f'"Boosts damage by {build.randint(3, 8) * 10}%, once."',
+                             "200", str(rarity), str(rarity)]
+                            for rarity, special in zip((4, 5), build.sample(SPECIALS, build.choice([1, 2, 2])))]),
+        "Passives": _passives_table(build, name, index),
+    }
+    # Pages without a section have no table at all
+    page_data = {field: value for field, value in page_data.items() if value or field == "Related Heroes"}
+    hero_info = {"hero_id": key, "url_id": f"{name}:_{title.replace(' ', '_')}", "icon_url": icon_url, "category": "heroes"}
+    return hero_info, page_data
+
+
+def synthetic_heroes(roster_size: int, seed: int = 0, revision: int = 0):
+    """Yield (hero_info, hero_page_data) for every hero of a roster"""
+    for index in range(roster_size):
+        yield synthetic_hero(index, roster_size, seed, revision)
+
+
+def generate_database(folder_path: str, roster_size: int, seed: int = 0) -> dict:
+    """
+    Write a complete database of roster_size heroes in one pass, with the same layout
+    save_hero_to_files produces (info.csv, hero skill tables with sidecar indexes, skills
+    catalog, related_heroes.csv, heroes.txt and skill_index.json).
+    Returns the number of rows written per file.
+    """
+    os.makedirs(os.path.join(folder_path, "skills"), exist_ok=True)
+    tables = {}
+    catalogs = {}
+    counts = {}
+    info_header = None
+    with open(os.path.join(folder_path, "info.csv"), "w", encoding="utf-8", newline="") as info_file, \
+            open(os.path.join(folder_path, "related_heroes.csv"), "w", encoding="utf-8") as related_file, \
+            open(os.path.join(folder_path, "heroes.txt"), "w", encoding="utf-8") as done_file:
+        info_writer = csv.writer(info_file)
+        try:
+            for hero_info, page_data in synthetic_heroes(roster_size, seed):
+                page_data.pop("Portraits")
+                csv_data = hero_table_to_csv_data(hero_info["hero_id"], page_data)
+                if info_header is None:
+                    info_header = list(csv_data["Info"])
+                    info_writer.writerow(info_header)
+                info_writer.writerow([csv_data["Info"].get(field, "") for field in info_header])
+                related_file.write(csv_data["Related Heroes"] + "\n")
+                done_file.write(hero_info["hero_id"] + "\n")
+                for table_name, lines in csv_data["Hero Skills"].items():
+                    table_file = tables.get(table_name)
+                    if table_file is None:
+                        table_file = open(os.path.join(folder_path, f"{table_name.lower()}.csv"), "w", encoding="utf-8")
+                        table_file.write(lines[0] + "\n")
+                        tables[table_name] = table_file
+                    table_file.write("".join(line + "\n" for line in lines[1:]))
+                    counts[table_name] = counts.get(table_name, 0) + len(lines) - 1
+                for table_name, lines in csv_data["Skills"].items():
+                    header, catalog = catalogs.setdefault(table_name, (lines[0], {}))
+                    for line in lines[1:]:
+                        catalog[next(csv.reader([line]))[0]] = line
+        finally:
+            for table_file in tables.values():
+                table_file.close()
+
+    for table_name, (header, catalog) in catalogs.items():
+        with open(os.path.join(folder_path, "skills", f"skill_{table_name.lower()}.csv"), "w", encoding="utf-8") as f:
+            f.write("\n".join([header] + list(catalog.values())) + "\n")
+        counts[f"skill_{table_name.lower()}"] = len(catalog)
+    for table_name in tables:
+        filename = os.path.join(folder_path, f"{table_name.lower()}.csv")
+        write_index(filename, build_index_from_file(filename))
+    SkillIndex.load(folder_path).save()
+    counts["info"] = roster_size
+    return counts
+
+
+def generate_corpus(corpus_dir: str, roster_size: int, seed: int = 0, manuals: int = 20) -> dict:
+    """Write a wiki corpus (listing pages and one page per hero) for benchmarks.mock_wiki"""
+    manifest = {"pages": {}, "heroes": []}
+    rows = []
+    for hero_info, page_data in synthetic_heroes(roster_size, seed):
+        write_page(corpus_dir, manifest, hero_info["url_id"], hero_page_html(hero_info, page_data).encode("utf-8"))
+        manifest["heroes"].append(hero_info)
+        rows.append(f'<tr><td>{_img(hero_info["icon_url"])}</td>'
+                    f'<td><a href="/wiki/{hero_info["url_id"]}" title="{html.escape(hero_info["url_id"].replace("_", " "))}">'
+                    f'{html.escape(hero_info["url_id"])}</a></td></tr>')
+    write_page(corpus_dir, manifest, "List_of_Heroes", _html_document(
+        f'<table class="sortable"><tr><th>Icon</th><th>Hero</th></tr>{"".join(rows)}</table>').encode("utf-8"))
+    write_page(corpus_dir, manifest, "Resplendent_Heroes", _html_document('<table class="sortable"><tr><th>Icon</th></tr></table>').encode("utf-8"))
+    write_page(corpus_dir, manifest, "Weapon_Refinery", _html_document("<table></table><table></table>").encode("utf-8"))
+
+    manual_tables = ["<table></table>"]
+    for number in range(manuals):
+        icons = "".join(_img(hero["icon_url"]) for hero in manifest["heroes"][number::max(manuals, 1)][:12])
+        manual_tables.append(f"<table><caption>Book {number + 1}</caption><tr><th>Skill</th><th>Heroes</th></tr>"
+                             f"<tr><td>{SPECIALS[number % len(SPECIALS)]}</td><td>{icons}</td></tr></table>")
+    write_page(corpus_dir, manifest, "Combat_Manuals", _html_document("".join(manual_tables)).encode("utf-8"))
+    save_manifest(corpus_dir, manifest)
+    return {"pages": len(manifest["pages"]), "heroes": len(manifest["heroes"])}
+
+
+def hero_page_html(hero_info: dict, page_data: dict) -> str:
+    """Render hero page data as the wiki markup fetcher extracts it from"""
+    info = dict(page_data["Info"])
+    portraits = "".join(_img(url) for url in page_data.get("Portraits", {}).values())
+    infobox = [f'<tr><th colspan="2">{html.escape(info["Name"])}{portraits}</th></tr>',
+               f'<tr><td colspan="2">Art by: {html.escape(info["Standard Artist"])}</td></tr>']
+    infobox += [f"<tr><th>{html.escape(field)}</th><td>{html.escape(value)}</td></tr>"
+                for field, value in page_data["Info"] if field not in ("Name", "Title", "Standard Artist")]
+    related = "".join(_img(f"https://static.wikia.nocookie.net/feheroes_gamepedia_en/images/{key}_Face_FC.webp")
+                      for key in page_data["Related Heroes"].split(",") if key)
+    sections = []
+    for table_name in ("Weapons", "Assists", "Specials", "Passives"):
+        rows = list(csv.reader(page_data.get(table_name, "").splitlines()))
+        if len(rows) < 2:
+            continue
+        body = "".join("<tr>" + "".join(f"<td>{html.escape(cell)}</td>" for cell in row) + "</tr>" for row in rows[1:])
+        sections.append(f'<h3><span class="mw-headline">{table_name}</span></h3>'
+                        f'<table><tr>{"".join(f"<th>{html.escape(cell)}</th>" for cell in rows[0])}</tr>{body}</table>')
+    return _html_document(
+        f'<h1 class="page-header__title">{html.escape(info["Name"])}: {html.escape(info["Title"])}</h1>'
+        f'<table class="hero-infobox">{"".join(infobox)}</table>'
+        f'<table class="character-about"><tr><td>{related}</td></tr></table>'
+        + "".join(sections)
+    )
+
+
+def _character_name(character: int) -> str:
+    """Unique pronounceable name for a character id (bijective base-26 over syllables)"""
+    parts = []
+    character += 1
+    while character:
+        character, digit = divmod(character - 1, len(SYLLABLES))
+        parts.append(SYLLABLES[digit])
+    return "".join(reversed(parts)).capitalize()
+
+
+def _title(index: int) -> str:
+    """Title of a hero, distinct among its character's variants"""
+    variant = index % FAMILY_SIZE
+    return f"{TITLE_WORDS[(index // FAMILY_SIZE + variant) % len(TITLE_WORDS)]} {TITLE_NOUNS[(index * 7 + variant) % len(TITLE_NOUNS)]}"
+
+
+def _table(header: list[str], rows: list[list[str]]) -> str:
+    """Render a table the way utils.table_to_csv does (cells already quoted where needed)"""
+    if not rows:
+        return ""
+    return "\n".join(",".join(row) for row in [header] + rows)
+
+
+def _weapons_table(build: random.Random, weapon: str, name: str, index: int) -> str:
+    """Generic Iron/Steel/Silver chain plus a personal weapon, about four rows per hero"""
+    rows = [[f"{grade} {weapon}", str(might), "1", "", str(sp), str(rarity), str(rarity)]
+            for grade, might, sp, rarity in (("Iron", 6, 50, 1), ("Steel", 8, 100, 2), ("Silver", 11, 200, 3))]
+    rows.append([f"{name}'s {weapon} {index}", str(build.randint(14, 16)), "1",
+                 f'"Grants Atk+{build.randint(3, 6)}, Spd+{build.randint(3, 6)} during combat."', "400", "5", "5"])
+    return _table(["Name", "Might", "Range", "Description", "SP", "Default", "Unlock"], rows)
+
+
+def _passives_table(build: random.Random, name: str, index: int) -> str:
+    """Two or three levels of an A, B and C skill, with an occasional personal skill"""
+    rows = []
+    for slot, kinds in PASSIVE_KINDS.items():
+        stats = "/".join(build.sample(STATS, 2))
+        base = f"{name} Echo {slot}{index}" if build.random() < 0.1 else f"{stats} {build.choice(kinds)}"
+        for level in range(1, build.choice([2, 3, 3, 3]) + 1):
+            rows.append([slot, "", f"{base} {level}", f'"Grants {stats}+{level * 2}, if unit initiates combat."',
+                         str(level * 60), str(level + 2)])
+    return _table(["Type", "", "Name", "Description", "SP", "Unlock"], rows) + "\n"
+
+
+def _img(url: str) -> str:
+    return f'<img data-src="{html.escape(url)}/revision/latest?cb=20240101">'
+
+
+def _html_document(body: str) -> str:
+    return f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"></head><body>{body}</body></html>"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic database or wiki corpus")
+    parser.add_argument("kind", choices=["database", "corpus"], help="What to generate")
+    parser.add_argument("--output", required=True, help="Folder to write")
+    parser.add_argument("--factor", type=float, default=10, help=f"Roster size relative to today's ({BASE_ROSTER} heroes)")
+    parser.add_argument("--heroes", type=int, help="Exact number of heroes (overrides --factor)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    roster_size = args.heroes or scaled_roster(args.factor)
+    if args.kind == "database":
+        counts = generate_database(args.output, roster_size, args.seed)
+    else:
+        counts = generate_corpus(args.output, roster_size, args.seed)
+    print(f"Generated {args.kind} with {roster_size} heroes in {args.output}: {counts}")
+
+
+if __name__ == "__main__":
+    main()
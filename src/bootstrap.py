@@ -1,25 +1,51 @@
+import os
+import json
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
 import utils
+from save_hero.file_lock import atomic_write
+
+# Listings in the order they are collected and returned
+CATEGORIES = ('heroes', 'refines', 'resplendents', 'manuals')
+
+# Wiki page of each listing
+LISTING_PAGES = {
+    'heroes': "List_of_Heroes",
+    'refines': "Weapon_Refinery",
+    'resplendents': "Resplendent_Heroes",
+    'manuals': "Combat_Manuals",
+}
+
+# Seconds a listing snapshot is reused before the listing pages are fetched again
+SNAPSHOT_TTL = 6 * 60 * 60
+
+# Bumped whenever the collectors change what they return, so older snapshots are ignored
+SNAPSHOT_VERSION = 2
+
 
 # Master function that orchestrates everything
-def bootstrap_database() -> dict[str, list[dict]]:
+def bootstrap_database(snapshot_path: str = None, ttl: float = SNAPSHOT_TTL, refresh: bool = False) -> dict[str, list[dict]]:
     """
     Master function that initializes the entire database.
     Returns a dictionary with all collected data.
-    """
-    HEROES_PAGE = "https://feheroes.fandom.com/wiki/List_of_Heroes"
-    RESPLENDENTS_PAGE = "https://feheroes.fandom.com/wiki/Resplendent_Heroes"
-    REFINES_PAGE = "https://feheroes.fandom.com/wiki/Weapon_Refinery"
-    MANUALS_PAGE = "https://feheroes.fandom.com/wiki/Combat_Manuals"
 
+    The four listing pages are fetched and parsed concurrently. With a snapshot_path, the
+    listings are saved there and reused by the next runs for ttl seconds (unless refresh).
+    """
     print("Starting database bootstrap...")
-    
-    data = {}
-    
-    # Collect all data
-    data['heroes'] = __collect_heroes(HEROES_PAGE,"Collecting heroes data...")
-    data['refines'] = __collect_refines(REFINES_PAGE,"Collecting refines data...")
-    data['resplendents'] = __collect_heroes(RESPLENDENTS_PAGE,"Collecting resplendent heroes data...")
-    data['manuals'] = __collect_manuals(MANUALS_PAGE,"Collecting manuals data...")
+
+    data = None if refresh else load_snapshot(snapshot_path, ttl)
+    if data is None:
+        # Collect all data, one thread per listing page
+        with ThreadPoolExecutor(max_workers=len(CATEGORIES)) as executor:
+            futures = [(category, executor.submit(collect)) for category, collect in __collectors()]
+            data = {category: future.result() for category, future in futures}
+        if snapshot_path:
+            save_snapshot(snapshot_path, data)
+    else:
+        print(f"Using the listings saved in {snapshot_path}")
     
     print(f"Bootstrap complete! Collected:")
     print(f"- {len(data['heroes'])} heroes")
@@ -30,12 +56,115 @@ def bootstrap_database() -> dict[str, list[dict]]:
     return data
 
 
+def iter_bootstrap(snapshot_path: str = None, ttl: float = SNAPSHOT_TTL, refresh: bool = False):
+    """
+    Yield (category, listing) for heroes, refines, resplendents and manuals, fetching each
+    listing page only when the previous category has been consumed (streaming mode).
+    A fresh snapshot is read one listing at a time instead; otherwise, with a snapshot_path,
+    each listing is appended to a new snapshot that replaces the old one once all are fetched.
+    """
+    listings = None if refresh else read_snapshot(snapshot_path, ttl)
+    if listings is not None:
+        print(f"Using the listings saved in {snapshot_path}")
+        yield from listings
+        return
+    if not snapshot_path:
+        for category, collect in __collectors():
+            yield category, collect()
+        return
+    with snapshot_writer(snapshot_path) as write:
+        for category, collect in __collectors():
+            listing = collect()
+            write(category, listing)
+            yield category, listing
+
+
+def collect_listing(category: str):
+    """Fetch and parse the listing page of one category (e.g. after the page was edited)"""
+    return dict(__collectors())[category]()
+
+
+def load_snapshot(snapshot_path: str, ttl: float = SNAPSHOT_TTL) -> dict | None:
+    """All the listings of the snapshot, or None if it is missing, expired or from another wiki/version"""
+    listings = read_snapshot(snapshot_path, ttl)
+    if listings is None:
+        return None
+    data = dict(listings)
+    return data if all(category in data for category in CATEGORIES) else None
+
+
+def save_snapshot(snapshot_path: str, data: dict):
+    """Save the listings of every category as a snapshot (see snapshot_writer)"""
+    with snapshot_writer(snapshot_path) as write:
+        for category in CATEGORIES:
+            write(category, data[category])
+
+
+@contextmanager
+def snapshot_writer(snapshot_path: str):
+    """
+    Yield write(category, listing) appending one listing to a new snapshot, which replaces
+    snapshot_path when the block ends without error. Snapshots are compact JSON lines: a
+    header line (version, wiki, time), then one [category, listing] line per category, so
+    streaming runs can write and read them one listing at a time.
+    """
+    with atomic_write(snapshot_path) as f:
+        f.write(json.dumps({"version": SNAPSHOT_VERSION, "wiki_url": utils.WIKI_URL, "saved_at": time.time()}) + "\n")
+
+        def write(category: str, listing):
+            f.write(json.dumps([category, listing], separators=(",", ":")) + "\n")
+
+        yield write
+
+
+def read_snapshot(snapshot_path: str, ttl: float = SNAPSHOT_TTL):
+    """
+    Iterator over the (category, listing) of a snapshot saved less than ttl seconds ago, or
+    None if it is missing, expired or from another wiki/version
+    """
+    if not snapshot_path or ttl <= 0 or not os.path.exists(snapshot_path):
+        return None
+    try:
+        f = open(snapshot_path, encoding="utf-8")
+    except OSError:
+        return None
+    try:
+        header = json.loads(f.readline())
+    except ValueError:
+        header = None
+    if (not isinstance(header, dict) or header.get("version") != SNAPSHOT_VERSION
+            or header.get("wiki_url") != utils.WIKI_URL
+            or not 0 <= time.time() - header.get("saved_at", 0) <= ttl):
+        f.close()
+        return None
+    return __snapshot_listings(f)
+
+
+def __snapshot_listings(f):
+    # Read from the file the header was checked in, even if a newer snapshot replaces it meanwhile
+    with f:
+        for line in f:
+            category, listing = json.loads(line)
+            yield category, listing
+
+
+def __collectors() -> list:
+    """(category, collect) of every listing page, in CATEGORIES order"""
+    return [
+        ('heroes', lambda: __collect_heroes(utils.wiki_page_url(LISTING_PAGES['heroes']), "Collecting heroes data...")),
+        ('refines', lambda: __collect_refines(utils.wiki_page_url(LISTING_PAGES['refines']), "Collecting refines data...")),
+        ('resplendents', lambda: __collect_heroes(utils.wiki_page_url(LISTING_PAGES['resplendents']), "Collecting resplendent heroes data...")),
+        ('manuals', lambda: __collect_manuals(utils.wiki_page_url(LISTING_PAGES['manuals']), "Collecting manuals data...")),
+    ]
+
+
 def __collect_heroes(page_link: str, print_message: str) -> dict[str, dict]:
     """Extracts hero IDs and their icon URLs from the main hero list page."""
     print(print_message)
     soup = utils.open_page(page_link)
     hero_table = soup.find("table", class_="sortable")
     if not hero_table:
+        soup.decompose()
         return {}
 
     heroes_data = {}
@@ -67,40 +196,27 @@ def __collect_heroes(page_link: str, print_message: str) -> dict[str, dict]:
                 'category': "resplendents" if ("resplendent" in print_message) else "heroes",
             } 
 
+    # Free the page tree now rather than whenever the garbage collector gets to it
+    soup.decompose()
     return heroes_data
 
 
 def __collect_refines(page_link: str, print_message: str) -> dict[str, dict]:
     """
-    Extracts refine data from weapon refinery tables.
+    Extracts refine data from weapon refinery tables, in one pass over the page.
     Returns: Dictionary with hero_id as key and refine data as value
     """
     print(print_message)
-    weapons_tables = utils.open_page(page_link).find_all("table")
+    soup = utils.open_page(page_link)
+    weapons_tables = soup.find_all("table")
     FIRST_REFINE_INDEX = 1
 
     refines = {}
     
     for weapon_table in weapons_tables[FIRST_REFINE_INDEX:-1]:
-        hero_links = weapon_table.find("tr").find_all("a")
-        hero_imgs = weapon_table.find("tr").find_all("img")
-    
-        # Filter for face images (preserving the original logic)
-        hero_imgs = [html for html in hero_imgs if "_Face_FC" in str(html)]
-        face_fc_imgs = [str(img).split('_Face_FC')[0] for img in hero_imgs]
-        hero_ids = [img.split('key="')[-1] for img in face_fc_imgs]
-
-        # Extract hero IDs from links
-        url_ids= []
-        for hero_link in hero_links:
-            url_id = hero_link.get('title')
-            if url_id and not url_id.endswith("5★"):
-                url_ids.append(url_id.replace(" ", "_"))
-        url_ids = list(set(url_ids))
-        
         csv_string = utils.refine_table_to_csv(weapon_table)
 
-        for url_id, hero_id in zip(url_ids,hero_ids):
+        for hero_id, url_id in __refine_owners(weapon_table.find("tr")):
             refines[hero_id] = {
                 'hero_id': hero_id,
                 'url_id': url_id,
@@ -108,16 +224,51 @@ def __collect_refines(page_link: str, print_message: str) -> dict[str, dict]:
                 'category': "refines",
             }
 
+    soup.decompose()
     return refines
 
 
+def __refine_owners(first_row) -> list[tuple[str, str]]:
+    """
+    (hero_id, url_id) of the heroes a refine table belongs to, in page order. Each face image
+    is paired with the hero link around it, else with the hero link at the same position.
+    """
+    url_ids = []
+    for hero_link in first_row.find_all("a"):
+        url_id = __refine_hero_url_id(hero_link)
+        if url_id:
+            url_ids.append(url_id)
+    # A hero linked more than once (face and name) keeps its first position
+    url_ids = list(dict.fromkeys(url_ids))
+
+    owners = []
+    face_imgs = [img for img in first_row.find_all("img") if "_Face_FC" in str(img)]
+    for position, img in enumerate(face_imgs):
+        hero_id = str(img).split('_Face_FC')[0].split('key="')[-1]
+        url_id = __refine_hero_url_id(img.find_parent("a"))
+        if not url_id and position < len(url_ids):
+            url_id = url_ids[position]
+        if url_id:
+            owners.append((hero_id, url_id))
+    return owners
+
+
+def __refine_hero_url_id(hero_link) -> str | None:
+    """Page of a hero link in a refine table (links to the 5★ weapon versions are skipped)"""
+    url_id = hero_link.get('title') if hero_link is not None else None
+    if not url_id or url_id.endswith("5★"):
+        return None
+    return url_id.replace(" ", "_")
+
+
 def __collect_manuals(page_link: str, print_message: str) -> list[dict]:
     """
     Extracts manual data from combat manuals tables.
     Returns: Dictionary with hero_id as key and manual data as value
     """
     print(print_message)
-    manuals_tables = utils.open_page(page_link).find_all("table")
+    soup = utils.open_page(page_link)
+    manuals_tables = soup.find_all("table")
     first_manuals_index = 1
     
     manuals = []
@@ -161,4 +312,5 @@ def __collect_manuals(page_link: str, print_message: str) -> list[dict]:
                 'category': "manuals",
             })
 
+    soup.decompose()
     return manuals
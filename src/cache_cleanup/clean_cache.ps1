@@ -1,11 +1,13 @@
 # Clean Python Cache Script
-# Removes all __pycache__ folders and .pyc files from the project
+# Removes all __pycache__ folders and .pyc files from the source tree (src/, not the database folder)
 
-Write-Host "🧹 Cleaning Python cache files..." -ForegroundColor Green
+$sourceRoot = Split-Path -Parent $PSScriptRoot
+
+Write-Host "🧹 Cleaning Python cache files in $sourceRoot..." -ForegroundColor Green
 
 # Count cache folders before cleanup
-$cacheFolders = Get-ChildItem -Recurse -Directory -Name "__pycache__" -ErrorAction SilentlyContinue
-$pycFiles = Get-ChildItem -Recurse -File -Name "*.pyc" -ErrorAction SilentlyContinue
+$cacheFolders = Get-ChildItem -Path $sourceRoot -Recurse -Directory -Filter "__pycache__" -ErrorAction SilentlyContinue
+$pycFiles = Get-ChildItem -Path $sourceRoot -Recurse -File -Filter "*.pyc" -ErrorAction SilentlyContinue
 
 $totalCacheFolders = $cacheFolders.Count
 $totalPycFiles = $pycFiles.Count
@@ -20,18 +22,18 @@ Write-Host "Found $totalCacheFolders __pycache__ folders and $totalPycFiles .pyc
 # Remove all __pycache__ folders
 if ($totalCacheFolders -gt 0) {
     Write-Host "🗑️  Removing __pycache__ folders..." -ForegroundColor Cyan
-    Get-ChildItem -Recurse -Directory -Name "__pycache__" | ForEach-Object {
-        Remove-Item -Recurse -Force $_ -ErrorAction SilentlyContinue
-        Write-Host "  Removed: $_" -ForegroundColor Gray
+    $cacheFolders | ForEach-Object {
+        Remove-Item -Recurse -Force $_.FullName -ErrorAction SilentlyContinue
+        Write-Host "  Removed: $($_.FullName)" -ForegroundColor Gray
     }
 }
 
 # Remove all .pyc files
 if ($totalPycFiles -gt 0) {
     Write-Host "🗑️  Removing .pyc files..." -ForegroundColor Cyan
-    Get-ChildItem -Recurse -File -Name "*.pyc" | ForEach-Object {
-        Remove-Item -Force $_ -ErrorAction SilentlyContinue
-        Write-Host "  Removed: $_" -ForegroundColor Gray
+    $pycFiles | ForEach-Object {
+        Remove-Item -Force $_.FullName -ErrorAction SilentlyContinue
+        Write-Host "  Removed: $($_.FullName)" -ForegroundColor Gray
     }
 }
 
@@ -1,53 +1,96 @@
 #!/usr/bin/env python3
 """
 Python Cache Cleaner
-Automatically removes all __pycache__ folders and .pyc files from the project.
+Removes the __pycache__ folders and .pyc files of the source tree (src/ by default).
+The database folder next to it holds thousands of images and never holds bytecode, so it
+is not walked. With --stale, only bytecode whose source file is gone is removed: the rest
+stays valid (Python recompiles a module whose source changed) and keeps startup fast.
 """
 
 import os
+import sys
 import shutil
+import argparse
 from pathlib import Path
 
-def clean_python_cache():
-    """Clean all Python cache files from the current directory and subdirectories"""
-    print("🧹 Cleaning Python cache files...")
-    
-    # Get the project root (current directory)
-    project_root = Path.cwd()
-    
-    # Count cache items before cleanup
-    cache_folders = list(project_root.rglob("__pycache__"))
-    pyc_files = list(project_root.rglob("*.pyc"))
-    
+# The src/ folder this script lives in
+SOURCE_ROOT = Path(__file__).resolve().parent.parent
+
+
+def clean_python_cache(root: str = None, stale_only: bool = False):
+    """Clean the Python cache files under root (src/ by default); stale_only keeps the bytecode of existing sources"""
+    root = Path(root) if root else SOURCE_ROOT
+    print(f"🧹 Cleaning {'stale ' if stale_only else ''}Python cache files in {root}...")
+
+    cache_folders, pyc_files = __cache_files(root)
+    if stale_only:
+        pyc_files = [pyc_file for pyc_file in pyc_files if not __source_of(pyc_file).exists()]
+        # Only the folders left empty once their stale files are gone
+        stale = set(pyc_files)
+        cache_folders = [folder for folder in cache_folders
+                         if all(path in stale for path in folder.iterdir())]
+
     total_cache_folders = len(cache_folders)
     total_pyc_files = len(pyc_files)
-    
+
     if total_cache_folders == 0 and total_pyc_files == 0:
         print("✅ No cache files found - project is already clean!")
         return
-    
+
     print(f"Found {total_cache_folders} __pycache__ folders and {total_pyc_files} .pyc files")
-    print("🗑️  Removing __pycache__ folders...")
 
-    # Remove all __pycache__ folders
-    if total_cache_folders > 0:
-        for cache_folder in cache_folders:
-            try:
-                shutil.rmtree(cache_folder)
-            except Exception as e:
-                pass
-    
-    # Remove all .pyc files
+    # Remove the .pyc files first, then the folders
     if total_pyc_files > 0:
         print("🗑️  Removing .pyc files...")
         for pyc_file in pyc_files:
             try:
                 pyc_file.unlink()
-            except Exception as e:
+            except OSError:
                 pass
-    
+
+    if total_cache_folders > 0:
+        print("🗑️  Removing __pycache__ folders...")
+        for cache_folder in cache_folders:
+            try:
+                shutil.rmtree(cache_folder)
+            except OSError:
+                pass
+
     print("✅ Cache cleanup completed!")
     print(f"Removed {total_cache_folders} __pycache__ folders and {total_pyc_files} .pyc files")
 
+
+def __cache_files(root: Path) -> tuple[list[Path], list[Path]]:
+    """__pycache__ folders and .pyc/.pyo files under root (hidden folders such as .git are skipped)"""
+    cache_folders, pyc_files = [], []
+    for folder, folder_names, file_names in os.walk(root):
+        folder_names[:] = [name for name in folder_names if not name.startswith(".")]
+        if os.path.basename(folder) == "__pycache__":
+            cache_folders.append(Path(folder))
+        pyc_files.extend(Path(folder, name) for name in file_names if name.endswith((".pyc", ".pyo")))
+    return cache_folders, pyc_files
+
+
+def __source_of(pyc_file: Path) -> Path:
+    """
+    Source file of a bytecode file: __pycache__/module.cpython-311.pyc -> module.py.
+    A .pyc outside __pycache__ is imported even without its source, so it is stale without one.
+    """
+    if pyc_file.parent.name == "__pycache__":
+        return pyc_file.parent.parent / (pyc_file.name.split(".", 1)[0] + ".py")
+    return pyc_file.with_suffix(".py")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Remove Python bytecode from the source tree")
+    parser.add_argument("root", nargs="?", default=None, help=f"Folder to clean (default: {SOURCE_ROOT})")
+    parser.add_argument("--stale", action="store_true",
+                        help="Only remove bytecode whose source file no longer exists")
+    args = parser.parse_args()
+    if args.root and not os.path.isdir(args.root):
+        sys.exit(f"Not a folder: {args.root}")
+    clean_python_cache(args.root, args.stale)
+
+
 if __name__ == "__main__":
-    clean_python_cache()
+    main()
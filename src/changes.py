@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+FEH Data Fetcher - Change feed command
+Prints, records or compacts the row-level change feed the launcher writes after each run
+(database/feed).
+"""
+
+import argparse
+import json
+import sys
+
+import instrumentation
+from save_hero import write_change_feed, read_change_feed, compact_change_feed
+from save_hero.change_feed import default_feed_folder
+
+
+FOLDER_NAME = "database"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read or maintain the change feed of the database folder")
+    parser.add_argument("--folder", default=FOLDER_NAME, help="Database folder")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    show_parser = subparsers.add_parser("show", help="Print the entries after a sequence number (NDJSON)")
+    show_parser.add_argument("--since", type=int, default=0, help="Last sequence number already applied")
+    show_parser.add_argument("--table", action="append", help="Only entries of this table (repeatable)")
+
+    subparsers.add_parser("record", help="Record the changes made since the last run (e.g. edits by hand)")
+
+    compact_parser = subparsers.add_parser("compact", help="Keep only the last entry of each row")
+    compact_parser.add_argument("--drop-deletes", action="store_true",
+                                help="Also drop deletes (consumers behind them would keep the deleted rows)")
+    args = parser.parse_args()
+
+    feed_folder = default_feed_folder(args.folder)
+    if args.command == "show":
+        for entry in read_change_feed(feed_folder, args.since):
+            if not args.table or entry["table"] in args.table:
+                sys.stdout.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    elif args.command == "record":
+        feed = write_change_feed(args.folder, instrumentation.METRICS.run_id)
+        print(f"{feed['upserts']} upserts, {feed['deletes']} deletes"
+              + (f" written to {feed['segment']}" if feed["segment"] else ""))
+    elif args.command == "compact":
+        result = compact_change_feed(feed_folder, args.drop_deletes)
+        print(f"{result['entries']} entries in {result['segments']} segments compacted to {result['kept']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+FEH Data Fetcher - Database export command
+Exports the database folder into formats suited to downstream consumers.
+"""
+
+import argparse
+import os
+import time
+
+from exporters import export_skill_matrix, export_json_bundle, export_columnar
+
+
+FOLDER_NAME = "database"
+EXPORT_FOLDER_NAME = "exports"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the database folder")
+    parser.add_argument("--folder", default=FOLDER_NAME, help="Database folder")
+    parser.add_argument("--output", default=None, help="Export folder (default: <folder>/exports)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    matrix_parser = subparsers.add_parser("matrix", help="Sparse hero x skill matrices (.npz)")
+    matrix_parser.add_argument("--heroes", nargs="+", help="Only rebuild these hero Keys")
+
+    bundle_parser = subparsers.add_parser("bundle", help="Precompressed JSON documents per hero for serving")
+    bundle_parser.add_argument("--heroes", nargs="+", help="Only rebuild these hero Keys")
+    bundle_parser.add_argument("--shards", type=int, default=16, help="Number of index shards")
+    bundle_parser.add_argument("--no-brotli", action="store_true", help="Only write the gzip variants")
+
+    columnar_parser = subparsers.add_parser("columnar", help="Typed Parquet (or Arrow) file per table")
+    columnar_parser.add_argument("--tables", nargs="+", help="Only these tables (e.g. info weapons skill_weapons)")
+    columnar_parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet", help="File format")
+    columnar_parser.add_argument("--force", action="store_true", help="Rewrite tables whose CSV did not change")
+
+    args = parser.parse_args()
+    output = args.output or os.path.join(args.folder, EXPORT_FOLDER_NAME)
+
+    start = time.perf_counter()
+    if args.command == "matrix":
+        result = export_skill_matrix(args.folder, os.path.join(output, "matrix"), args.heroes)
+        print(f"Hero x skill matrix {result['shape'][0]} x {result['shape'][1]}, "
+              f"{result['entries']} entries ({result['rebuilt']} heroes rebuilt, {result['removed']} removed)")
+    elif args.command == "bundle":
+        result = export_json_bundle(args.folder, os.path.join(output, "bundle"), args.heroes,
+                                    args.shards, brotli=not args.no_brotli)
+        print(f"JSON bundle of {result['heroes']} heroes ({result['written']} written, {result['removed']} removed, "
+              f"{result['stale_files']} stale files deleted; encodings: {', '.join(result['encodings'])})")
+    elif args.command == "columnar":
+        result = export_columnar(args.folder, os.path.join(output, "columnar"), args.tables, args.format, args.force)
+        print(f"{len(result['written'])} tables written as {result['format']}, {len(result['unchanged'])} unchanged, "
+              f"{len(result['removed'])} removed" + (f": {', '.join(result['written'])}" if result["written"] else ""))
+    print(f"Export completed in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
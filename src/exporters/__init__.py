@@ -0,0 +1,19 @@
+"""
+Exporters module - Main interface
+This module provides exports of the database folder into formats suited to downstream consumers.
+"""
+
+from .skill_matrix import export_skill_matrix, load_skill_matrix
+from .json_bundle import export_json_bundle, load_json_bundle
+from .columnar import export_columnar, load_columnar, load_columnar_manifest
+
+# Main public interface - this is what the rest of the code uses
+__all__ = [
+    'export_skill_matrix',
+    'load_skill_matrix',
+    'export_json_bundle',
+    'load_json_bundle',
+    'export_columnar',
+    'load_columnar',
+    'load_columnar_manifest',
+]
@@ -0,0 +1,257 @@
+"""
+Columnar exporter - Typed Parquet / Arrow files of the database tables
+This module exports every table of the database folder (info, hero skill tables, skills catalogs,
+related heroes, manuals) as one typed columnar file: empty cells become nulls, dates, versions
+and rarities are parsed, integer columns are typed, and repetitive text columns are
+dictionary-encoded. A manifest records the source of each file, so only the tables whose CSV
+changed since the last export are rewritten.
+"""
+
+import os
+import re
+import csv
+import json
+import hashlib
+from datetime import date, datetime, timezone
+
+from hero_database import Database
+from save_hero.file_lock import atomic_write, file_signature
+from save_hero.manuals_store import read_manual_rows, MANUALS_FILE_NAME, HEROES_FIELD
+
+MANIFEST_FILE = "manifest.json"
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+# Rarity columns of the hero skill tables ("—" when the hero does not have the skill by default)
+RARITY_FIELDS = ("Default", "Unlock")
+
+# Text columns with at most this share of distinct values are dictionary-encoded
+DICTIONARY_RATIO = 0.5
+
+# Values standing for "none" in the wiki tables
+MISSING_VALUES = ("", "—", "-")
+
+# Leading "3— 5" part of a Rarities cell such as "3— 5—Grand Hero Battle" or "4SR"
+RARITY_RANGE = re.compile(r"^[\d\s—–-]*")
+INTEGER = re.compile(r"^-?(0|[1-9]\d*)$")
+VERSION = re.compile(r"^(\d+)\.(\d+)$")
+
+
+def export_columnar(folder_path: str, output_folder: str, tables: list[str] = None,
+                    file_format: str = "parquet", force: bool = False) -> dict:
+    """
+    Export (or incrementally update) the columnar files.
+
+    Args:
+        folder_path: Database folder written by save_hero
+        output_folder: Folder receiving one file per table and manifest.json
+        tables: Only consider these tables (e.g. "info", "weapons", "skill_weapons"); all by default
+        file_format: "parquet" or "arrow" (Arrow IPC file)
+        force: Rewrite the tables even if their CSV did not change
+
+    Returns:
+        Dictionary with the tables written, unchanged and removed
+    """
+    pa = _import_pyarrow()
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown format {file_format!r} (expected one of {', '.join(FORMATS)})")
+    os.makedirs(output_folder, exist_ok=True)
+    manifest = load_columnar_manifest(output_folder)
+    sources = __sources(folder_path)
+    selected = [name for name in sources if tables is None or name in tables]
+
+    written, unchanged = [], []
+    db = Database(folder_path)
+    for name in selected:
+        source = sources[name]
+        entry = manifest["tables"].get(name)
+        # A list, as read back from the JSON manifest
+        signature = list(file_signature(source))
+        if not force and entry is not None and entry["format"] == file_format and \
+                os.path.exists(os.path.join(output_folder, entry["file"])):
+            if entry["source_signature"] == signature:
+                unchanged.append(name)
+                continue
+            # Touched but identical (e.g. a run rewrote the same rows)
+            digest = _file_digest(source)
+            if entry["source_sha256"] == digest:
+                entry["source_signature"] = signature
+                unchanged.append(name)
+                continue
+
+        table = pa.Table.from_pydict(__table_columns(db, name, source))
+        file_name = name + FORMATS[file_format]
+        __write_table(pa, table, os.path.join(output_folder, file_name), file_format)
+        if entry is not None and entry["file"] != file_name and os.path.exists(os.path.join(output_folder, entry["file"])):
+            os.remove(os.path.join(output_folder, entry["file"]))
+        manifest["tables"][name] = {
+            "file": file_name,
+            "format": file_format,
+            "source": os.path.relpath(source, folder_path).replace(os.sep, "/"),
+            "source_signature": signature,
+            "source_sha256": _file_digest(source),
+            "rows": table.num_rows,
+            "schema": [{"name": field.name, "type": str(field.type)} for field in table.schema],
+            "exported_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        written.append(name)
+
+    # Tables whose CSV is gone (only when every table was considered)
+    removed = []
+    if tables is None:
+        for name in sorted(set(manifest["tables"]) - set(sources)):
+            path = os.path.join(output_folder, manifest["tables"].pop(name)["file"])
+            if os.path.exists(path):
+                os.remove(path)
+            removed.append(name)
+
+    with atomic_write(os.path.join(output_folder, MANIFEST_FILE)) as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+    return {"written": written, "unchanged": unchanged, "removed": removed, "format": file_format}
+
+
+def load_columnar_manifest(output_folder: str) -> dict:
+    """The manifest of an export ({"tables": {}} if nothing was exported)"""
+    path = os.path.join(output_folder, MANIFEST_FILE)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return {"tables": {}}
+
+
+def load_columnar(output_folder: str, table_name: str):
+    """Read one exported table as a pyarrow.Table (use .to_pandas() for a DataFrame)"""
+    pa = _import_pyarrow()
+    entry = load_columnar_manifest(output_folder)["tables"][table_name]
+    path = os.path.join(output_folder, entry["file"])
+    if entry["format"] == "arrow":
+        with pa.memory_map(path) as source:
+            return pa.ipc.open_file(source).read_all()
+    import pyarrow.parquet as pq
+    return pq.read_table(path)
+
+
+def _import_pyarrow():
+    """Import pyarrow, which is only needed by this exporter"""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+    except ImportError as e:
+        raise ImportError("The columnar export requires pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+
+def _file_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def __sources(folder_path: str) -> dict[str, str]:
+    """Table name -> CSV file, for every table present"""
+    sources = {}
+    for name in ("info.csv", "related_heroes.csv", MANUALS_FILE_NAME):
+        if os.path.exists(os.path.join(folder_path, name)):
+            sources[name[:-len(".csv")]] = os.path.join(folder_path, name)
+    db = Database(folder_path)
+    for name in db.skill_table_names():
+        sources[name] = os.path.join(folder_path, f"{name}.csv")
+    for skill_type in db.catalog_names():
+        sources[f"skill_{skill_type}"] = os.path.join(folder_path, "skills", f"skill_{skill_type}.csv")
+    return sources
+
+
+def __table_columns(db: Database, name: str, source: str) -> dict:
+    """{column: pyarrow array} of a table"""
+    pa = _import_pyarrow()
+    if name == "related_heroes":
+        keys, related = [], []
+        with open(source, "r", encoding="utf-8", newline="") as f:
+            for values in csv.reader(f):
+                if values:
+                    keys.append(values[0])
+                    related.append(values[1:])
+        return {"Key": pa.array(keys, pa.string()), "Related": pa.array(related, pa.list_(pa.string()))}
+
+    if name == MANUALS_FILE_NAME[:-len(".csv")]:
+        header, rows = read_manual_rows(source)
+        columns = {"Caption": _text_column(pa, [caption for caption, _ in rows]),
+                   "Position": pa.array([position for _, position in rows], pa.int32())}
+        for field in header[1:-1]:
+            columns.update(_typed_columns(pa, field, [row.get(field, "") for row in rows.values()]))
+        columns[HEROES_FIELD] = pa.array(
+            [[hero_id.strip() for hero_id in row.get(HEROES_FIELD, "").split(",") if hero_id.strip()] for row in rows.values()],
+            pa.list_(pa.string()))
+        return columns
+
+    if name == "info":
+        table = db.info()
+    elif name.startswith("skill_"):
+        table = db.catalog(name[len("skill_"):])
+    else:
+        table = db.skill_table(name)
+    columns = {}
+    for field in dict.fromkeys(table.header):
+        columns.update(_typed_columns(pa, field, [row[field] for row in table]))
+    return columns
+
+
+def _typed_columns(pa, field: str, values: list[str]) -> dict:
+    """The typed column(s) of a CSV column; parsed columns keep the original text next to them"""
+    if field in RARITY_FIELDS:
+        return {field: pa.array([_int(value) for value in values], pa.int8())}
+    if field == "Rarities":
+        ranges = [_rarity_range(value) for value in values]
+        return {field: _text_column(pa, values),
+                "Rarity Min": pa.array([low for low, _ in ranges], pa.int8()),
+                "Rarity Max": pa.array([high for _, high in ranges], pa.int8())}
+    if field == "Version":
+        versions = [VERSION.match(value) for value in values]
+        return {field: _text_column(pa, values),
+                "Version Major": pa.array([int(m.group(1)) if m else None for m in versions], pa.int16()),
+                "Version Minor": pa.array([int(m.group(2)) if m else None for m in versions], pa.int16())}
+
+    present = [value for value in values if value not in MISSING_VALUES]
+    if present and field.endswith("Date"):
+        dates = [_date(value) for value in values]
+        if all(parsed is not None for parsed, value in zip(dates, values) if value not in MISSING_VALUES):
+            return {field: pa.array(dates, pa.date32())}
+    if present and all(INTEGER.match(value) for value in present):
+        return {field: pa.array([_int(value) for value in values], pa.int64())}
+    return {field: _text_column(pa, values)}
+
+
+def _text_column(pa, values: list[str]):
+    """Text column with empty cells as nulls, dictionary-encoded when values repeat a lot"""
+    array = pa.array([value if value != "" else None for value in values], pa.string())
+    if values and len(set(values)) <= len(values) * DICTIONARY_RATIO:
+        return array.dictionary_encode()
+    return array
+
+
+def _int(value: str):
+    return int(value) if INTEGER.match(value or "") else None
+
+
+def _date(value: str):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _rarity_range(value: str) -> tuple:
+    """(lowest, highest) rarity of a Rarities cell, e.g. (3, 5) for "3— 5—Grand Hero Battle" """
+    digits = [int(digit) for digit in re.findall(r"\d", RARITY_RANGE.match(value).group(0))]
+    return (min(digits), max(digits)) if digits else (None, None)
+
+
+def __write_table(pa, table, path: str, file_format: str):
+    with atomic_write(path, "wb") as f:
+        if file_format == "arrow":
+            with pa.ipc.new_file(f, table.schema) as writer:
+                writer.write_table(table)
+        else:
+            import pyarrow.parquet as pq
+            pq.write_table(table, f, compression="zstd")
@@ -0,0 +1,210 @@
+"""
+JSON bundle exporter - Precompressed static JSON documents for serving
+This module exports one JSON document per hero (info, related heroes, skill table rows, refines
+and portrait paths) under a content-hashed filename, with sharded index files mapping hero Keys
+to documents and an unhashed manifest pointing at the index shards. Every file is written
+alongside gzip and brotli variants, so a static server can hand them out as they are. Documents
+whose content did not change since the last export keep their file and are not recompressed.
+"""
+
+import os
+import gzip
+import json
+import hashlib
+from urllib.parse import quote
+
+from hero_database import Database
+from save_hero.file_lock import atomic_write
+from sharding import shard_of
+
+MANIFEST_FILE = "manifest.json"
+HEROES_FOLDER = "heroes"
+INDEX_FOLDER = "index"
+DEFAULT_SHARDS = 16
+
+# Hex digits of the content hash in the file names
+HASH_LENGTH = 16
+
+# Suffix of each precompressed variant
+ENCODINGS = {"gzip": ".gz", "br": ".br"}
+
+
+def export_json_bundle(folder_path: str, output_folder: str, heroes: list[str] = None,
+                       shards: int = DEFAULT_SHARDS, brotli: bool = True) -> dict:
+    """
+    Export (or incrementally update) the JSON bundle.
+
+    Args:
+        folder_path: Database folder written by save_hero
+        output_folder: Folder receiving manifest.json, index/ and heroes/
+        heroes: Hero Keys known to have changed; when omitted, every document is rebuilt in
+                memory and only the ones whose content hash changed are written
+        shards: Number of index shards (heroes are split by a stable hash of their Key)
+        brotli: Also write .br variants (requires the brotli package)
+
+    Returns:
+        Dictionary with the number of heroes, heroes written/removed and the encodings written
+    """
+    compressors = _compressors(brotli)
+    db = Database(folder_path)
+    previous = load_json_bundle(output_folder)
+    keys = db.hero_keys()
+    refines = __refines_by_key(db)
+
+    # Targeted updates keep the other documents of the previous export (when its shard count matches)
+    files = dict(previous["heroes"]) if heroes is not None and previous["shards"] == shards else {}
+    present = set(keys)
+    to_build = keys if not files else [key for key in heroes if key in present]
+    removed = set(previous["heroes"]) - present
+    for key in removed:
+        files.pop(key, None)
+
+    written = 0
+    for key in to_build:
+        document = _encode(hero_document(db, key, refines.get(key, [])))
+        path = f"{HEROES_FOLDER}/{_hashed_name(quote(key, safe=''), document)}"
+        if path != previous["heroes"].get(key) or _missing(output_folder, path, compressors):
+            _write_variants(output_folder, path, document, compressors)
+            written += 1
+        files[key] = path
+
+    # Index shards, then the manifest pointing at them: readers never see a missing document
+    index = {}
+    for shard in range(shards):
+        entries = {key: path for key, path in sorted(files.items()) if shard_of(key, shards) == shard}
+        document = _encode({"shard": shard, "heroes": entries})
+        path = f"{INDEX_FOLDER}/{_hashed_name(str(shard), document)}"
+        if _missing(output_folder, path, compressors):
+            _write_variants(output_folder, path, document, compressors)
+        index[str(shard)] = path
+    manifest = {"version": 1, "shards": shards, "heroes": len(files),
+                "encodings": sorted(compressors), "index": index}
+    content = _encode(manifest)
+    if _missing(output_folder, MANIFEST_FILE, compressors) or _read_bytes(output_folder, MANIFEST_FILE) != content:
+        _write_variants(output_folder, MANIFEST_FILE, content, compressors)
+
+    referenced = set(files.values()) | set(index.values())
+    stale = __remove_unreferenced(output_folder, referenced)
+    return {"heroes": len(files), "written": written, "removed": len(removed),
+            "stale_files": stale, "encodings": ["identity"] + sorted(compressors)}
+
+
+def load_json_bundle(output_folder: str) -> dict:
+    """
+    Load the manifest and index shards of an export.
+    Returns a dictionary with the shard count and heroes ({Key: document path}), empty if nothing was exported.
+    """
+    result = {"shards": None, "heroes": {}}
+    manifest_path = os.path.join(output_folder, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return result
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        for path in manifest["index"].values():
+            with open(os.path.join(output_folder, path), "r", encoding="utf-8") as f:
+                result["heroes"].update(json.load(f)["heroes"])
+        result["shards"] = manifest["shards"]
+    except (OSError, ValueError, KeyError):
+        return {"shards": None, "heroes": {}}
+    return result
+
+
+def hero_document(db: Database, key: str, refines: list[dict] = None) -> dict:
+    """The JSON document of a hero: info, related heroes, skill rows per table, refines and portraits"""
+    info = db.hero(key)
+    skills = {}
+    for table_name, rows in db.skills_of(key).items():
+        skills[table_name] = [{field: value for field, value in row.as_dict().items() if field != "Key"} for row in rows]
+    return {
+        "key": key,
+        "info": info.as_dict() if info is not None else {},
+        "related": db.related(key),
+        "skills": skills,
+        "refines": refines or [],
+        "portraits": __portrait_paths(db.folder_path, key),
+    }
+
+
+def _compressors(brotli: bool) -> dict:
+    """Encoding -> compress(bytes) of the variants to write"""
+    compressors = {"gzip": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli:
+        module = _import_brotli()
+        compressors["br"] = lambda data: module.compress(data, quality=11)
+    return compressors
+
+
+def _import_brotli():
+    """Import brotli, which is only needed for the .br variants"""
+    try:
+        import brotli
+    except ImportError as e:
+        raise ImportError("The .br variants require brotli (pip install brotli), or pass --no-brotli") from e
+    return brotli
+
+
+def _encode(document: dict) -> bytes:
+    return json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _hashed_name(stem: str, content: bytes) -> str:
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}.json"
+
+
+def _missing(output_folder: str, path: str, compressors: dict) -> bool:
+    """Whether a file or one of its variants is missing"""
+    filename = os.path.join(output_folder, path)
+    return not all(os.path.exists(filename + suffix) for suffix in [""] + [ENCODINGS[e] for e in compressors])
+
+
+def _read_bytes(output_folder: str, path: str) -> bytes:
+    with open(os.path.join(output_folder, path), "rb") as f:
+        return f.read()
+
+
+def _write_variants(output_folder: str, path: str, content: bytes, compressors: dict):
+    """Write a file and its precompressed variants (variants first, so the plain file marks completion)"""
+    filename = os.path.join(output_folder, path)
+    for encoding, compress in compressors.items():
+        with atomic_write(filename + ENCODINGS[encoding], "wb") as f:
+            f.write(compress(content))
+    with atomic_write(filename, "wb") as f:
+        f.write(content)
+
+
+def __refines_by_key(db: Database) -> dict[str, list[dict]]:
+    """Refine catalog rows grouped by the Key of the hero they belong to"""
+    refines = {}
+    if "refines" in db.catalog_names():
+        for row in db.catalog("refines"):
+            refines.setdefault(row.get("Key", ""), []).append(
+                {field: value for field, value in row.as_dict().items() if field != "Key"})
+    return refines
+
+
+def __portrait_paths(folder_path: str, key: str) -> list[str]:
+    """Portrait files of a hero, relative to the database folder"""
+    paths = []
+    for root, _, names in os.walk(os.path.join(folder_path, "portraits", key)):
+        for name in names:
+            paths.append(os.path.relpath(os.path.join(root, name), folder_path).replace(os.sep, "/"))
+    return sorted(paths)
+
+
+def __remove_unreferenced(output_folder: str, referenced: set[str]) -> int:
+    """Delete the documents and index shards (and variants) no longer referenced; returns how many files"""
+    removed = 0
+    for folder in (HEROES_FOLDER, INDEX_FOLDER):
+        directory = os.path.join(output_folder, folder)
+        if not os.path.isdir(directory):
+            continue
+        for name in os.listdir(directory):
+            base = name
+            for suffix in ENCODINGS.values():
+                if base.endswith(suffix):
+                    base = base[:-len(suffix)]
+            if f"{folder}/{base}" not in referenced and base.endswith(".json"):
+                os.remove(os.path.join(directory, name))
+                removed += 1
+    return removed
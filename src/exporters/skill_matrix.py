@@ -0,0 +1,182 @@
+"""
+Skill matrix exporter - Sparse hero x skill incidence matrix
+This module exports the hero skill tables as two sparse COO matrices (Unlock and Default
+rarity as values) saved in the scipy.sparse .npz layout, plus the hero/skill index
+mappings. Only heroes whose rows changed since the last export are rebuilt.
+"""
+
+import os
+import json
+import hashlib
+
+from hero_database import Database
+
+UNLOCK_FILE = "hero_skill_unlock.npz"
+DEFAULT_FILE = "hero_skill_default.npz"
+MAPPING_FILE = "hero_skill_index.json"
+
+
+def export_skill_matrix(folder_path: str, output_folder: str, heroes: list[str] = None) -> dict:
+    """
+    Export (or incrementally update) the hero x skill matrices.
+
+    Args:
+        folder_path: Database folder holding the hero skill tables
+        output_folder: Folder receiving the .npz matrices and the JSON mappings
+        heroes: Hero Keys known to have changed; when omitted, changes are detected
+                by comparing every hero's rows with the digests of the last export
+
+    Returns:
+        Dictionary with the matrix shape and the number of heroes rebuilt/removed
+    """
+    np = _import_numpy()
+    db = Database(folder_path)
+    previous = load_skill_matrix(output_folder)
+
+    # hero Key -> [(Name, table, Default, Unlock), ...] for heroes to (re)build
+    if heroes is None:
+        current = __rows_by_hero(db)
+        digests = {hero_key: __digest(rows) for hero_key, rows in current.items()}
+        changed = {hero_key for hero_key, digest in digests.items() if previous["digests"].get(hero_key) != digest}
+        removed = set(previous["digests"]) - set(digests)
+    else:
+        current = {hero_key: __hero_rows(db, hero_key) for hero_key in heroes}
+        digests = dict(previous["digests"])
+        changed = set()
+        removed = set()
+        for hero_key, rows in current.items():
+            if rows:
+                digests[hero_key] = __digest(rows)
+                changed.add(hero_key)
+            elif hero_key in digests:
+                del digests[hero_key]
+                removed.add(hero_key)
+
+    # Keep the entries of untouched heroes from the previous export
+    entries = []
+    old_heroes = previous["heroes"]
+    old_skills = previous["skills"]
+    for row, col, unlock, default in zip(previous["row"], previous["col"], previous["unlock"], previous["default"]):
+        hero_key = old_heroes[row]
+        if hero_key not in changed and hero_key not in removed:
+            entries.append((hero_key, old_skills[col], int(unlock), int(default)))
+    for hero_key in sorted(changed):
+        seen = set()
+        for name, _, default, unlock in current[hero_key]:
+            if name not in seen:
+                seen.add(name)
+                entries.append((hero_key, name, _rarity(unlock), _rarity(default)))
+
+    # Stable ids: previous order first, new heroes/skills appended
+    hero_list = __stable_order(old_heroes, {entry[0] for entry in entries})
+    skill_list = __stable_order(old_skills, {entry[1] for entry in entries})
+    hero_ids = {hero_key: i for i, hero_key in enumerate(hero_list)}
+    skill_ids = {name: i for i, name in enumerate(skill_list)}
+
+    rows = np.fromiter((hero_ids[entry[0]] for entry in entries), dtype=np.int32, count=len(entries))
+    cols = np.fromiter((skill_ids[entry[1]] for entry in entries), dtype=np.int32, count=len(entries))
+    unlock = np.fromiter((entry[2] for entry in entries), dtype=np.uint8, count=len(entries))
+    default = np.fromiter((entry[3] for entry in entries), dtype=np.uint8, count=len(entries))
+    shape = (len(hero_list), len(skill_list))
+
+    os.makedirs(output_folder, exist_ok=True)
+    _save_coo(np, os.path.join(output_folder, UNLOCK_FILE), rows, cols, unlock, shape)
+    _save_coo(np, os.path.join(output_folder, DEFAULT_FILE), rows, cols, default, shape)
+    mapping = {
+        "heroes": hero_list,
+        "skills": skill_list,
+        "skill_tables": __skill_tables(previous, current, changed, skill_list),
+        "digests": digests,
+    }
+    temp_path = os.path.join(output_folder, MAPPING_FILE + ".tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(mapping, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(temp_path, os.path.join(output_folder, MAPPING_FILE))
+
+    return {"shape": shape, "entries": len(entries), "rebuilt": len(changed), "removed": len(removed)}
+
+
+def load_skill_matrix(output_folder: str) -> dict:
+    """
+    Load the exported COO arrays and mappings.
+    Returns a dictionary with row/col/unlock/default arrays (empty if nothing was exported),
+    heroes, skills, skill_tables and digests.
+    """
+    result = {"row": [], "col": [], "unlock": [], "default": [],
+              "heroes": [], "skills": [], "skill_tables": {}, "digests": {}}
+    mapping_path = os.path.join(output_folder, MAPPING_FILE)
+    unlock_path = os.path.join(output_folder, UNLOCK_FILE)
+    default_path = os.path.join(output_folder, DEFAULT_FILE)
+    if not (os.path.exists(mapping_path) and os.path.exists(unlock_path) and os.path.exists(default_path)):
+        return result
+    np = _import_numpy()
+    with open(mapping_path, "r", encoding="utf-8") as f:
+        result.update(json.load(f))
+    with np.load(unlock_path, allow_pickle=False) as loaded:
+        result["row"], result["col"], result["unlock"] = loaded["row"], loaded["col"], loaded["data"]
+    with np.load(default_path, allow_pickle=False) as loaded:
+        result["default"] = loaded["data"]
+    return result
+
+
+def _import_numpy():
+    """Import numpy, which is only needed by this exporter"""
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("The skill matrix export requires numpy (pip install numpy)") from e
+    return numpy
+
+
+def _save_coo(np, path: str, rows, cols, data, shape: tuple):
+    """Save a COO matrix with the same keys as scipy.sparse.save_npz"""
+    temp_path = path + ".tmp.npz"
+    np.savez_compressed(temp_path, row=rows, col=cols, data=data,
+                        shape=np.array(shape, dtype=np.int64), format=np.array("coo"))
+    os.replace(temp_path, path)
+
+
+def _rarity(value: str) -> int:
+    """Parse a rarity cell ("4", "5★", "—") into 1-5, or 0 when the skill is not learnt"""
+    value = value.strip()
+    return int(value[0]) if value[:1].isdigit() else 0
+
+
+def __rows_by_hero(db: Database) -> dict[str, list[tuple]]:
+    """Read every hero skill table once and group its rows by hero Key"""
+    rows_by_hero = {}
+    for table_name in db.skill_table_names():
+        for row in db.skill_table(table_name):
+            rows_by_hero.setdefault(row["Key"], []).append(
+                (row.get("Name", ""), table_name, row.get("Default", ""), row.get("Unlock", ""))
+            )
+    return rows_by_hero
+
+
+def __hero_rows(db: Database, hero_key: str) -> list[tuple]:
+    """Read one hero's rows from every hero skill table (via the sidecar indexes)"""
+    rows = []
+    for table_name in db.skill_table_names():
+        for row in db.hero_skill_rows(table_name, hero_key):
+            rows.append((row.get("Name", ""), table_name, row.get("Default", ""), row.get("Unlock", "")))
+    return rows
+
+
+def __digest(rows: list[tuple]) -> str:
+    return hashlib.sha1(repr(sorted(rows)).encode("utf-8")).hexdigest()
+
+
+def __stable_order(previous: list[str], present: set[str]) -> list[str]:
+    """Keep the previous order of the ids still present and append the new ones sorted"""
+    ordered = [item for item in previous if item in present]
+    known = set(ordered)
+    return ordered + sorted(present - known)
+
+
+def __skill_tables(previous: dict, current: dict, changed: set, skill_list: list[str]) -> dict[str, list[str]]:
+    """Map each skill Name to the tables it appears in"""
+    tables = {name: set(table_names) for name, table_names in previous["skill_tables"].items()}
+    for hero_key in changed:
+        for name, table_name, _, _ in current[hero_key]:
+            tables.setdefault(name, set()).add(table_name)
+    return {name: sorted(tables.get(name, ())) for name in skill_list}
@@ -1,45 +1,54 @@
-from bs4 import BeautifulSoup
 import re
 import utils
 import os
+from typing import TYPE_CHECKING
+import instrumentation
+from sharding import shard_heroes
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
 
 def fetch_hero_data(hero_id_data: dict) -> dict:
     """Get the hero data as a CSV dictionary"""
-    hero_page = utils.open_page(f"https://feheroes.fandom.com/wiki/{hero_id_data['url_id']}")
-    return __extract_hero_data_from_wiki_page(hero_page, hero_id_data['hero_id'])
+    return extract_hero_data(utils.open_page(utils.wiki_page_url(hero_id_data['url_id'])), hero_id_data)
+
+
+def download_hero_page(hero_id_data: dict) -> bytes:
+    """Download the raw wiki page of a hero (the I/O half of fetch_hero_data)"""
+    return utils.download_page(utils.wiki_page_url(hero_id_data['url_id']))
 
 
-def get_heroes_to_update(heroes, folder_path, file_name, heroes_page=None) -> list:
-    """Get list of heroes that need to be updated"""
+def extract_hero_data(hero_page: "BeautifulSoup", hero_id_data: dict) -> dict:
+    """Extract the hero data from a parsed wiki page (the page tree is freed afterwards)"""
+    try:
+        with instrumentation.stage("extract"):
+            return __extract_hero_data_from_wiki_page(hero_page, hero_id_data['hero_id'])
+    finally:
+        # The extracted data holds plain strings only, so the page tree can go right away
+        hero_page.decompose()
+
+
+def get_heroes_to_update(heroes, folder_path, file_name, shard=None) -> list:
+    """
+    Get list of heroes that need to be updated: those of the listing missing from the done-list
+    (only those of shard (i, N) when given). Heroes whose listing entry changed since the last
+    run are taken off the done-list beforehand (see listing_diff), so they are updated too.
+    """
     saved_heroes_list = __get_heroes_from_txt(folder_path, file_name)
     # Convert to set for O(1) lookup instead of O(n) list search
     saved_heroes_set = set(saved_heroes_list)
     
-    # Get icon-based hero IDs for proper matching
-    heroes_icon_map = {}
-    if heroes_page:
-        try:
-            heroes_with_icons = fetcher.get_heroes_with_icons(heroes_page)
-            for hero_id, icon_url in heroes_with_icons:
-                icon_based_id = extract_hero_id_from_icon_url(icon_url)
-                heroes_icon_map[hero_id] = icon_based_id
-        except Exception:
-            # Fallback to old logic if something fails
-            pass
-    
     to_update = []
     for hero_id in heroes:
-        # Use icon-based ID if available, otherwise fallback
-        if hero_id in heroes_icon_map:
-            icon_based_id = heroes_icon_map[hero_id]
-        else:
-            # Fallback: generate from hero_id (but this should rarely happen now)
-            icon_based_id = hero_id.replace(":", "_")
+        # Listing keys are already the icon-based ids saved in the done-lists
+        icon_based_id = hero_id.replace(":", "_")
         
         # O(1) lookup instead of O(n) loop - major performance improvement
         if icon_based_id not in saved_heroes_set:
             to_update.append(icon_based_id)
-    
+
+    if shard:
+        to_update = shard_heroes(to_update, *shard)
     return to_update
 
 
@@ -54,7 +63,7 @@ def __get_heroes_from_txt(folder_path, file_name) -> list:
 
 
 
-def __extract_hero_data_from_wiki_page(hero_page:BeautifulSoup, hero_id:str) -> dict:
+def __extract_hero_data_from_wiki_page(hero_page:"BeautifulSoup", hero_id:str) -> dict:
     """
     Convert hero page HTML to a dictionary of CSV data.
     Handles special characters in hero names and titles consistently.
@@ -155,7 +164,7 @@ def __extract_artists(text: str) -> list:
     return artists
 
 
-def __extract_related_heroes(hero_page: BeautifulSoup) -> str:
+def __extract_related_heroes(hero_page: "BeautifulSoup") -> str:
     """Extracts related heroes from the character-about table."""
     related_heroes_table = hero_page.find("table", class_="character-about")
     if not related_heroes_table:
@@ -166,7 +175,7 @@ def __extract_related_heroes(hero_page: BeautifulSoup) -> str:
     return ",".join(related_heroes_list)
 
 
-def __extract_data_tables(hero_page: BeautifulSoup) -> dict:
+def __extract_data_tables(hero_page: "BeautifulSoup") -> dict:
     """Extracts all tables from headlines and returns them as a dictionary."""
     tables_dict = {}
     tables_headlines = hero_page.select("h3 > span.mw-headline")
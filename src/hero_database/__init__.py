@@ -0,0 +1,16 @@
+"""
+Hero Database module - Main interface
+This module provides a lazy, memoized read API over the database folder written by save_hero.
+"""
+
+from .database import Database
+from .records import Row, Table
+from .integrity import validate_database
+
+# Main public interface - this is what the rest of the code uses
+__all__ = [
+    'Database',
+    'Row',
+    'Table',
+    'validate_database',
+]
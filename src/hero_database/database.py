@@ -0,0 +1,205 @@
+"""
+Database - Lazy, memoized read API over the database folder
+This module opens the CSV files written by save_hero on first access, keeps the parsed
+tables in memory and reloads a table only when its file's mtime or size changes.
+"""
+
+import os
+import json
+
+from save_hero.related_heroes_graph import RelatedHeroesGraph
+from save_hero.manuals_store import manuals_index, INDEX_FILE_NAME as MANUALS_INDEX_FILE_NAME
+from save_hero.csv_index import read_header, read_rows_for_key
+from save_hero.file_lock import file_signature
+from .records import Table, read_csv_table, read_csv_lines, read_manuals_table
+
+# Files in the database folder that are not hero skill tables
+NON_SKILL_TABLES = {"info.csv", "related_heroes.csv", "manuals.csv"}
+
+
+class Database:
+    """Read-only view of a database folder"""
+
+    def __init__(self, folder_path: str = "database"):
+        self.folder_path = folder_path
+        self.skills_folder = os.path.join(folder_path, "skills")
+        # path -> Table, memoized until the file changes
+        self._tables = {}
+        self._related = None
+        # (hero id -> manual captions, signature of the file it was read from)
+        self._manuals_index = None
+        # folder -> (mtime, csv names), so listings are not rescanned per lookup
+        self._listings = {}
+
+    # -- Hero info -------------------------------------------------------
+
+    def info(self) -> Table:
+        """Return info.csv indexed by Key"""
+        return self._load("info", os.path.join(self.folder_path, "info.csv"), ("Key",), unique=True)
+
+    def hero(self, key: str):
+        """Return the info row of a hero, or None"""
+        return self.info().get("Key", key)
+
+    def hero_keys(self) -> list[str]:
+        """Return every hero Key in info.csv"""
+        return list(self.info().unique_indexes.get("Key", {}))
+
+    # -- Hero skill tables (weapons.csv, passives.csv, ...) ---------------
+
+    def skill_table_names(self) -> list[str]:
+        """Return the names of the hero skill tables present in the folder"""
+        return [name for name in self._csv_names(self.folder_path) if f"{name}.csv" not in NON_SKILL_TABLES]
+
+    def skill_table(self, table_name: str) -> Table:
+        """Return a hero skill table (e.g. "weapons") indexed by Key and Name"""
+        path = os.path.join(self.folder_path, f"{table_name.lower()}.csv")
+        return self._load(table_name.lower(), path, ("Key", "Name"))
+
+    def skills_of(self, key: str) -> dict[str, list]:
+        """Return {table name: rows} for every skill table that lists a hero"""
+        skills = {}
+        for table_name in self.skill_table_names():
+            rows = self.skill_table(table_name).lookup("Key", key)
+            if rows:
+                skills[table_name] = rows
+        return skills
+
+    def hero_skill_rows(self, table_name: str, key: str) -> list:
+        """
+        Return one hero's rows of a skill table. If the table is not parsed yet and its
+        sidecar index is valid, only that hero's byte ranges are read (via mmap).
+        """
+        path = os.path.join(self.folder_path, f"{table_name.lower()}.csv")
+        table = self._tables.get(path)
+        if table is None or table.signature != file_signature(path):
+            lines = read_rows_for_key(path, key, rebuild=False)
+            if lines is not None:
+                return read_csv_lines(read_header(path), lines) if lines else []
+        return self.skill_table(table_name).lookup("Key", key)
+
+    def heroes_with_skill(self, name: str) -> dict[str, list]:
+        """Return {table name: rows} for every hero skill row with the given skill Name"""
+        heroes = {}
+        for table_name in self.skill_table_names():
+            rows = self.skill_table(table_name).lookup("Name", name)
+            if rows:
+                heroes[table_name] = rows
+        return heroes
+
+    # -- Skills catalog (skills/skill_*.csv) -------------------------------
+
+    def catalog_names(self) -> list[str]:
+        """Return the skill types present in the skills folder (e.g. "weapons")"""
+        return [name[len("skill_"):] for name in self._csv_names(self.skills_folder) if name.startswith("skill_")]
+
+    def catalog(self, skill_type: str) -> Table:
+        """Return a skills catalog table indexed by Name"""
+        path = os.path.join(self.skills_folder, f"skill_{skill_type.lower()}.csv")
+        return self._load(f"skill_{skill_type.lower()}", path, ("Name",), unique=True)
+
+    def skill(self, name: str) -> dict:
+        """Return {skill type: row} for every catalog entry with the given Name"""
+        found = {}
+        for skill_type in self.catalog_names():
+            row = self.catalog(skill_type).get("Name", name)
+            if row is not None:
+                found[skill_type] = row
+        return found
+
+    # -- Related heroes and manuals ----------------------------------------
+
+    def related_heroes(self) -> RelatedHeroesGraph:
+        """Return the related heroes graph"""
+        path = os.path.join(self.folder_path, "related_heroes.csv")
+        signature = file_signature(path)
+        if self._related is None or self._related[1] != signature:
+            graph = RelatedHeroesGraph.from_csv(path, os.path.join(self.folder_path, "info.csv"))
+            self._related = (graph, signature)
+        return self._related[0]
+
+    def related(self, key: str) -> list[str]:
+        """Return the heroes related to a hero"""
+        return self.related_heroes().related(key)
+
+    def alts_of(self, character: str) -> list[str]:
+        """Return every alt of a character (hero Key or character name)"""
+        return self.related_heroes().alts_of(character)
+
+    def manuals(self) -> Table:
+        """Return manuals.csv indexed by Caption"""
+        path = os.path.join(self.folder_path, "manuals.csv")
+        signature = file_signature(path)
+        table = self._tables.get(path)
+        if table is None or table.signature != signature:
+            if signature is None:
+                table = Table("manuals", path, None, [], [])
+            else:
+                table = read_manuals_table(path, signature)
+                table.index_by("Caption")
+            self._tables[path] = table
+        return table
+
+    def manuals_index(self) -> dict[str, list[str]]:
+        """Return hero id -> captions of the manuals listing the hero (from manuals_index.json when present)"""
+        path = os.path.join(self.folder_path, MANUALS_INDEX_FILE_NAME)
+        signature = file_signature(path)
+        if signature is None:
+            table = self.manuals()
+            if table.signature is None:
+                return {}
+            if self._manuals_index is None or self._manuals_index[1] != ("table", table.signature):
+                rows = {(row["Caption"], number): row.as_dict() for number, row in enumerate(table)}
+                self._manuals_index = (manuals_index(rows), ("table", table.signature))
+        elif self._manuals_index is None or self._manuals_index[1] != signature:
+            with open(path, "r", encoding="utf-8") as f:
+                self._manuals_index = (json.load(f), signature)
+        return self._manuals_index[0]
+
+    def manuals_of(self, hero_id: str) -> list[str]:
+        """Return the captions of the manuals listing a hero"""
+        return list(self.manuals_index().get(hero_id, []))
+
+    # -- Cache management -----------------------------------------------------
+
+    def invalidate(self, path: str = None):
+        """Drop one memoized table (or all of them) so it is reloaded on next access"""
+        if path is None:
+            self._tables.clear()
+            self._listings.clear()
+            self._related = None
+            self._manuals_index = None
+        else:
+            self._tables.pop(path, None)
+
+    def _csv_names(self, folder_path: str) -> list[str]:
+        """Return the lowercase stems of the CSV files in a folder"""
+        signature = file_signature(folder_path)
+        cached = self._listings.get(folder_path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        names = []
+        if signature is not None and os.path.isdir(folder_path):
+            names = sorted(
+                entry.name[:-len(".csv")].lower()
+                for entry in os.scandir(folder_path)
+                if entry.is_file() and entry.name.endswith(".csv")
+            )
+        self._listings[folder_path] = (signature, names)
+        return names
+
+    def _load(self, name: str, path: str, index_fields: tuple, unique: bool = False) -> Table:
+        """Return the memoized table for path, parsing it again if the file changed"""
+        signature = file_signature(path)
+        table = self._tables.get(path)
+        if table is not None and table.signature == signature:
+            return table
+        if signature is None:
+            table = Table(name, path, None, [], [])
+        else:
+            table = read_csv_table(name, path, signature)
+            for field in index_fields:
+                table.index_by(field, unique=unique)
+        self._tables[path] = table
+        return table
+
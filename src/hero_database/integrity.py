@@ -0,0 +1,215 @@
+"""
+Integrity - Single-pass validation of the database folder
+This module streams every table of the database folder once, in dependency order: info.csv
+first, then the skills catalogs, then the files that reference them (hero skill tables,
+related heroes, manuals, done-lists). Each file leaves behind only the key set the later
+files are checked against, so nothing is loaded twice and no table is kept in memory.
+"""
+
+import os
+import csv
+import time
+
+from save_hero.manuals_store import read_manual_rows, MANUALS_FILE_NAME, HEROES_FIELD
+from .database import NON_SKILL_TABLES
+
+# Done-lists whose entries are hero Keys (refines.txt lists refine owners, saved without their hero)
+HERO_DONE_LISTS = ("heroes.txt", "resplendents.txt")
+
+# Kinds of violations, in report order
+CHECKS = (
+    "malformed_row",      # Missing Key/Name column or empty Key
+    "duplicate_key",      # Key listed twice in info.csv or related_heroes.csv
+    "duplicate_name",     # Name listed twice in a skills catalog
+    "duplicate_row",      # Same (Key, Name) twice in a hero skill table
+    "missing_catalog",    # Hero skill table without its skills/skill_<table>.csv
+    "unknown_skill",      # Hero skill Name missing from its catalog
+    "unknown_hero",       # Key (hero skill row, related hero, manual, done-list) missing from info.csv
+)
+
+
+def validate_database(folder_path: str) -> dict:
+    """
+    Check the uniqueness and referential integrity of every table.
+
+    Args:
+        folder_path: Database folder written by save_hero
+
+    Returns:
+        Dictionary with the rows read per file, every violation ({"check", "file", "line",
+        "key", "detail"}), the number of violations per check and the duration
+    """
+    start = time.perf_counter()
+    report = _Report()
+
+    hero_keys = __check_info(folder_path, report)
+    catalogs = {}
+    skills_folder = os.path.join(folder_path, "skills")
+    for name in __csv_names(skills_folder):
+        if name.startswith("skill_"):
+            catalogs[name[len("skill_"):]] = __check_catalog(skills_folder, name, report)
+    for name in __csv_names(folder_path):
+        if f"{name}.csv" not in NON_SKILL_TABLES:
+            __check_skill_table(folder_path, name, hero_keys, catalogs.get(name), report)
+    __check_related_heroes(folder_path, hero_keys, report)
+    __check_manuals(folder_path, hero_keys, report)
+    for file_name in HERO_DONE_LISTS:
+        __check_done_list(folder_path, file_name, hero_keys, report)
+
+    return {
+        "folder": folder_path,
+        "valid": not report.violations,
+        "files": report.files,
+        "counts": {check: report.counts[check] for check in CHECKS if report.counts[check]},
+        "violations": report.violations,
+        "duration_s": time.perf_counter() - start,
+    }
+
+
+class _Report:
+    """Rows read per file and violations found"""
+
+    def __init__(self):
+        self.files = {}
+        self.violations = []
+        self.counts = dict.fromkeys(CHECKS, 0)
+
+    def add(self, check: str, file_name: str, line: int, key: str, detail: str = ""):
+        self.counts[check] += 1
+        self.violations.append({"check": check, "file": file_name, "line": line, "key": key, "detail": detail})
+
+
+def __check_info(folder_path: str, report: _Report) -> set[str]:
+    """Stream info.csv: unique Keys; returns the set of hero Keys"""
+    keys = set()
+    for line, key, _ in __keyed_rows(folder_path, "info.csv", None, report):
+        if key in keys:
+            report.add("duplicate_key", "info.csv", line, key)
+        keys.add(key)
+    return keys
+
+
+def __check_catalog(skills_folder: str, name: str, report: _Report) -> set[str]:
+    """Stream a skills catalog: unique Names; returns the set of skill Names"""
+    file_name = f"skills/{name}.csv"
+    names = set()
+    for line, skill_name, _ in __keyed_rows(skills_folder, f"{name}.csv", None, report, "Name", file_name):
+        if skill_name in names:
+            report.add("duplicate_name", file_name, line, skill_name)
+        names.add(skill_name)
+    return names
+
+
+def __check_skill_table(folder_path: str, name: str, hero_keys: set, catalog: set | None, report: _Report):
+    """Stream a hero skill table: known hero Keys, skills in the catalog, no repeated (Key, Name)"""
+    file_name = f"{name}.csv"
+    # Only this table's pairs are kept, and only while it is read
+    pairs = set()
+    rows = 0
+    for line, key, skill_name in __keyed_rows(folder_path, file_name, "Name", report):
+        rows += 1
+        if key not in hero_keys:
+            report.add("unknown_hero", file_name, line, key, skill_name)
+        if catalog is not None and skill_name not in catalog:
+            report.add("unknown_skill", file_name, line, key, skill_name)
+        pair = (key, skill_name)
+        if pair in pairs:
+            report.add("duplicate_row", file_name, line, key, skill_name)
+        pairs.add(pair)
+    if catalog is None and rows:
+        report.add("missing_catalog", file_name, 0, "", f"skills/skill_{name}.csv")
+
+
+def __check_related_heroes(folder_path: str, hero_keys: set, report: _Report):
+    """Stream related_heroes.csv (headerless: Key, then the related Keys): unique and known Keys"""
+    file_name = "related_heroes.csv"
+    path = os.path.join(folder_path, file_name)
+    if not os.path.exists(path):
+        return
+    keys = set()
+    rows = 0
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        for values in reader:
+            if not values:
+                continue
+            rows += 1
+            key = values[0]
+            if key in keys:
+                report.add("duplicate_key", file_name, reader.line_num, key)
+            keys.add(key)
+            for related in [key] + values[1:]:
+                if related not in hero_keys:
+                    report.add("unknown_hero", file_name, reader.line_num, related,
+                               "" if related == key else f"related to {key}")
+    report.files[file_name] = rows
+
+
+def __check_manuals(folder_path: str, hero_keys: set, report: _Report):
+    """Stream manuals.csv: the heroes listed by every manual are known"""
+    path = os.path.join(folder_path, MANUALS_FILE_NAME)
+    if not os.path.exists(path):
+        return
+    _, rows = read_manual_rows(path)
+    for (caption, position), row in rows.items():
+        for hero_id in row.get(HEROES_FIELD, "").split(","):
+            hero_id = hero_id.strip()
+            if hero_id and hero_id not in hero_keys:
+                report.add("unknown_hero", MANUALS_FILE_NAME, 0, hero_id, f"{caption} #{position}")
+    report.files[MANUALS_FILE_NAME] = len(rows)
+
+
+def __check_done_list(folder_path: str, file_name: str, hero_keys: set, report: _Report):
+    """A hero marked done but missing from info.csv is never fetched again"""
+    path = os.path.join(folder_path, file_name)
+    if not os.path.exists(path):
+        return
+    rows = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line, hero_id in enumerate(f, 1):
+            hero_id = hero_id.strip()
+            if not hero_id:
+                continue
+            rows += 1
+            if hero_id not in hero_keys:
+                report.add("unknown_hero", file_name, line, hero_id)
+    report.files[file_name] = rows
+
+
+def __keyed_rows(folder: str, name: str, second_field: str | None, report: _Report, key_field: str = "Key",
+                 file_name: str = None):
+    """Yield (line number, key, second field value) of a CSV file with a header, reporting malformed rows"""
+    file_name = file_name or name
+    path = os.path.join(folder, name)
+    if not os.path.exists(path):
+        return
+    rows = 0
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        fields = [key_field] + ([second_field] if second_field else [])
+        if header is None or any(field not in header for field in fields):
+            report.add("malformed_row", file_name, 1, "", f"header without {' or '.join(fields)}")
+            report.files[file_name] = 0
+            return
+        key_index = header.index(key_field)
+        second_index = header.index(second_field) if second_field else key_index
+        needed = max(key_index, second_index)
+        for values in reader:
+            if not values:
+                continue
+            rows += 1
+            if len(values) <= needed or not values[key_index]:
+                report.add("malformed_row", file_name, reader.line_num, values[0] if values else "",
+                           f"{len(values)} fields")
+                continue
+            yield reader.line_num, values[key_index], values[second_index]
+    report.files[file_name] = rows
+
+
+def __csv_names(folder: str) -> list[str]:
+    """Names of the CSV files of a folder, without extension, sorted"""
+    if not os.path.isdir(folder):
+        return []
+    return sorted(entry.name[:-len(".csv")] for entry in os.scandir(folder)
+                  if entry.is_file() and entry.name.endswith(".csv"))
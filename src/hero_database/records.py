@@ -0,0 +1,131 @@
+"""
+Database records - Compact row and table containers
+This module holds the __slots__ records and indexed tables built from the database CSV files.
+"""
+
+import csv
+
+
+class Row:
+    """A single CSV row sharing its column mapping with the rest of its table"""
+
+    __slots__ = ("_columns", "_values")
+
+    def __init__(self, columns: dict[str, int], values: tuple):
+        self._columns = columns
+        self._values = values
+
+    def __getitem__(self, field):
+        index = self._columns[field]
+        return self._values[index] if index < len(self._values) else ""
+
+    def __contains__(self, field):
+        return field in self._columns
+
+    def __repr__(self):
+        return f"Row({self.as_dict()!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, Row) and self.as_dict() == other.as_dict()
+
+    def get(self, field, default=None):
+        """Return the value of a field, or default if the table has no such column"""
+        index = self._columns.get(field)
+        if index is None:
+            return default
+        return self._values[index] if index < len(self._values) else ""
+
+    def as_dict(self) -> dict[str, str]:
+        """Return the row as a {field: value} dictionary"""
+        return {field: self[field] for field in self._columns}
+
+
+class Table:
+    """Rows of one CSV file plus dict indexes on the requested fields"""
+
+    __slots__ = ("name", "path", "signature", "header", "rows", "indexes", "unique_indexes")
+
+    def __init__(self, name: str, path: str, signature, header: list[str], rows: list[Row]):
+        self.name = name
+        self.path = path
+        self.signature = signature
+        self.header = header
+        self.rows = rows
+        # field -> {value: [rows]} and field -> {value: row}
+        self.indexes = {}
+        self.unique_indexes = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def index_by(self, field: str, unique: bool = False):
+        """Build a dict index on a field (last row wins for unique indexes)"""
+        if field not in self.header:
+            return
+        if unique:
+            self.unique_indexes[field] = {row[field]: row for row in self.rows}
+        else:
+            index = {}
+            for row in self.rows:
+                index.setdefault(row[field], []).append(row)
+            self.indexes[field] = index
+
+    def lookup(self, field: str, value: str) -> list[Row]:
+        """Return all rows whose field equals value"""
+        if field in self.unique_indexes:
+            row = self.unique_indexes[field].get(value)
+            return [row] if row is not None else []
+        return self.indexes.get(field, {}).get(value, [])
+
+    def get(self, field: str, value: str):
+        """Return the first row whose field equals value, or None"""
+        rows = self.lookup(field, value)
+        return rows[0] if rows else None
+
+
+def read_csv_table(name: str, path: str, signature) -> Table:
+    """Parse a headed CSV file into a Table"""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        columns = _column_map(header)
+        rows = [Row(columns, tuple(values)) for values in reader if values]
+    return Table(name, path, signature, header, rows)
+
+
+def read_csv_lines(header_line: str, lines: list[str]) -> list[Row]:
+    """Parse a header line and already-read data lines of a table into Rows"""
+    columns = _column_map(next(csv.reader([header_line]), []))
+    return [Row(columns, tuple(values)) for values in csv.reader(lines) if values]
+
+
+def read_manuals_table(path: str, signature) -> Table:
+    """
+    Parse manuals.csv, which repeats a Caption header for every manual group.
+    The first header seen is used as the table header.
+    """
+    header = []
+    columns = {}
+    rows = []
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for values in csv.reader(f):
+            if not values:
+                continue
+            if values[0] == "Caption":
+                if not header:
+                    header = values
+                    columns = _column_map(header)
+                continue
+            rows.append(Row(columns, tuple(values)))
+    return Table("manuals", path, signature, header, rows)
+
+
+def _column_map(header: list[str]) -> dict[str, int]:
+    """Map each column name to its index (first occurrence wins)"""
+    columns = {}
+    for i, field in enumerate(header):
+        columns.setdefault(field, i)
+    return columns
@@ -0,0 +1,20 @@
+"""
+Instrumentation module - Main interface
+This module provides per-stage timing, throughput counters and machine-readable run reports.
+"""
+
+from .metrics import METRICS, RunMetrics, stage, timed, count, hero
+from .report import build_report, write_json_report, write_prometheus_textfile
+
+# Main public interface - this is what the rest of the code uses
+__all__ = [
+    'METRICS',
+    'RunMetrics',
+    'stage',
+    'timed',
+    'count',
+    'hero',
+    'build_report',
+    'write_json_report',
+    'write_prometheus_textfile',
+]
@@ -0,0 +1,139 @@
+"""
+Memory monitor - Peak resident set size per pipeline stage
+This module samples the process RSS while instrumentation stages are running and keeps
+the highest value seen inside each stage, so memory growth can be pinned to a stage.
+"""
+
+import os
+import sys
+import time
+import threading
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def __statm_backend():
+    """Linux: current RSS from /proc/self/statm (in pages)"""
+    page_size = os.sysconf("SC_PAGE_SIZE")
+
+    def statm_rss() -> int:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * page_size
+    return statm_rss
+
+
+def __windows_backend():
+    """Windows: current working set from GetProcessMemoryInfo"""
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+            (name, ctypes.c_size_t) for name in (
+                "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+
+    kernel32 = ctypes.WinDLL("kernel32")
+    # Exported by kernel32 (as K32GetProcessMemoryInfo) since Windows 7, no psapi.dll needed
+    get_process_memory_info = kernel32.K32GetProcessMemoryInfo
+    get_process_memory_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(ProcessMemoryCounters), wintypes.DWORD]
+    get_process_memory_info.restype = wintypes.BOOL
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    process = kernel32.GetCurrentProcess()
+
+    def windows_rss() -> int:
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        if not get_process_memory_info(process, ctypes.byref(counters), counters.cb):
+            return 0
+        return counters.WorkingSetSize
+    return windows_rss
+
+
+def __peak_rss() -> int:
+    """Elsewhere (macOS): the peak RSS so far, the only figure getrusage gives"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def __resolve_backend():
+    """Pick how current_rss reads the RSS on this platform (once, at import)"""
+    if os.path.exists("/proc/self/statm"):
+        return __statm_backend()
+    if sys.platform == "win32":
+        return __windows_backend()
+    if resource is not None:
+        return __peak_rss
+    return lambda: 0
+
+
+_rss_backend = __resolve_backend()
+
+
+def current_rss() -> int:
+    """Return the current resident set size in bytes (the peak so far on macOS, 0 if unknown)"""
+    return _rss_backend()
+
+
+class RssMonitor:
+    """Instrumentation listener recording the peak RSS observed inside each stage"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self._lock = threading.Lock()
+        # stage -> number of occurrences currently running (on any thread)
+        self._active = {}
+        # stage -> peak RSS in bytes
+        self.peaks = {}
+        self.run_peak = 0
+        self._sampler = None
+        self._running = False
+
+    def start(self):
+        """Start sampling in a background thread"""
+        self._running = True
+        self._sampler = threading.Thread(target=self.__sample_loop, name="rss-monitor", daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        """Stop sampling"""
+        self._running = False
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+
+    def stage_started(self, name: str):
+        with self._lock:
+            self._active[name] = self._active.get(name, 0) + 1
+        self.__sample()
+
+    def stage_finished(self, name: str):
+        self.__sample()
+        with self._lock:
+            running = self._active.get(name, 1) - 1
+            if running:
+                self._active[name] = running
+            else:
+                self._active.pop(name, None)
+
+    def report(self) -> dict:
+        """Peak RSS per stage and for the whole run, in bytes"""
+        with self._lock:
+            return {"run_peak_rss_bytes": self.run_peak, "stages": dict(sorted(self.peaks.items()))}
+
+    def __sample(self):
+        rss = current_rss()
+        with self._lock:
+            self.run_peak = max(self.run_peak, rss)
+            for name in self._active:
+                if rss > self.peaks.get(name, 0):
+                    self.peaks[name] = rss
+
+    def __sample_loop(self):
+        while self._running:
+            time.sleep(self.interval)
+            self.__sample()
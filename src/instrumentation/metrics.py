@@ -0,0 +1,111 @@
+"""
+Run metrics - Per-stage timing and throughput counters
+This module records how long each pipeline stage takes (per hero) and how many bytes
+were moved, so a run can be summarised with percentiles and slowest heroes.
+"""
+
+import math
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+
+class RunMetrics:
+    """Thread-safe collector of stage durations and counters for one run"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # Objects with stage_started(name) / stage_finished(name), e.g. StageProfiler
+        self.listeners = []
+        self.reset()
+
+    def reset(self):
+        """Start a new run"""
+        with self._lock:
+            self.run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+            self.started_at = time.time()
+            self._started = time.perf_counter()
+            # stage -> [(seconds, hero_id), ...]
+            self.stages = {}
+            # counter name -> value
+            self.counters = {}
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    @property
+    def current_hero(self):
+        return getattr(self._local, "hero_id", None)
+
+    @contextmanager
+    def hero(self, hero_id: str, record: bool = True):
+        """
+        Attribute the stages recorded inside the block (on this thread) to a hero and time
+        the block as the hero's "hero" stage, unless record is False (pipeline workers handle
+        a part of a hero only and record its end-to-end time themselves).
+        """
+        previous = self.current_hero
+        self._local.hero_id = hero_id
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._local.hero_id = previous
+            if record:
+                self.record("hero", time.perf_counter() - start, hero_id)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the block as one occurrence of a stage"""
+        for listener in self.listeners:
+            listener.stage_started(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+            for listener in self.listeners:
+                listener.stage_finished(name)
+
+    def timed(self, name: str):
+        """Decorator form of stage()"""
+        def decorator(function):
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return function(*args, **kwargs)
+            wrapper.__name__ = function.__name__
+            wrapper.__doc__ = function.__doc__
+            wrapper.__wrapped__ = function
+            return wrapper
+        return decorator
+
+    def record(self, name: str, seconds: float, hero_id: str = None):
+        """Record one stage duration"""
+        hero_id = hero_id or self.current_hero
+        with self._lock:
+            self.stages.setdefault(name, []).append((seconds, hero_id))
+
+    def count(self, name: str, value: float = 1):
+        """Add value to a counter"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+# Process-wide collector used by the pipeline modules
+METRICS = RunMetrics()
+
+stage = METRICS.stage
+timed = METRICS.timed
+count = METRICS.count
+hero = METRICS.hero
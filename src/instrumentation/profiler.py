@@ -0,0 +1,203 @@
+"""
+Stage profiler - cProfile / sampling profiles scoped to pipeline stages
+This module listens to the instrumentation stages and profiles only the code running
+inside the selected ones. The sampling profiler writes collapsed stacks ready for
+flamegraph.pl / speedscope; tracemalloc snapshots show which stage holds memory.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import tracemalloc
+
+# Profile stage -> instrumentation stages it covers
+PROFILE_STAGES = {
+    "bootstrap": {"bootstrap"},
+    "fetch": {"http_wait", "html_parse"},
+    "extract": {"extract"},
+    "convert": {"convert"},
+    "save": {"save"},
+}
+
+PROFILERS = ("sampling", "cprofile")
+
+
+class StageProfiler:
+    """Profile the code running inside the selected instrumentation stages"""
+
+    def __init__(self, stages=None, profiler: str = "sampling", interval: float = 0.005,
+                 trace_memory: bool = False, top_allocations: int = 15):
+        """
+        profiler is "sampling", "cprofile" or None (tracemalloc figures only). cProfile and
+        trace_memory are process-wide: only use them when the stages run in one thread.
+        """
+        stages = list(stages or PROFILE_STAGES)
+        unknown = [name for name in stages if name not in PROFILE_STAGES]
+        if unknown:
+            raise ValueError(f"Unknown profile stage(s): {', '.join(unknown)} (choose from {', '.join(PROFILE_STAGES)})")
+        if profiler is not None and profiler not in PROFILERS:
+            raise ValueError(f"Unknown profiler: {profiler} (choose from {', '.join(PROFILERS)})")
+        self.stages = stages
+        self.metric_stages = set().union(*(PROFILE_STAGES[name] for name in stages))
+        self.profiler = profiler
+        self.interval = interval
+        self.trace_memory = trace_memory
+        self.top_allocations = top_allocations
+
+        self._lock = threading.Lock()
+        # thread id -> depth of nested profiled stages
+        self._depth = {}
+        self._cprofile = None
+        if profiler == "cprofile":
+            import cProfile
+            self._cprofile = cProfile.Profile()
+        # collapsed stack -> sample count
+        self.samples = {}
+        self._sampler = None
+        self._running = False
+        # stage -> {"count", "max_peak_bytes", "retained_bytes"} and largest snapshot
+        self.memory = {}
+        self._memory_start = {}
+        self._snapshots = {}
+
+    # -- Lifecycle -------------------------------------------------------------
+
+    def start(self):
+        """Start the profiler (call before the pipeline runs)"""
+        self._running = True
+        if self.profiler == "sampling":
+            self._sampler = threading.Thread(target=self.__sample_loop, name="stage-profiler", daemon=True)
+            self._sampler.start()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start(25)
+
+    def stop(self):
+        """Stop sampling and tracing"""
+        self._running = False
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    # -- Instrumentation listener ------------------------------------------------
+
+    def stage_started(self, name: str):
+        if name not in self.metric_stages:
+            return
+        thread_id = threading.get_ident()
+        with self._lock:
+            depth = self._depth.get(thread_id, 0)
+            self._depth[thread_id] = depth + 1
+        if depth:
+            return
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            self._memory_start[thread_id] = tracemalloc.get_traced_memory()[0]
+        if self._cprofile is not None:
+            self._cprofile.enable()
+
+    def stage_finished(self, name: str):
+        if name not in self.metric_stages:
+            return
+        thread_id = threading.get_ident()
+        with self._lock:
+            depth = self._depth.get(thread_id, 1) - 1
+            if depth:
+                self._depth[thread_id] = depth
+            else:
+                self._depth.pop(thread_id, None)
+        if depth:
+            return
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if self.trace_memory and tracemalloc.is_tracing():
+            self.__record_memory(name, thread_id)
+
+    # -- Output ------------------------------------------------------------------
+
+    def write(self, output_dir: str) -> list[str]:
+        """Write the profile files to output_dir and return their paths"""
+        os.makedirs(output_dir, exist_ok=True)
+        written = []
+        if self.profiler == "sampling":
+            path = os.path.join(output_dir, "profile.folded")
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, samples in sorted(self.samples.items()):
+                    f.write(f"{stack} {samples}\n")
+            written.append(path)
+        if self._cprofile is not None:
+            path = os.path.join(output_dir, "profile.prof")
+            self._cprofile.dump_stats(path)
+            written.append(path)
+            path = os.path.join(output_dir, "profile.txt")
+            import pstats
+            with open(path, "w", encoding="utf-8") as f:
+                pstats.Stats(self._cprofile, stream=f).sort_stats("cumulative").print_stats(60)
+            written.append(path)
+        if self.trace_memory:
+            path = os.path.join(output_dir, "memory.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.memory_report(), f, indent=2)
+            written.append(path)
+        return written
+
+    def memory_report(self) -> dict:
+        """Per-stage memory figures with the top allocation sites of each stage's largest occurrence"""
+        report = {}
+        for name, figures in sorted(self.memory.items()):
+            snapshot = self._snapshots.get(name)
+            top = []
+            if snapshot is not None:
+                for statistic in snapshot.statistics("lineno")[:self.top_allocations]:
+                    frame = statistic.traceback[0]
+                    top.append({"location": f"{frame.filename}:{frame.lineno}",
+                                "size_bytes": statistic.size, "count": statistic.count})
+            report[name] = dict(figures, top_allocations=top)
+        return report
+
+    # -- Internals ---------------------------------------------------------------
+
+    def __record_memory(self, name: str, thread_id: int):
+        current, peak = tracemalloc.get_traced_memory()
+        start = self._memory_start.pop(thread_id, current)
+        with self._lock:
+            figures = self.memory.setdefault(name, {"count": 0, "max_peak_bytes": 0, "retained_bytes": 0})
+            figures["count"] += 1
+            figures["retained_bytes"] += current - start
+            new_max = peak - start > figures["max_peak_bytes"]
+            if new_max:
+                figures["max_peak_bytes"] = peak - start
+        if new_max:
+            # Only snapshot when a stage reaches a new high, so snapshots stay rare
+            self._snapshots[name] = tracemalloc.take_snapshot().filter_traces(
+                (tracemalloc.Filter(False, tracemalloc.__file__),)
+            )
+
+    def __sample_loop(self):
+        own_id = threading.get_ident()
+        while self._running:
+            time.sleep(self.interval)
+            with self._lock:
+                active = list(self._depth)
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for thread_id in active:
+                frame = frames.get(thread_id)
+                if frame is None or thread_id == own_id:
+                    continue
+                stack = _collapse(frame)
+                self.samples[stack] = self.samples.get(stack, 0) + 1
+
+
+def _collapse(frame) -> str:
+    """Render a frame's stack root-first as "file:function;file:function" """
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
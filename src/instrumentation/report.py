@@ -0,0 +1,96 @@
+"""
+Run report - Machine-readable summary of a run
+This module turns the collected RunMetrics into a JSON report and, optionally,
+a Prometheus textfile-collector file so schedulers can alert on regressions.
+"""
+
+import json
+
+from .metrics import RunMetrics, percentile
+
+PROMETHEUS_PREFIX = "fehtcher"
+
+
+def build_report(metrics: RunMetrics, slowest: int = 10, extra: dict = None) -> dict:
+    """Summarise a run: per-stage percentiles, slowest heroes, counters and throughput"""
+    elapsed = metrics.elapsed
+    stages = {}
+    with metrics._lock:
+        stage_items = {name: list(samples) for name, samples in metrics.stages.items()}
+        counters = dict(metrics.counters)
+
+    for name, samples in sorted(stage_items.items()):
+        durations = sorted(seconds for seconds, _ in samples)
+        slowest_samples = sorted(samples, key=lambda sample: sample[0], reverse=True)[:slowest]
+        stages[name] = {
+            "count": len(durations),
+            "total_s": sum(durations),
+            "mean_s": sum(durations) / len(durations),
+            "p50_s": percentile(durations, 0.50),
+            "p95_s": percentile(durations, 0.95),
+            "p99_s": percentile(durations, 0.99),
+            "max_s": durations[-1],
+            "slowest": [{"hero_id": hero_id, "seconds": seconds} for seconds, hero_id in slowest_samples if hero_id],
+        }
+
+    heroes_done = stages.get("hero", {}).get("count", 0)
+    report = {
+        "run_id": metrics.run_id,
+        "started_at": metrics.started_at,
+        "duration_s": elapsed,
+        "heroes": heroes_done,
+        "throughput": {
+            "heroes_per_s": heroes_done / elapsed if elapsed else 0.0,
+            "bytes_received_per_s": counters.get("bytes_received", 0) / elapsed if elapsed else 0.0,
+        },
+        "counters": counters,
+        "stages": stages,
+        "slowest_heroes": stages.get("hero", {}).get("slowest", []),
+    }
+    if extra:
+        report.update(extra)
+    return report
+
+
+def write_json_report(report: dict, path: str):
+    """Write the report as JSON (atomic replace)"""
+    # save_hero imports instrumentation, so the shared writer is imported on use
+    from save_hero.file_lock import atomic_write
+    with atomic_write(path) as f:
+        f.write(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+def write_prometheus_textfile(report: dict, path: str):
+    """Write the report in the Prometheus textfile-collector format (atomic replace)"""
+    from save_hero.file_lock import atomic_write
+    prefix = PROMETHEUS_PREFIX
+    lines = [
+        f"# HELP {prefix}_run_duration_seconds Wall time of the last run.",
+        f"# TYPE {prefix}_run_duration_seconds gauge",
+        f"{prefix}_run_duration_seconds {report['duration_s']:.6f}",
+        f"# HELP {prefix}_run_heroes Heroes processed by the last run.",
+        f"# TYPE {prefix}_run_heroes gauge",
+        f"{prefix}_run_heroes {report['heroes']}",
+        f"# HELP {prefix}_run_timestamp_seconds Start time of the last run.",
+        f"# TYPE {prefix}_run_timestamp_seconds gauge",
+        f"{prefix}_run_timestamp_seconds {report['started_at']:.0f}",
+        f"# HELP {prefix}_stage_seconds Stage durations of the last run.",
+        f"# TYPE {prefix}_stage_seconds summary",
+    ]
+    for name, summary in report["stages"].items():
+        label = __label(name)
+        for quantile, key in (("0.5", "p50_s"), ("0.95", "p95_s"), ("0.99", "p99_s")):
+            lines.append(f'{prefix}_stage_seconds{{stage="{label}",quantile="{quantile}"}} {summary[key]:.6f}')
+        lines.append(f'{prefix}_stage_seconds_sum{{stage="{label}"}} {summary["total_s"]:.6f}')
+        lines.append(f'{prefix}_stage_seconds_count{{stage="{label}"}} {summary["count"]}')
+    lines.append(f"# HELP {prefix}_counter_total Counters of the last run.")
+    lines.append(f"# TYPE {prefix}_counter_total gauge")
+    for name, value in sorted(report["counters"].items()):
+        lines.append(f'{prefix}_counter_total{{name="{__label(name)}"}} {value}')
+    with atomic_write(path) as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def __label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
@@ -5,61 +5,456 @@ This script starts the bootstrap process and then displays hero data CSV from a
 """
 
 import os
-from tqdm import tqdm
-from bootstrap import bootstrap_database
+import sys
+import argparse
+import contextlib
+import instrumentation
+from instrumentation.memory import RssMonitor
+from instrumentation.profiler import StageProfiler, PROFILE_STAGES, PROFILERS
+from bootstrap import bootstrap_database, iter_bootstrap, SNAPSHOT_TTL, CATEGORIES
 from fetcher import fetch_hero_data, get_heroes_to_update
-from save_hero import save_hero_to_files , save_manuals
+from save_hero import save_hero_to_files , save_manuals, StreamingStore, write_change_feed, CsvSink, NdjsonSink, MultiSink
+from pipeline import hero_pipeline, DEFAULT_QUEUE_SIZE
+from sharding import parse_shard, default_shard_folder
+from listing_diff import ListingDiffer, default_baseline_path, DIFF_KINDS
+from watcher import WikiWatcher, DEFAULT_POLL_INTERVAL
 
 
 FOLDER_NAME = "database"
 
+# Parsed listing pages reused by the next runs (shared by every shard)
+LISTINGS_SNAPSHOT = os.path.join(FOLDER_NAME, "cache", "listings.jsonl")
 
-def main():
+
+def parse_args(argv=None):
+    """Parse the launcher's command line options"""
+    parser = argparse.ArgumentParser(description="FEH Data Fetcher")
+    parser.add_argument("--report", default=None,
+                        help="Where to write the JSON run report (default: <database or fragment>/reports/run_report.json)")
+    parser.add_argument("--prometheus", default=None,
+                        help="Also write the run report as a Prometheus textfile (e.g. fehtcher.prom)")
+    parser.add_argument("--slowest", type=int, default=10, help="Number of slowest heroes listed in the report")
+    parser.add_argument("--no-pause", action="store_true", help="Do not wait for Enter before exiting")
+    parser.add_argument("--only", action="append", choices=CATEGORIES, default=None, metavar="CATEGORY",
+                        help=f"Only save this listing ({', '.join(CATEGORIES)}; repeatable). Every listing is still "
+                             "bootstrapped, so the listing diff and the baseline stay complete")
+
+    output = parser.add_argument_group("output")
+    output.add_argument("--ndjson", default=None, metavar="TARGET",
+                        help="Also stream one JSON record per hero, as soon as it is converted, to TARGET "
+                             "(- for stdout, a file or a FIFO); launcher messages then go to stderr")
+
+    listings = parser.add_argument_group("listings")
+    listings.add_argument("--refresh-listings", action="store_true",
+                          help="Fetch the listing pages even if the saved snapshot has not expired")
+    listings.add_argument("--listings-ttl", type=float, default=SNAPSHOT_TTL / 3600,
+                          help="Hours the saved listing snapshot is reused for (0 always fetches)")
+
+    streaming = parser.add_argument_group("streaming")
+    streaming.add_argument("--streaming", action="store_true",
+                           help="Bounded-memory mode: one listing at a time, rows merged from sorted runs at the end")
+    streaming.add_argument("--stream-buffer-mb", type=float, default=64,
+                           help="Rows buffered in memory before a sorted run is spilled to disk (MB)")
+
+    watch = parser.add_argument_group("watch")
+    watch.add_argument("--watch", action="store_true",
+                       help="Daemon mode: after saving the heroes not saved yet, poll the wiki's recent changes "
+                            "and save the heroes whose page or listing was edited, until interrupted")
+    watch.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL,
+                       help="Seconds between two polls of the recent changes")
+    watch.add_argument("--watch-cycles", type=int, default=None,
+                       help="Stop after this many polls (default: run until interrupted)")
+
+    sharding = parser.add_argument_group("sharding")
+    sharding.add_argument("--shard", type=parse_shard, default=None, metavar="i/N",
+                          help="Only refresh shard i of N (0 <= i < N, heroes split by a hash of their id) "
+                               "into a database fragment; combine fragments with merge_shards.py")
+    sharding.add_argument("--shard-folder", default=None,
+                          help="Fragment folder of this shard (default: database/shards/shard-<i>-of-<N>)")
+
+    pipeline = parser.add_argument_group("pipeline")
+    pipeline.add_argument("--workers", type=int, default=1,
+                          help="Fetch (and image download) threads; above 1, heroes go through the staged "
+                               "pipeline with a single writer thread")
+    pipeline.add_argument("--convert-workers", type=int, default=1, help="Parse/extract/convert threads of the pipeline")
+    pipeline.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                          help="Heroes waiting between two pipeline stages before the upstream stage blocks")
+
+    profiling = parser.add_argument_group("profiling")
+    profiling.add_argument("--profile", action="store_true", help="Profile the run (see --profile-stages)")
+    profiling.add_argument("--profile-stages", default=",".join(PROFILE_STAGES),
+                           help=f"Comma-separated stages to profile ({', '.join(PROFILE_STAGES)})")
+    profiling.add_argument("--profiler", choices=PROFILERS, default="sampling",
+                           help="sampling writes collapsed stacks for flamegraphs, cprofile writes pstats")
+    profiling.add_argument("--sample-interval", type=float, default=0.005, help="Sampling interval in seconds")
+    profiling.add_argument("--trace-memory", action="store_true", help="Record tracemalloc figures per stage")
+    profiling.add_argument("--profile-dir", default=None,
+                           help="Profile output folder (default: <database>/reports/profile/<run id>)")
+    args = parser.parse_args(argv)
+    if args.watch and (args.shard or args.streaming):
+        parser.error("--watch cannot be combined with --shard or --streaming")
+    if args.watch and (args.only or args.workers > 1 or args.profile or args.trace_memory):
+        # A watch cycle saves heroes one by one, whatever listing they belong to, and is not profiled
+        parser.error("--watch cannot be combined with --only, --workers, --profile or --trace-memory")
+    if args.workers > 1 and ((args.profile and args.profiler == "cprofile") or args.trace_memory):
+        # Both are process-wide: cProfile allows one active profiler, tracemalloc has one peak
+        parser.error("--profiler cprofile and --trace-memory need --workers 1 (the sampling profiler works with any)")
+    args.profile_stages = [name.strip() for name in args.profile_stages.split(",") if name.strip()]
+    unknown = [name for name in args.profile_stages if name not in PROFILE_STAGES]
+    if unknown:
+        parser.error(f"unknown --profile-stages {', '.join(unknown)} (choose from {', '.join(PROFILE_STAGES)})")
+    # Folder the run writes to: the database, or the fragment of this shard
+    args.output = FOLDER_NAME
+    if args.shard:
+        args.output = args.shard_folder or default_shard_folder(FOLDER_NAME, *args.shard)
+    args.report = args.report or os.path.join(args.output, "reports", "run_report.json")
+    return args
+
+
+def main(argv=None):
     """Main function that starts the bootstrap process and shows random hero data"""
+    args = parse_args(argv)
+    if args.ndjson == "-":
+        # The records own stdout: everything the launcher prints goes to stderr
+        args.ndjson = sys.stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            __main(args)
+    else:
+        __main(args)
+
+
+def __main(args):
+    """Run the launcher with parsed options"""
+    if args.watch:
+        __watch(args)
+        return
+    instrumentation.METRICS.reset()
+    profiler = __start_profiler(args)
+    memory = RssMonitor()
+    instrumentation.METRICS.listeners.append(memory)
+    memory.start()
     print("Starting FEH Data Fetcher Test Launcher...")
     print("=" * 50)
     
+    extra = {}
     try:
-        # Start the bootstrap process
-        data = bootstrap_database()
-        
-        print("\n" + "=" * 50)
-        print("Bootstrap completed successfully!")
+        if args.streaming:
+            __run_streaming(args, extra)
+        else:
+            __run(args, extra)
+    except Exception as e:
+        print(f"\nError during bootstrap: {e}")
+        import traceback
+        traceback.print_exc()
+    __write_change_feed(args, extra)
+    
+    memory.stop()
+    instrumentation.METRICS.listeners.remove(memory)
+    extra["memory"] = memory.report()
+    __write_run_report(args, extra)
+    __stop_profiler(args, profiler)
+    if not args.no_pause:
+        input("\nPress Enter to exit...")
 
-        heroes_to_update = get_heroes_to_update(data['heroes'], FOLDER_NAME, "heroes.txt")
-        refines_to_update = get_heroes_to_update(data['refines'], FOLDER_NAME, "refines.txt")
-        resplendents_to_update = get_heroes_to_update(data['resplendents'], FOLDER_NAME, "resplendents.txt")
+
+def __run(args, extra: dict):
+    """Bootstrap every listing, then fetch and save each hero to update"""
+    # Start the bootstrap process
+    with instrumentation.stage("bootstrap"):
+        data = bootstrap_database(LISTINGS_SNAPSHOT, args.listings_ttl * 3600, args.refresh_listings)
+        differ = __listing_differ(args)
+        try:
+            for category, listing in data.items():
+                __diff_listing(differ, category, listing)
+        finally:
+            __close_listing_differ(args, differ, extra)
+    
+    print("\n" + "=" * 50)
+    print("Bootstrap completed successfully!")
+
+    heroes_to_update = __heroes_to_update(args, data['heroes'], "heroes.txt")
+    refines_to_update = __heroes_to_update(args, data['refines'], "refines.txt")
+    resplendents_to_update = __heroes_to_update(args, data['resplendents'], "resplendents.txt")
 
 
+    with __open_sink(args) as sink:
         for category, update in zip(list(data.keys())[:-1], [heroes_to_update, refines_to_update, resplendents_to_update]):
             if update:
                 print(f"\nSaving {category} heroes...")
+                if category == "refines":
+                    __save_refines(data[category], update, sink.write_refines)
+                    continue
+                if args.workers > 1:
+                    extra.setdefault("pipeline", {})[category] = __save_pipelined(
+                        args, category, data[category], update, sink.write_hero)
+                    sink.flush()
+                    continue
                 # Create progress bar for this category
+                from tqdm import tqdm
                 with tqdm(total=len(update), desc=f"Downloading {category}", unit="hero") as pbar:
                     for hero_id in update:
                         try:
                             pbar.set_postfix_str(f"{hero_id}")
                             hero_data = data[category][hero_id]
-                            hero_page_data = fetch_hero_data(data[category][hero_id])
-                            save_hero_to_files(hero_data, hero_page_data, FOLDER_NAME)
+                            with instrumentation.hero(hero_id):
+                                hero_page_data = fetch_hero_data(data[category][hero_id])
+                                save_hero_to_files(hero_data, hero_page_data, args.output, sink=sink)
                             pbar.update(1)
                         except Exception as e:
+                            instrumentation.count("hero_errors")
                             pbar.set_postfix_str(f"Error: {hero_id} - {str(e)[:30]}")
                             pbar.update(1)
                             print(f"\nError processing {hero_id}: {e}")
-        
-        print("\nSaving manuals...")
-        if os.path.exists(os.path.join(FOLDER_NAME, "manuals.csv")):
-            os.remove(os.path.join(FOLDER_NAME, "manuals.csv"))
-        save_manuals(data['manuals'], FOLDER_NAME)
-        print("All downloads completed successfully! ✨")
-
-    except Exception as e:
-        print(f"\nError during bootstrap: {e}")
-        import traceback
-        traceback.print_exc()
+                sink.flush()
     
-    input("\nPress Enter to exit...")
+    __save_manuals(args, data['manuals'])
+    print("All downloads completed successfully! ✨")
+
+
+def __run_streaming(args, extra: dict):
+    """
+    Bounded-memory run: listings are fetched one category at a time and hero rows go to a
+    StreamingStore, which merges them into the database files when the run ends.
+    """
+    listings = iter_bootstrap(LISTINGS_SNAPSHOT, args.listings_ttl * 3600, args.refresh_listings)
+    differ = __listing_differ(args)
+    manuals = []
+    with StreamingStore(args.output, int(args.stream_buffer_mb * 1024 * 1024)) as store, __open_sink(args, store) as sink:
+        while True:
+            with instrumentation.stage("bootstrap"):
+                category, listing = next(listings, (None, None))
+                if category is None:
+                    __close_listing_differ(args, differ, extra)
+                    break
+                __diff_listing(differ, category, listing)
+            if category == "manuals":
+                manuals = listing
+                continue
+            update = __heroes_to_update(args, listing, f"{category}.txt")
+            if not update:
+                continue
+            print(f"\nSaving {category} heroes...")
+            if category == "refines":
+                __save_refines(listing, update, sink.write_refines)
+                del listing
+                continue
+            if args.workers > 1:
+                extra.setdefault("pipeline", {})[category] = __save_pipelined(args, category, listing, update, sink.write_hero)
+                del listing
+                continue
+            from tqdm import tqdm
+            with tqdm(total=len(update), desc=f"Downloading {category}", unit="hero") as pbar:
+                for hero_id in update:
+                    pbar.set_postfix_str(f"{hero_id}")
+                    try:
+                        with instrumentation.hero(hero_id):
+                            save_hero_to_files(listing[hero_id], fetch_hero_data(listing[hero_id]), args.output, sink=sink)
+                    except Exception as e:
+                        instrumentation.count("hero_errors")
+                        pbar.set_postfix_str(f"Error: {hero_id} - {str(e)[:30]}")
+                        print(f"\nError processing {hero_id}: {e}")
+                    pbar.update(1)
+            del listing
+        print("\nMerging saved rows into the database...")
+
+    __save_manuals(args, manuals)
+    print("All downloads completed successfully! ✨")
+
+
+def __watch(args):
+    """Watch mode: one long-running process refreshing the heroes edited on the wiki"""
+    print("Starting FEH Data Fetcher in watch mode...")
+    print("=" * 50)
+    # Peaks since the watch started: the cycle reports hold the same memory section as a run's
+    memory = RssMonitor()
+    instrumentation.METRICS.listeners.append(memory)
+    memory.start()
+    with __open_sink(args) as sink:
+        watcher = WikiWatcher(args.output, LISTINGS_SNAPSHOT, sink, args.poll_interval,
+                              on_cycle=lambda summary: __end_watch_cycle(args, summary, memory),
+                              listings_ttl=args.listings_ttl * 3600, refresh_listings=args.refresh_listings,
+                              differ=__listing_differ(args),
+                              on_bootstrap=lambda differ: __end_watch_bootstrap(args, differ))
+        try:
+            watcher.run(args.watch_cycles)
+        except KeyboardInterrupt:
+            print("\nWatch mode stopped")
+        finally:
+            memory.stop()
+            instrumentation.METRICS.listeners.remove(memory)
+
+
+def __end_watch_bootstrap(args, differ: ListingDiffer):
+    """Print the listing changes since the last run and write listing_diff.json (the differ is closed)"""
+    if differ.has_baseline:
+        for category, diff in differ.diffs.items():
+            __print_listing_diff(category, diff)
+    __write_listing_diff(args, differ, {})
+
+
+def __end_watch_cycle(args, summary: dict, memory: RssMonitor):
+    """Print a watch cycle; if it saved anything, write the change feed and the run report of the cycle"""
+    if not (summary["changes"] or summary["saved"] or summary["errors"]):
+        return
+    print(f"\nWatch cycle {summary['cycle']}: {summary['changes']} changed pages, {len(summary['saved'])} heroes saved"
+          + (f", listings refreshed: {', '.join(summary['listings'])}" if summary["listings"] else "")
+          + (f", {len(summary['errors'])} errors" if summary["errors"] else "")
+          + f" ({summary['duration_s']:.1f}s)")
+    if summary["saved"] or summary["listings"] or summary["refines"] or summary["manuals_written"]:
+        extra = {"watch": summary}
+        __write_change_feed(args, extra)
+        extra["memory"] = memory.report()
+        __write_run_report(args, extra)
+
+
+def __open_sink(args, store: StreamingStore = None):
+    """Where converted heroes go: the database CSVs (through the store in streaming mode), plus --ndjson"""
+    sink = CsvSink(args.output, store)
+    if args.ndjson is None:
+        return sink
+    # NDJSON first: a record goes out as soon as the hero is converted, before the CSVs and images
+    return MultiSink([NdjsonSink(args.ndjson), sink])
+
+
+def __listing_differ(args) -> ListingDiffer:
+    """Diff the listings against the previous run's, forgetting stale heroes in the database and the fragment"""
+    return ListingDiffer(default_baseline_path(FOLDER_NAME), [FOLDER_NAME, args.output])
+
+
+def __diff_listing(differ: ListingDiffer, category: str, listing):
+    """Diff one listing against the previous run's and print what changed"""
+    diff = differ.add(category, listing)
+    if diff is not None and differ.has_baseline:
+        __print_listing_diff(category, diff)
+
+
+def __print_listing_diff(category: str, diff: dict):
+    changes = ", ".join(f"{len(diff[kind])} {kind.replace('_', ' ')}" for kind in DIFF_KINDS if diff[kind])
+    print(f"Listing changes in {category}: {changes or 'none'}")
+
+
+def __close_listing_differ(args, differ: ListingDiffer, extra: dict):
+    """Save the new baseline and write the diff next to the run report (listing_diff.json)"""
+    differ.close()
+    __write_listing_diff(args, differ, extra)
+
+
+def __write_listing_diff(args, differ: ListingDiffer, extra: dict):
+    diff = differ.report()
+    extra["listing_diff"] = {"baseline": diff["baseline"], "forgotten": diff["forgotten"], "summary": diff["summary"]}
+    path = os.path.join(os.path.dirname(args.report) or ".", "listing_diff.json")
+    try:
+        instrumentation.write_json_report(diff, path)
+    except OSError as e:
+        print(f"\nCould not write listing diff: {e}")
+
+
+def __heroes_to_update(args, listing: dict, file_name: str) -> list:
+    """
+    Heroes of the listing to refresh: not done in the database (nor in the fragment of this shard).
+    Nothing for a listing left out by --only.
+    """
+    if args.only and os.path.splitext(file_name)[0] not in args.only:
+        return []
+    update = get_heroes_to_update(listing, FOLDER_NAME, file_name, shard=args.shard)
+    if args.output != FOLDER_NAME:
+        pending = set(get_heroes_to_update(listing, args.output, file_name))
+        update = [hero_id for hero_id in update if hero_id in pending]
+    return update
+
+
+def __save_refines(listing: dict, update: list, write):
+    """Refines come straight from the Weapon Refinery tables: one bulk write, no hero page fetched"""
+    refines = [listing[hero_id] for hero_id in update if hero_id in listing]
+    with instrumentation.stage("save"):
+        write(refines)
+    print(f"Saved {len(refines)} refines")
+
+
+def __save_manuals(args, manuals: list[dict]):
+    """Update manuals.csv from the listing (not sharded: only shard 0 saves it)"""
+    if args.shard and args.shard[0] != 0 or args.only and "manuals" not in args.only:
+        return
+    print("\nSaving manuals...")
+    summary = save_manuals(manuals, args.output, replace=True)
+    if summary["written"]:
+        print(f"Manuals: {summary['added']} rows added, {summary['removed']} removed, {summary['changed']} changed")
+    else:
+        print("Manuals unchanged")
+
+
+def __save_pipelined(args, category: str, listing: dict, update: list, write) -> dict:
+    """Run the heroes of a category through the staged pipeline; returns its queue/utilisation report"""
+    from tqdm import tqdm
+    with tqdm(total=len(update), desc=f"Downloading {category}", unit="hero") as pbar:
+        def done(hero_info):
+            pbar.set_postfix_str(hero_info["hero_id"])
+            pbar.update(1)
+
+        def failed(hero_info, error):
+            pbar.set_postfix_str(f"Error: {hero_info['hero_id']} - {str(error)[:30]}")
+            pbar.update(1)
+            print(f"\nError processing {hero_info['hero_id']}: {error}")
+
+        for hero_id in update:
+            if hero_id not in listing:
+                instrumentation.count("hero_errors")
+                failed({"hero_id": hero_id}, KeyError(hero_id))
+        pipeline = hero_pipeline(write, args.output, args.workers, args.convert_workers, args.queue_size,
+                                 on_done=done, on_error=failed)
+        report = pipeline.run([listing[hero_id] for hero_id in update if hero_id in listing])
+    print(f"Pipeline bottleneck: {report['bottleneck']} "
+          f"({report['stages'][report['bottleneck']]['utilisation']:.0%} busy)")
+    return report
+
+
+def __start_profiler(args):
+    """Attach a StageProfiler to the instrumentation stages when --profile is given"""
+    if not (args.profile or args.trace_memory):
+        return None
+    profiler = StageProfiler(args.profile_stages, args.profiler if args.profile else None, args.sample_interval, args.trace_memory)
+    instrumentation.METRICS.listeners.append(profiler)
+    profiler.start()
+    return profiler
+
+
+def __stop_profiler(args, profiler):
+    """Detach the profiler and write its output files"""
+    if profiler is None:
+        return
+    profiler.stop()
+    instrumentation.METRICS.listeners.remove(profiler)
+    output_dir = args.profile_dir or os.path.join(args.output, "reports", "profile", instrumentation.METRICS.run_id)
+    for path in profiler.write(output_dir):
+        print(f"Profile written to {path}")
+
+
+def __write_change_feed(args, extra: dict):
+    """Record the rows this run changed in the change feed (shard fragments are recorded by merge_shards.py)"""
+    if args.shard:
+        return
+    try:
+        feed = write_change_feed(args.output, instrumentation.METRICS.run_id)
+    except OSError as e:
+        print(f"\nCould not write change feed: {e}")
+        return
+    extra["change_feed"] = feed
+    print(f"\nChange feed: {feed['upserts']} upserts, {feed['deletes']} deletes"
+          + (f" (seq {feed['first_seq']}-{feed['last_seq']})" if feed["segment"] else ""))
+
+
+def __write_run_report(args, extra: dict = None):
+    """Write the run report (and the optional Prometheus textfile)"""
+    report = instrumentation.build_report(instrumentation.METRICS, slowest=args.slowest, extra=extra)
+    try:
+        instrumentation.write_json_report(report, args.report)
+        if args.prometheus:
+            instrumentation.write_prometheus_textfile(report, args.prometheus)
+    except OSError as e:
+        print(f"\nCould not write run report: {e}")
+        return
+    print(f"\nRun report written to {args.report} "
+          f"({report['heroes']} heroes in {report['duration_s']:.1f}s)")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,125 @@
+"""
+Listing Diff - Typed changes of the wiki listings between two runs
+This module compares each listing of a run with the one the previous run saw (the baseline
+snapshot): heroes added or removed, and heroes whose page URL, icon or refine table changed.
+Heroes whose saved data is out of date are taken off the done-lists, so the update planner
+(get_heroes_to_update) refreshes exactly the new and changed heroes, and the diff is written
+next to the run report.
+"""
+
+import os
+from contextlib import ExitStack
+
+from bootstrap import CATEGORIES, read_snapshot, snapshot_writer
+from save_hero import forget_heroes
+
+# Listing snapshot of the previous run, in the cache folder of the database
+BASELINE_NAME = "listings.baseline.jsonl"
+
+# Kinds of change, in the order they are reported
+DIFF_KINDS = ("added", "removed", "url_changed", "icon_changed", "refine_changed")
+
+# Listings of heroes (manuals are rewritten every run and not diffed)
+HERO_CATEGORIES = CATEGORIES[:3]
+
+
+def diff_listing(previous: dict, current: dict) -> dict:
+    """
+    Typed diff of a hero listing (hero_id -> entry) against the previous one: sorted lists of
+    the added and removed hero ids, {hero_id: {"old", "new"}} for url_id and icon_url changes,
+    and the hero ids whose refine table changed.
+    """
+    diff = {
+        "added": sorted(hero_id for hero_id in current if hero_id not in previous),
+        "removed": sorted(hero_id for hero_id in previous if hero_id not in current),
+        "url_changed": {},
+        "icon_changed": {},
+        "refine_changed": [],
+    }
+    for hero_id in sorted(current.keys() & previous.keys()):
+        old, new = previous[hero_id], current[hero_id]
+        if old.get("url_id") != new.get("url_id"):
+            diff["url_changed"][hero_id] = {"old": old.get("url_id"), "new": new.get("url_id")}
+        if old.get("icon_url") != new.get("icon_url"):
+            diff["icon_changed"][hero_id] = {"old": old.get("icon_url"), "new": new.get("icon_url")}
+        if old.get("refine_data") != new.get("refine_data"):
+            diff["refine_changed"].append(hero_id)
+    return diff
+
+
+def stale_heroes(diff: dict) -> list[str]:
+    """Hero ids whose saved data no longer matches the listing (removed or changed)"""
+    stale = set(diff["removed"]) | diff["url_changed"].keys() | diff["icon_changed"].keys()
+    stale.update(diff["refine_changed"])
+    return sorted(stale)
+
+
+def default_baseline_path(folder_path: str) -> str:
+    return os.path.join(folder_path, "cache", BASELINE_NAME)
+
+
+def summarize(diffs: dict) -> dict:
+    """Number of heroes per kind of change, per category"""
+    return {category: {kind: len(diff[kind]) for kind in DIFF_KINDS} for category, diff in diffs.items()}
+
+
+class ListingDiffer:
+    """
+    Diff the listings of a run against the baseline one category at a time, in CATEGORIES
+    order (as bootstrap_database and iter_bootstrap return them), taking the stale heroes off
+    the done-lists of every folder given. Once every category has been seen, the listings of
+    the run become the new baseline. Only one listing is held at a time (streaming mode).
+    """
+
+    def __init__(self, baseline_path: str, folder_paths: list[str]):
+        self.baseline_path = baseline_path
+        self.folder_paths = list(dict.fromkeys(folder_paths))
+        self.diffs = {}
+        self.forgotten = 0
+        # The baseline never expires: it is whatever the last run saw
+        self._previous = read_snapshot(baseline_path, float("inf"))
+        self.has_baseline = self._previous is not None
+        self._seen = []
+        self._stack = ExitStack()
+        self._write = self._stack.enter_context(snapshot_writer(baseline_path))
+
+    def add(self, category: str, listing) -> dict | None:
+        """Diff one listing and forget its stale heroes; returns the diff (None for manuals)"""
+        previous = self.__previous_listing(category)
+        self._write(category, listing)
+        self._seen.append(category)
+        if category not in HERO_CATEGORIES:
+            return None
+        diff = diff_listing(previous or {}, listing)
+        self.diffs[category] = diff
+        stale = stale_heroes(diff)
+        for folder_path in self.folder_paths:
+            self.forgotten += forget_heroes(stale, folder_path, f"{category}.txt")
+        return diff
+
+    def close(self):
+        """Save the new baseline if every category was seen (the old one is kept otherwise)"""
+        if self._stack is None:
+            return
+        stack, self._stack = self._stack, None
+        if all(category in self._seen for category in CATEGORIES):
+            stack.close()
+        else:
+            # Leaving the writer with an error drops the partial snapshot
+            stack.__exit__(RuntimeError, RuntimeError("incomplete listings"), None)
+        if self._previous is not None:
+            self._previous.close()
+
+    def report(self) -> dict:
+        """The run artifact: whether a baseline existed, counts and the full diff per category"""
+        return {"baseline": self.has_baseline, "forgotten": self.forgotten,
+                "summary": summarize(self.diffs), "categories": self.diffs}
+
+    def __previous_listing(self, category: str):
+        """Listing of the category in the baseline (read in the same order the listings come in)"""
+        if self._previous is None:
+            return None
+        for previous_category, listing in self._previous:
+            if previous_category == category:
+                return listing
+        return None
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+FEH Data Fetcher - Shard merge command
+Combines the database fragments written by `launcher.py --shard i/N` runs into the
+canonical database folder.
+"""
+
+import argparse
+import glob
+import os
+import shutil
+import time
+
+import instrumentation
+from save_hero import merge_fragments, fragment_order, write_change_feed
+from sharding import SHARDS_FOLDER_NAME
+
+
+FOLDER_NAME = "database"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge shard database fragments into the database folder")
+    parser.add_argument("fragments", nargs="*",
+                        help="Fragment folders (default: every folder in <folder>/shards)")
+    parser.add_argument("--folder", default=FOLDER_NAME, help="Database folder")
+    parser.add_argument("--buffer-mb", type=float, default=64, help="Memory used to sort unsorted fragments (MB)")
+    parser.add_argument("--remove", action="store_true", help="Delete the fragments once merged")
+    args = parser.parse_args()
+
+    fragments = args.fragments or sorted(glob.glob(os.path.join(args.folder, SHARDS_FOLDER_NAME, "*", "")))
+    fragments = [os.path.normpath(path) for path in fragments if os.path.isdir(path)]
+    if not fragments:
+        print("No fragment to merge")
+        return
+
+    start = time.perf_counter()
+    # Most recently written fragment last, so it wins the keys several fragments hold
+    result = merge_fragments(args.folder, fragment_order(fragments), int(args.buffer_mb * 1024 * 1024))
+    for filename, rows in sorted(result["rows"].items()):
+        conflicts = result["conflicts"].get(filename)
+        print(f"{filename}: {rows} rows" + (f" ({conflicts} keys in several fragments)" if conflicts else ""))
+    print(f"Merged {len(fragments)} fragments ({result['images']} images) in {time.perf_counter() - start:.2f}s")
+    feed = write_change_feed(args.folder, instrumentation.METRICS.run_id)
+    print(f"Change feed: {feed['upserts']} upserts, {feed['deletes']} deletes")
+
+    if args.remove:
+        for fragment_path in fragments:
+            shutil.rmtree(fragment_path)
+
+
+if __name__ == "__main__":
+    main()
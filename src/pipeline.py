@@ -0,0 +1,251 @@
+"""
+Hero Pipeline - Bounded producer/consumer stages with a single storage writer
+This module runs the steps of a hero (fetch, parse/extract/convert, images, write) in stages
+connected by bounded queues. Fetch and convert stages can run several workers, but one writer
+thread owns every database file, and a full queue blocks the stage feeding it, so fast fetching
+can never outrun slow writes. Queue depths, waits and per-stage utilisation are reported so each
+stage can be sized.
+"""
+
+import time
+import queue
+import threading
+
+import utils
+import instrumentation
+from fetcher import download_hero_page, extract_hero_data
+from save_hero import convert_hero_data, save_hero_images
+
+DEFAULT_QUEUE_SIZE = 16
+
+# Passed down a queue once per worker of the next stage when the stage feeding it is finished
+_END = object()
+
+# Payload of a hero a stage failed on: later stages pass it along so the last one can skip it in order
+_FAILED = object()
+
+
+class PipelineStage:
+    """One step of the pipeline: `workers` threads calling function(hero_info, payload) -> payload"""
+
+    def __init__(self, name: str, function, workers: int = 1):
+        self.name = name
+        self.function = function
+        self.workers = max(1, workers)
+        self.items = 0
+        self.errors = 0
+        self.busy_s = 0.0
+
+
+class _StageQueue(queue.Queue):
+    """Bounded queue recording its depth and how long producers and consumers waited on it"""
+
+    def __init__(self, maxsize: int):
+        super().__init__(maxsize)
+        self._stats_lock = threading.Lock()
+        self.peak_depth = 0
+        self.depth_total = 0
+        self.puts = 0
+        self.put_wait_s = 0.0
+        self.get_wait_s = 0.0
+
+    def put(self, item):
+        start = time.perf_counter()
+        super().put(item)
+        waited = time.perf_counter() - start
+        depth = self.qsize()
+        with self._stats_lock:
+            self.put_wait_s += waited
+            self.peak_depth = max(self.peak_depth, depth)
+            self.depth_total += depth
+            self.puts += 1
+
+    def get(self):
+        start = time.perf_counter()
+        item = super().get()
+        with self._stats_lock:
+            self.get_wait_s += time.perf_counter() - start
+        return item
+
+    def report(self) -> dict:
+        with self._stats_lock:
+            return {
+                "size": self.maxsize,
+                "peak_depth": self.peak_depth,
+                "mean_depth": self.depth_total / self.puts if self.puts else 0.0,
+                # Time spent blocked on a full queue: backpressure from this stage
+                "put_wait_s": self.put_wait_s,
+                # Time the workers of this stage sat idle waiting for input
+                "get_wait_s": self.get_wait_s,
+            }
+
+
+class Pipeline:
+    """
+    Run heroes through a list of PipelineStage connected by bounded queues.
+    The last stage handles the heroes in the order they were given, whatever order the workers
+    finished them in, so the written files do not depend on thread timing; the heroes in flight
+    (and waiting to be put back in order) are capped by the total capacity of the queues. The
+    last stage is meant to run a single worker, the storage writer.
+    on_done(hero_info) is called once a hero went through the last stage, on_error(hero_info, error)
+    when a stage raised (the hero is dropped); both are called one at a time.
+    """
+
+    def __init__(self, stages: list[PipelineStage], queue_size: int = DEFAULT_QUEUE_SIZE,
+                 on_done=None, on_error=None):
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.on_done = on_done
+        self.on_error = on_error
+        self._lock = threading.Lock()
+        self._callback_lock = threading.Lock()
+        self._queues = []
+        self._running = []
+        # Sequence number -> item that reached the last stage before the heroes given earlier
+        self._reorder = {}
+        self._peak_reorder = 0
+        self._next = 0
+        self._in_flight = None
+
+    def run(self, heroes: list[dict]) -> dict:
+        """Feed the heroes to the first stage, wait for every stage to drain and return the report"""
+        self._queues = [_StageQueue(self.queue_size) for _ in self.stages]
+        self._running = [stage.workers for stage in self.stages]
+        self._reorder = {}
+        self._peak_reorder = 0
+        self._next = 0
+        self._in_flight = threading.BoundedSemaphore(
+            self.queue_size * len(self.stages) + sum(stage.workers for stage in self.stages))
+        threads = []
+        for index, stage in enumerate(self.stages):
+            for number in range(stage.workers):
+                threads.append(threading.Thread(target=self.__work, args=(index,),
+                                                name=f"{stage.name}-{number}", daemon=True))
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for sequence, hero_info in enumerate(heroes):
+            self._in_flight.acquire()
+            self._queues[0].put((sequence, hero_info, None, None))
+        for _ in range(self.stages[0].workers):
+            self._queues[0].put(_END)
+        for thread in threads:
+            thread.join()
+        return self.report(time.perf_counter() - start)
+
+    def report(self, wall_s: float) -> dict:
+        """Items, errors, busy time and utilisation of each stage, with the stats of its input queue"""
+        stages = {}
+        for stage, stage_queue in zip(self.stages, self._queues):
+            stages[stage.name] = {
+                "workers": stage.workers,
+                "items": stage.items,
+                "errors": stage.errors,
+                "busy_s": stage.busy_s,
+                "utilisation": stage.busy_s / (stage.workers * wall_s) if wall_s else 0.0,
+                "queue": stage_queue.report(),
+            }
+        busiest = max(stages, key=lambda name: stages[name]["utilisation"]) if stages else None
+        return {"wall_s": wall_s, "queue_size": self.queue_size, "bottleneck": busiest,
+                "peak_reorder": self._peak_reorder, "stages": stages}
+
+    def __work(self, index: int):
+        stage = self.stages[index]
+        inbound = self._queues[index]
+        outbound = self._queues[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            item = inbound.get()
+            if item is _END:
+                with self._lock:
+                    self._running[index] -= 1
+                    last = self._running[index] == 0
+                if last and outbound is not None:
+                    for _ in range(self.stages[index + 1].workers):
+                        outbound.put(_END)
+                return
+            if outbound is not None:
+                outbound.put(self.__process(stage, item))
+                continue
+            # Last stage: handle the heroes in the order they were given
+            with self._lock:
+                self._reorder[item[0]] = item
+                self._peak_reorder = max(self._peak_reorder, len(self._reorder))
+            while True:
+                with self._lock:
+                    item = self._reorder.pop(self._next, None)
+                    if item is None:
+                        break
+                    self._next += 1
+                sequence, hero_info, started, payload = self.__process(stage, item)
+                if payload is not _FAILED:
+                    # End-to-end time of the hero, queue waits included
+                    instrumentation.METRICS.record("hero", time.perf_counter() - started, hero_info["hero_id"])
+                    self.__callback(self.on_done, hero_info)
+                self._in_flight.release()
+
+    def __process(self, stage: PipelineStage, item: tuple) -> tuple:
+        """Run one stage on an item; returns the item for the next stage"""
+        sequence, hero_info, started, payload = item
+        if payload is _FAILED:
+            return item
+        begin = time.perf_counter()
+        started = started or begin
+        error = None
+        try:
+            with instrumentation.hero(hero_info["hero_id"], record=False):
+                payload = stage.function(hero_info, payload)
+        except Exception as e:
+            error = e
+            payload = _FAILED
+        busy = time.perf_counter() - begin
+        with self._lock:
+            stage.items += 1
+            stage.busy_s += busy
+            if error is not None:
+                stage.errors += 1
+        if error is not None:
+            instrumentation.count("hero_errors")
+            self.__callback(self.on_error, hero_info, error)
+        return sequence, hero_info, started, payload
+
+    def __callback(self, callback, *args):
+        if callback is None:
+            return
+        with self._callback_lock:
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"\nPipeline callback error: {e}")
+
+
+def hero_pipeline(write, folder_path: str, workers: int = 4, convert_workers: int = 1,
+                  queue_size: int = DEFAULT_QUEUE_SIZE, download_images: bool = True,
+                  on_done=None, on_error=None) -> Pipeline:
+    """
+    Build the hero pipeline: fetch (workers threads) -> convert (convert_workers threads)
+    -> images (workers threads, if download_images) -> write (a single thread).
+
+    Args:
+        write: write(hero_info, hero_csv_data), e.g. write_hero_csv_data or StreamingStore.add_hero
+        folder_path: Database folder the images are saved under
+    """
+    def fetch(hero_info, _):
+        return download_hero_page(hero_info)
+
+    def convert(hero_info, content):
+        hero_page_data = extract_hero_data(utils.parse_page(content), hero_info)
+        return convert_hero_data(hero_info, hero_page_data)
+
+    def images(hero_info, converted):
+        save_hero_images(hero_info, converted[1], folder_path)
+        return converted
+
+    def save(hero_info, converted):
+        with instrumentation.stage("save"):
+            write(hero_info, converted[0])
+
+    stages = [PipelineStage("fetch", fetch, workers), PipelineStage("convert", convert, convert_workers)]
+    if download_images:
+        stages.append(PipelineStage("images", images, workers))
+    stages.append(PipelineStage("write", save, 1))
+    return Pipeline(stages, queue_size, on_done, on_error)
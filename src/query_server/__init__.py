@@ -0,0 +1,16 @@
+"""
+Query Server module - Main interface
+This module provides a local, read-only HTTP query service over the database folder.
+"""
+
+from .index import QueryIndex
+from .cache import ResponseCache
+from .server import QueryServer, serve
+
+# Main public interface - this is what the rest of the code uses
+__all__ = [
+    'QueryIndex',
+    'ResponseCache',
+    'QueryServer',
+    'serve',
+]
@@ -0,0 +1,66 @@
+"""
+Response Cache - Bounded LRU of serialized responses
+This module keeps the encoded bodies of recent responses, bounded both in entries and in bytes,
+and tags each entry with the table group it was built from so a reload only drops the
+responses of the groups that changed.
+"""
+
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+class ResponseCache:
+    """LRU cache: key -> (status, body), evicting the least recently used entries first"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (status, body, group), least recently used first
+        self._entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return (status, body) and mark the entry as recently used, or None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0], entry[1]
+
+    def put(self, key, status: int, body: bytes, group: str):
+        """Store a response (bodies larger than the whole cache are not stored)"""
+        if self.max_entries <= 0 or len(body) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.bytes -= len(previous[1])
+        self._entries[key] = (status, body, group)
+        self.bytes += len(body)
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            _, (_, evicted, _) = self._entries.popitem(last=False)
+            self.bytes -= len(evicted)
+            self.evictions += 1
+
+    def invalidate(self, groups) -> int:
+        """Drop the responses built from the given groups; returns how many were dropped"""
+        groups = set(groups)
+        stale = [key for key, entry in self._entries.items() if entry[2] in groups]
+        for key in stale:
+            self.bytes -= len(self._entries.pop(key)[1])
+        return len(stale)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"entries": len(self._entries), "bytes": self.bytes, "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes, "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0, "evictions": self.evictions}
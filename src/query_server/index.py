@@ -0,0 +1,146 @@
+"""
+Query Index - Indexed in-memory snapshot of the database folder
+This module holds the tables the query server answers from, grouped by the files they are
+read from (hero info, hero skill tables, skills catalogs, related heroes, manuals). Loading
+compares the signature of every file with the loaded copy and rebuilds only the groups whose
+files changed; the parsing itself goes through hero_database, which only reparses changed files.
+"""
+
+import os
+
+from hero_database import Database
+from save_hero.file_lock import file_signature
+
+# Groups of files, each one invalidating the responses built from it
+GROUPS = ("heroes", "hero_skills", "catalog", "related", "manuals")
+
+
+class QueryIndex:
+    """Tables of a database folder, swapped group by group when their files change"""
+
+    def __init__(self, folder_path: str = "database"):
+        self.folder_path = folder_path
+        self.db = Database(folder_path)
+        # group -> {file name relative to the folder: signature} of the loaded tables
+        self.signatures = {}
+        self.info = None
+        self.skill_tables = {}
+        self.catalogs = {}
+        self.related_graph = None
+        self.manuals = None
+        self.manual_captions = {}
+
+    def load_changed(self) -> dict:
+        """
+        Parse the groups whose files changed since the last apply(), without touching the
+        tables being served (safe to run on another thread than the queries).
+        Returns {group: (file signatures, {attribute: value})} for apply().
+        """
+        changes = {}
+        for group, files in self.__scan().items():
+            if files != self.signatures.get(group):
+                changes[group] = (files, self.__build(group))
+        return changes
+
+    def apply(self, changes: dict) -> list[str]:
+        """Serve the tables loaded by load_changed(); returns the files that changed"""
+        changed_files = set()
+        for group, (files, state) in changes.items():
+            previous = self.signatures.get(group, {})
+            changed_files.update(name for name in files.keys() | previous.keys() if files.get(name) != previous.get(name))
+            self.signatures[group] = files
+            for attribute, value in state.items():
+                setattr(self, attribute, value)
+        return sorted(changed_files)
+
+    def reload(self) -> list[str]:
+        """Load and serve the changed groups in one go; returns the files that changed"""
+        return self.apply(self.load_changed())
+
+    # -- Queries (None when nothing matches) ------------------------------------
+
+    def hero(self, key: str) -> dict | None:
+        row = self.info.get("Key", key) if self.info is not None else None
+        return {"key": key, "info": row.as_dict()} if row is not None else None
+
+    def hero_skills(self, key: str) -> dict | None:
+        skills = {}
+        for table_name, table in self.skill_tables.items():
+            rows = table.lookup("Key", key)
+            if rows:
+                skills[table_name] = [_without(row, "Key") for row in rows]
+        if not skills and self.hero(key) is None:
+            return None
+        return {"key": key, "skills": skills}
+
+    def hero_related(self, key: str) -> dict | None:
+        if self.related_graph is None or (key not in self.related_graph and self.hero(key) is None):
+            return None
+        return {"key": key, "related": self.related_graph.related(key)}
+
+    def hero_manuals(self, key: str) -> dict | None:
+        captions = self.manual_captions.get(key)
+        if captions is None and self.hero(key) is None:
+            return None
+        return {"key": key, "manuals": list(captions or [])}
+
+    def skill(self, name: str) -> dict | None:
+        catalog = {}
+        for skill_type, table in self.catalogs.items():
+            row = table.get("Name", name)
+            if row is not None:
+                catalog[skill_type] = row.as_dict()
+        return {"name": name, "catalog": catalog} if catalog else None
+
+    def skill_heroes(self, name: str) -> dict | None:
+        heroes = {}
+        for table_name, table in self.skill_tables.items():
+            rows = table.lookup("Name", name)
+            if rows:
+                heroes[table_name] = [_without(row, "Name") for row in rows]
+        return {"name": name, "heroes": heroes} if heroes else None
+
+    def manual(self, caption: str) -> dict | None:
+        rows = self.manuals.lookup("Caption", caption) if self.manuals is not None else []
+        return {"caption": caption, "rows": [_without(row, "Caption") for row in rows]} if rows else None
+
+    def counts(self) -> dict:
+        """Number of rows loaded per group"""
+        return {
+            "heroes": len(self.info) if self.info is not None else 0,
+            "hero_skills": {name: len(table) for name, table in self.skill_tables.items()},
+            "catalog": {name: len(table) for name, table in self.catalogs.items()},
+            "related": len(self.related_graph) if self.related_graph is not None else 0,
+            "manuals": len(self.manuals) if self.manuals is not None else 0,
+        }
+
+    def __scan(self) -> dict:
+        """Signature of every file, per group"""
+        files = {
+            "heroes": ["info.csv"],
+            # info.csv too: the hero routes of these groups answer 404 or an empty list by it
+            "hero_skills": [f"{name}.csv" for name in self.db.skill_table_names()] + ["info.csv"],
+            "catalog": [f"skills/skill_{name}.csv" for name in self.db.catalog_names()],
+            "related": ["related_heroes.csv", "info.csv"],
+            "manuals": ["manuals.csv", "manuals_index.json", "info.csv"],
+        }
+        return {group: {name: file_signature(os.path.join(self.folder_path, name)) for name in names}
+                for group, names in files.items()}
+
+    def __build(self, group: str) -> dict:
+        """Attributes of a group, parsed through the Database (unchanged files stay memoized)"""
+        db = self.db
+        if group == "heroes":
+            return {"info": db.info()}
+        if group == "hero_skills":
+            return {"skill_tables": {name: db.skill_table(name) for name in db.skill_table_names()}}
+        if group == "catalog":
+            return {"catalogs": {name: db.catalog(name) for name in db.catalog_names()}}
+        if group == "related":
+            return {"related_graph": db.related_heroes()}
+        return {"manuals": db.manuals(), "manual_captions": dict(db.manuals_index())}
+
+
+def _without(row, field: str) -> dict:
+    """A row as a dictionary, without the field the query already names"""
+    return {name: value for name, value in row.as_dict().items() if name != field}
@@ -0,0 +1,193 @@
+"""
+Query Server - Read-only HTTP/1.1 JSON API over the database folder
+This module serves hero and skill lookups from a QueryIndex with asyncio streams (keep-alive,
+no external dependencies). Encoded responses are kept in a bounded LRU cache; reloads parse the
+changed files on a worker thread, then swap the changed table groups in and drop only their
+cached responses. A reload is triggered by POST /reload or, when watching, by the launcher
+writing a new run report at the end of each run.
+"""
+
+import os
+import json
+import time
+import asyncio
+from http import HTTPStatus
+from urllib.parse import urlsplit, unquote
+
+from save_hero.file_lock import file_signature
+from .index import QueryIndex
+from .cache import ResponseCache, DEFAULT_MAX_ENTRIES, DEFAULT_MAX_BYTES
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+
+# Written by the launcher when a run finishes (relative to the database folder)
+RUN_REPORT = os.path.join("reports", "run_report.json")
+
+# (collection, sub-resource) -> (QueryIndex method, table group the response is built from)
+ROUTES = {
+    ("heroes", None): ("hero", "heroes"),
+    ("heroes", "skills"): ("hero_skills", "hero_skills"),
+    ("heroes", "related"): ("hero_related", "related"),
+    ("heroes", "manuals"): ("hero_manuals", "manuals"),
+    ("skills", None): ("skill", "catalog"),
+    ("skills", "heroes"): ("skill_heroes", "hero_skills"),
+    ("manuals", None): ("manual", "manuals"),
+}
+
+
+class QueryServer:
+    """asyncio HTTP server answering the ROUTES from an in-memory QueryIndex"""
+
+    def __init__(self, folder_path: str = "database", host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 cache_entries: int = DEFAULT_MAX_ENTRIES, cache_bytes: int = DEFAULT_MAX_BYTES,
+                 watch_interval: float = 2.0):
+        self.folder_path = folder_path
+        self.host = host
+        self.port = port
+        self.watch_interval = watch_interval
+        self.index = QueryIndex(folder_path)
+        self.cache = ResponseCache(cache_entries, cache_bytes)
+        self.requests = 0
+        self.reloads = []
+        self._server = None
+        self._watcher = None
+        self._reload_lock = None
+
+    async def start(self):
+        """Load the database, then start listening (port 0 picks a free port)"""
+        self._reload_lock = asyncio.Lock()
+        await self.reload()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.watch_interval > 0:
+            self._watcher = asyncio.create_task(self.__watch_run_report())
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"Serving {self.folder_path} on http://{self.host}:{self.port} "
+              f"({self.index.counts()['heroes']} heroes, cache of {self.cache.max_entries} responses)")
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def reload(self) -> dict:
+        """Reload the changed table groups and drop their cached responses"""
+        async with self._reload_lock:
+            start = time.perf_counter()
+            changes = await asyncio.to_thread(self.index.load_changed)
+            files = self.index.apply(changes)
+            dropped = self.cache.invalidate(changes)
+            reload = {"at": time.time(), "seconds": time.perf_counter() - start, "groups": sorted(changes),
+                      "files": files, "dropped_responses": dropped}
+            self.reloads = (self.reloads + [reload])[-10:]
+            return reload
+
+    def respond(self, method: str, target: str) -> tuple[int, bytes, str]:
+        """Return (status, body, cache state) of a GET request (status 405 for other methods)"""
+        path = urlsplit(target).path
+        # Split before unquoting, so skill names can hold "/" as %2F
+        segments = tuple(unquote(segment) for segment in path.strip("/").split("/"))
+        if method != "GET":
+            return _error(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} is not supported") + ("",)
+        if segments == ("stats",):
+            return HTTPStatus.OK, _encode(self.stats()), ""
+
+        route = None
+        if len(segments) in (2, 3) and segments[1]:
+            route = ROUTES.get((segments[0], segments[2] if len(segments) == 3 else None))
+        if route is None:
+            return _error(HTTPStatus.NOT_FOUND, f"No route for {path}") + ("",)
+
+        cached = self.cache.get(segments)
+        if cached is not None:
+            return cached + ("HIT",)
+        method_name, group = route
+        document = getattr(self.index, method_name)(segments[1])
+        if document is None:
+            status, body = _error(HTTPStatus.NOT_FOUND, f"Not found: {segments[1]}")
+        else:
+            status, body = HTTPStatus.OK, _encode(document)
+        self.cache.put(segments, status, body, group)
+        return status, body, "MISS"
+
+    def stats(self) -> dict:
+        return {"folder": self.folder_path, "requests": self.requests, "cache": self.cache.stats(),
+                "rows": self.index.counts(), "reloads": self.reloads}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve the requests of one connection until it closes or asks to"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = (request_line.decode("latin-1").split() + ["", "", ""])[:3]
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if headers.get("content-length"):
+                    await reader.readexactly(int(headers["content-length"]))
+
+                self.requests += 1
+                if method == "POST" and urlsplit(target).path.rstrip("/") == "/reload":
+                    status, body, cache_state = HTTPStatus.OK, _encode(await self.reload()), ""
+                else:
+                    status, body, cache_state = self.respond(method, target)
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                head = [f"HTTP/1.1 {status.value} {status.phrase}",
+                        "Content-Type: application/json; charset=utf-8",
+                        f"Content-Length: {len(body)}",
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                if cache_state:
+                    head.append(f"X-Cache: {cache_state}")
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def __watch_run_report(self):
+        """Reload whenever the launcher writes a new run report"""
+        path = os.path.join(self.folder_path, RUN_REPORT)
+        signature = file_signature(path)
+        while True:
+            await asyncio.sleep(self.watch_interval)
+            current = file_signature(path)
+            if current != signature:
+                signature = current
+                reload = await self.reload()
+                print(f"Run finished: reloaded {', '.join(reload['files']) or 'nothing'} "
+                      f"in {reload['seconds'] * 1000:.0f} ms")
+
+
+def serve(folder_path: str = "database", host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, **options):
+    """Run a QueryServer until interrupted"""
+    server = QueryServer(folder_path, host, port, **options)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+def _encode(document) -> bytes:
+    return json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _error(status: HTTPStatus, message: str) -> tuple[int, bytes]:
+    return status, _encode({"error": message})
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+FEH Data Fetcher - Skill query command
+Answers "which heroes learn skill X at which rarity" from the skill index
+kept next to the database (skill_index.json).
+"""
+
+import argparse
+import time
+
+from save_hero.skill_index import SkillIndex
+
+
+FOLDER_NAME = "database"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find which heroes learn a skill (or which skills a hero learns)")
+    parser.add_argument("query", help="Skill name, or hero Key/name with --hero")
+    parser.add_argument("--hero", action="store_true", help="Search hero names instead of skill names")
+    parser.add_argument("--prefix", action="store_true", help="Match every name starting with the query")
+    parser.add_argument("--fuzzy", action="store_true", help="Match names by trigram similarity")
+    parser.add_argument("--limit", type=int, default=10, help="Maximum names matched by --prefix/--fuzzy")
+    parser.add_argument("--folder", default=FOLDER_NAME, help="Database folder")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = SkillIndex.load(args.folder)
+    loaded = time.perf_counter()
+
+    names = __match_names(index, args)
+    results = []
+    for name in names:
+        if args.hero:
+            results.extend((name,) + entry for entry in index.skills_of_hero(name))
+        else:
+            results.extend((name,) + entry for entry in index.heroes_with_skill(name))
+    answered = time.perf_counter()
+
+    if args.hero:
+        __print_rows(["Hero", "Skill", "Table", "Default", "Unlock"], results)
+    else:
+        __print_rows(["Skill", "Hero", "Table", "Default", "Unlock"], results)
+    print(f"\n{len(results)} rows for {len(names)} name(s) "
+          f"(load {(loaded - start) * 1000:.1f} ms, query {(answered - loaded) * 1000:.2f} ms)")
+
+
+def __match_names(index: SkillIndex, args) -> list[str]:
+    """Resolve the query to exact names using the requested matching mode"""
+    if args.fuzzy:
+        matches = index.fuzzy_hero_keys(args.query, args.limit) if args.hero else index.fuzzy_skill_names(args.query, args.limit)
+        return [name for name, _ in matches]
+    if args.prefix:
+        names = index.hero_keys(args.query) if args.hero else index.skill_names(args.query)
+        return names[:args.limit]
+    return [args.query]
+
+
+def __print_rows(header: list[str], rows: list[tuple]):
+    """Print rows as an aligned text table"""
+    widths = [max([len(header[i])] + [len(str(row[i])) for row in rows]) for i in range(len(header))]
+    print("  ".join(title.ljust(width) for title, width in zip(header, widths)))
+    print("  ".join("-" * width for width in widths))
+    for row in rows:
+        print("  ".join(str(value).ljust(width) for value, width in zip(row, widths)))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,44 @@ This module provides a clean interface for saving hero data to various file form
 
 from .core_saver import (
     save_hero_to_files,
-    save_manuals,
+    convert_hero_data,
+    write_hero_csv_data,
+    save_hero_images,
+    stream_hero_to_files,
+    save_refines,
+    forget_heroes,
 )
+from .manuals_store import save_manuals, import_manuals, read_manual_rows, manuals_index
+from .change_feed import write_change_feed, read_change_feed, compact_change_feed
+from .sinks import OutputSink, CsvSink, NdjsonSink, MultiSink
+from .skill_index import flush_skill_indexes
+from .streaming_store import StreamingStore
+from .shard_merge import merge_fragments, fragment_order
+from .related_heroes_graph import RelatedHeroesGraph
 
 # Main public interface - this is what the rest of the code uses
 __all__ = [
     'save_hero_to_files',
+    'convert_hero_data',
+    'write_hero_csv_data',
+    'save_hero_images',
+    'stream_hero_to_files',
     'save_manuals',
+    'import_manuals',
+    'read_manual_rows',
+    'manuals_index',
+    'save_refines',
+    'forget_heroes',
+    'RelatedHeroesGraph',
+    'StreamingStore',
+    'merge_fragments',
+    'fragment_order',
+    'write_change_feed',
+    'read_change_feed',
+    'compact_change_feed',
+    'OutputSink',
+    'CsvSink',
+    'NdjsonSink',
+    'MultiSink',
+    'flush_skill_indexes',
 ]
@@ -0,0 +1,233 @@
+"""
+Change Feed - Per-run NDJSON log of row-level upserts and deletes
+This module compares the database folder with the state recorded at the end of the previous
+run (a hash per row and per image file) and appends the differences to the feed
+folder as one NDJSON segment per run. Every entry carries the run id and a sequence number
+that increases across runs, so consumers apply the entries after the last one they applied
+instead of reloading the whole database. Compaction keeps the last entry of every row.
+"""
+
+import os
+import csv
+import json
+import glob
+import hashlib
+
+import instrumentation
+
+from .file_lock import locked, atomic_write, file_signature
+from .manuals_store import read_manual_rows, MANUALS_FILE_NAME
+
+FEED_FOLDER_NAME = "feed"
+STATE_FILE_NAME = "state.json"
+SEGMENT_SUFFIX = ".ndjson"
+COMPACTED_NAME = "compacted"
+
+# Image folders whose files are part of the feed
+IMAGE_FOLDERS = ("icons", "portraits")
+
+# Separates the fields of a composite row key in the state file
+KEY_SEPARATOR = "\x1f"
+
+
+def default_feed_folder(folder_path: str) -> str:
+    return os.path.join(folder_path, FEED_FOLDER_NAME)
+
+
+@instrumentation.timed("change_feed")
+def write_change_feed(folder_path: str, run_id: str, feed_folder: str = None) -> dict:
+    """
+    Append the changes since the previous call as a segment of the feed.
+    The first call has no previous state and records every row as an upsert.
+    Returns the run id, the number of upserts and deletes, the sequence range and the segment written (if any).
+    """
+    feed_folder = feed_folder or default_feed_folder(folder_path)
+    os.makedirs(feed_folder, exist_ok=True)
+    state_path = os.path.join(feed_folder, STATE_FILE_NAME)
+
+    with locked(state_path):
+        state = __read_state(state_path, feed_folder)
+        next_seq = state["next_seq"]
+        current = {}
+        images = {}
+        lines = []
+        summary = {"run": run_id, "upserts": 0, "deletes": 0, "first_seq": None, "last_seq": None, "segment": None}
+        for table, rows in __tables(folder_path, state.get("images", {}), images):
+            previous = state["tables"].get(table, {})
+            hashes = current[table] = {}
+            for key, row in rows:
+                key_string = KEY_SEPARATOR.join(key)
+                hashes[key_string] = digest = __hash(row)
+                if previous.get(key_string) != digest:
+                    lines.append(__entry(run_id, next_seq + len(lines), "upsert", table, key, row))
+                    summary["upserts"] += 1
+            for key_string in sorted(previous.keys() - hashes.keys()):
+                lines.append(__entry(run_id, next_seq + len(lines), "delete", table, key_string.split(KEY_SEPARATOR)))
+                summary["deletes"] += 1
+        # Tables that disappeared: every row is deleted
+        for table in sorted(state["tables"].keys() - current.keys()):
+            for key_string in sorted(state["tables"][table]):
+                lines.append(__entry(run_id, next_seq + len(lines), "delete", table, key_string.split(KEY_SEPARATOR)))
+                summary["deletes"] += 1
+
+        if lines:
+            name = f"{next_seq:012d}-{run_id}{SEGMENT_SUFFIX}"
+            with atomic_write(os.path.join(feed_folder, name)) as f:
+                f.write("".join(lines))
+            summary.update(first_seq=next_seq, last_seq=next_seq + len(lines) - 1, segment=name)
+        # The state is saved after the segment: a crash in between replays the changes next run
+        with atomic_write(state_path) as f:
+            json.dump({"next_seq": next_seq + len(lines), "tables": current, "images": images}, f,
+                      ensure_ascii=False, separators=(",", ":"))
+    return summary
+
+
+def read_change_feed(feed_folder: str, after_seq: int = 0):
+    """Yield the entries whose sequence number is greater than after_seq, in sequence order"""
+    last = after_seq
+    for path in segment_paths(feed_folder):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                # A segment replaced by compaction while being listed is skipped this way
+                if entry["seq"] > last:
+                    last = entry["seq"]
+                    yield entry
+
+
+def segment_paths(feed_folder: str) -> list[str]:
+    """Segments of the feed, oldest first"""
+    return sorted(glob.glob(os.path.join(feed_folder, f"*{SEGMENT_SUFFIX}")))
+
+
+def compact_change_feed(feed_folder: str, drop_deletes: bool = False) -> dict:
+    """
+    Replace every segment with one holding only the last entry of each row (with its original
+    sequence number), so applying it after any position still gives the latest rows.
+    drop_deletes also drops the deletes, which only consumers already past them can skip safely.
+    Returns the number of segments and entries before and after.
+    """
+    state_path = os.path.join(feed_folder, STATE_FILE_NAME)
+    with locked(state_path):
+        paths = segment_paths(feed_folder)
+        latest = {}
+        entries = 0
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    latest[(entry["table"], tuple(entry["key"]))] = line
+                    entries += 1
+        if not paths:
+            return {"segments": 0, "entries": 0, "kept": 0}
+
+        kept = sorted(latest.values(), key=lambda line: json.loads(line)["seq"])
+        if drop_deletes:
+            kept = [line for line in kept if json.loads(line)["op"] != "delete"]
+        first_seq = os.path.basename(paths[0]).split("-", 1)[0]
+        name = os.path.join(feed_folder, f"{first_seq}-{COMPACTED_NAME}{SEGMENT_SUFFIX}")
+        with atomic_write(name) as f:
+            f.write("".join(kept))
+        for path in paths:
+            if path != name:
+                os.remove(path)
+    return {"segments": len(paths), "entries": entries, "kept": len(kept)}
+
+
+def __tables(folder_path: str, image_stats: dict, new_image_stats: dict):
+    """
+    Yield (table, rows) for every table of the feed, rows being ((key fields), row) pairs.
+    Image stats map each image path to [mtime_ns, size, content hash] of the previous call.
+    """
+    # hero_database imports save_hero, so its table list is imported here rather than at the top
+    from hero_database.database import NON_SKILL_TABLES
+
+    yield "info.csv", __csv_rows(os.path.join(folder_path, "info.csv"), ("Key",))
+    yield "related_heroes.csv", __related_rows(os.path.join(folder_path, "related_heroes.csv"))
+    for name in __csv_names(folder_path):
+        if name not in NON_SKILL_TABLES:
+            yield name, __csv_rows(os.path.join(folder_path, name), ("Key", "Name"))
+    skills_folder = os.path.join(folder_path, "skills")
+    for name in __csv_names(skills_folder):
+        yield f"skills/{name}", __csv_rows(os.path.join(skills_folder, name), ("Name",))
+    _, manuals = read_manual_rows(os.path.join(folder_path, MANUALS_FILE_NAME))
+    yield MANUALS_FILE_NAME, [((caption, str(position)), row) for (caption, position), row in manuals.items()]
+    for image_folder in IMAGE_FOLDERS:
+        yield image_folder, __image_rows(folder_path, image_folder, image_stats, new_image_stats)
+
+
+def __csv_names(folder_path: str) -> list[str]:
+    if not os.path.isdir(folder_path):
+        return []
+    return sorted(name for name in os.listdir(folder_path) if name.endswith(".csv"))
+
+
+def __csv_rows(filename: str, key_fields: tuple) -> list:
+    """Rows of a headed CSV file keyed by key_fields (repeated keys get a "#n" suffix on their last field)"""
+    if not os.path.exists(filename):
+        return []
+    rows = []
+    seen = {}
+    with open(filename, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            key = tuple(row.get(field) or "" for field in key_fields)
+            seen[key] = count = seen.get(key, 0) + 1
+            if count > 1:
+                key = key[:-1] + (f"{key[-1]}#{count}",)
+            rows.append((key, {field: value or "" for field, value in row.items() if field is not None}))
+    return rows
+
+
+def __related_rows(filename: str) -> list:
+    """related_heroes.csv has no header: each line is a Key followed by the Keys related to it"""
+    if not os.path.exists(filename):
+        return []
+    with open(filename, "r", encoding="utf-8", newline="") as f:
+        return [((values[0],), {"related": values[1:]}) for values in csv.reader(f) if values]
+
+
+def __image_rows(folder_path: str, image_folder: str, image_stats: dict, new_image_stats: dict) -> list:
+    """
+    Image files keyed by their path in the database folder, with their size and content hash.
+    Downloads rewrite images that did not change, so a file is only hashed again when its size
+    or mtime changed, and only a different hash makes it an upsert.
+    """
+    rows = []
+    for root, _, names in os.walk(os.path.join(folder_path, image_folder)):
+        for name in names:
+            path = os.path.join(root, name)
+            # [mtime_ns, size], as read back from the state file
+            signature = list(file_signature(path))
+            relative = os.path.relpath(path, folder_path).replace(os.sep, "/")
+            stats = image_stats.get(relative)
+            if stats is None or stats[:2] != signature:
+                with open(path, "rb") as f:
+                    stats = signature + [hashlib.sha256(f.read()).hexdigest()[:16]]
+            new_image_stats[relative] = stats
+            rows.append(((relative,), {"size": stats[1], "sha256": stats[2]}))
+    return sorted(rows)
+
+
+def __read_state(state_path: str, feed_folder: str) -> dict:
+    if os.path.exists(state_path):
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    # Without a state every row is upserted again, numbered after the entries already in the feed
+    last_seq = 0
+    for entry in read_change_feed(feed_folder):
+        last_seq = entry["seq"]
+    return {"next_seq": last_seq + 1, "tables": {}, "images": {}}
+
+
+def __hash(row: dict) -> str:
+    return hashlib.blake2b(json.dumps(row, ensure_ascii=False, sort_keys=True).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def __entry(run_id: str, seq: int, op: str, table: str, key, row: dict = None) -> str:
+    entry = {"run": run_id, "seq": seq, "op": op, "table": table, "key": list(key)}
+    if row is not None:
+        entry["row"] = row
+    return json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
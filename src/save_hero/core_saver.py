@@ -4,6 +4,7 @@ This module coordinates the saving of hero data to various file formats.
 """
 
 import os
+import instrumentation
 from hero_data_to_csv import hero_table_to_csv_data
 
 from .csv_operations import (
@@ -14,25 +15,59 @@ from .csv_operations import (
 )
 
 from .img_downloader import download_hero_icon, download_image
-
-def save_manuals(manuals: list[dict], folder_path: str):
-    """Save manuals to files"""
-    os.makedirs(folder_path, exist_ok=True)
-
-    for manual_group in manuals:
-        with open(os.path.join(folder_path, "manuals.csv"), "a") as f:
-            f.write(manual_group["manual_data"])
+from .file_lock import locked, atomic_write
+
+# Header of skills/skill_refines.csv
+REFINE_HEADER = "Key,Name,Stats,Description,Refine Description,Cost"
+
+@instrumentation.timed("csv_write:refines")
+def save_refines(refines: list[dict], folder_path: str) -> int:
+    """
+    Bulk refine ingestion: upsert the refine rows of refines listing entries (from the Weapon
+    Refinery tables) into skills/skill_refines.csv in a single write, then mark them done.
+    No hero page is fetched. Returns the number of refines saved.
+    """
+    if not refines:
+        return 0
+    skills_folder = os.path.join(folder_path, "skills")
+    os.makedirs(skills_folder, exist_ok=True)
+    lines = [REFINE_HEADER] + [refine["refine_data"] for refine in refines]
+    # Same Name deduplication as the per-hero path: later rows replace earlier ones
+    csv_to_file(REFINE_HEADER, lines, os.path.join(skills_folder, "skill_refines.csv"), "Name")
+    __save_hero_ids_to_done([refine["hero_id"] for refine in refines], folder_path, "refines.txt")
+    return len(refines)
+
+
+def save_hero_to_files(hero_info: dict, hero_page_data: dict, folder_path: str, download_images: bool = True,
+                       sink=None):
+    """
+    Main function: Save hero data to various file formats.
+    With a sink (see sinks.py), the converted hero goes to the sink instead, with its portraits
+    (CsvSink downloads the images before marking the hero done).
+    """
+    hero_csv_data, portraits = convert_hero_data(hero_info, hero_page_data)
+    with instrumentation.stage("save"):
+        if sink is None:
+            write_hero_csv_data(hero_info, hero_csv_data, portraits, folder_path, download_images)
+            return
+        sink.write_hero(hero_info, hero_csv_data, portraits if download_images else None)
+
+
+def convert_hero_data(hero_info: dict, hero_page_data: dict) -> tuple[dict, dict]:
+    """Convert fetched hero data to CSV data; returns (hero_csv_data, portraits)"""
+    portraits = hero_page_data.pop("Portraits")
+    with instrumentation.stage("convert"):
+        return hero_table_to_csv_data(hero_info["hero_id"], hero_page_data), portraits
 
 
-def save_hero_to_files(hero_info: dict, hero_page_data: dict, folder_path: str):
-    """Main function: Save hero data to various file formats"""
+def write_hero_csv_data(hero_info: dict, hero_csv_data: dict, portraits: dict, folder_path: str,
+                        download_images: bool = True):
+    """Write already converted hero data (from hero_table_to_csv_data) to the database files"""
     
     os.makedirs(folder_path, exist_ok=True)
 
     hero_id = hero_info["hero_id"]
     category = hero_info["category"]
-    portraits = hero_page_data.pop("Portraits")
-    hero_csv_data = hero_table_to_csv_data(hero_id, hero_page_data)
     
     # The Key field now contains the icon name (clean icon name)
     icon_name = hero_csv_data["Info"].get("Key", hero_id)
@@ -61,15 +96,11 @@ def save_hero_to_files(hero_info: dict, hero_page_data: dict, folder_path: str):
     # Save skills to skills folder
     __save_skills_to_folder(folder_path, hero_csv_data["Skills"])
 
-    #icon_url is default if category is "heroes" and resplendent when category is "resplendents"
-    if category == "heroes" or category == "resplendents":
-        icon_url = hero_info["icon_url"]
-        download_hero_icon(icon_url, folder_path)
-        __save_portraits_to_files(hero_id, portraits, f"{folder_path}/portraits")
+    if download_images:
+        save_hero_images(hero_info, portraits, folder_path)
     if category == "refines":
-        refine_header = "Key,Name,Stats,Description,Refine Description,Cost"
         skill_refine_csv = {
-            "Refines":  [refine_header, hero_info["refine_data"]]
+            "Refines":  [REFINE_HEADER, hero_info["refine_data"]]
         }
         __save_skills_to_folder(folder_path, skill_refine_csv)
 
@@ -77,6 +108,23 @@ def save_hero_to_files(hero_info: dict, hero_page_data: dict, folder_path: str):
     __save_hero_id_to_done(hero_id, folder_path, category+".txt")
 
 
+def stream_hero_to_files(hero_info: dict, hero_page_data: dict, store, download_images: bool = True):
+    """Streaming mode: convert a hero and queue its rows in a StreamingStore (written on store.close())"""
+    hero_csv_data, portraits = convert_hero_data(hero_info, hero_page_data)
+    with instrumentation.stage("save"):
+        store.add_hero(hero_info, hero_csv_data)
+        if download_images:
+            save_hero_images(hero_info, portraits, store.folder_path)
+
+
+def save_hero_images(hero_info: dict, portraits: dict, folder_path: str):
+    """Download the icon and portraits of a hero"""
+    #icon_url is default if category is "heroes" and resplendent when category is "resplendents"
+    if hero_info["category"] == "heroes" or hero_info["category"] == "resplendents":
+        download_hero_icon(hero_info["icon_url"], folder_path)
+        __save_portraits_to_files(hero_info["hero_id"], portraits, f"{folder_path}/portraits")
+
+
 def __save_portraits_to_files(hero_id: str, portraits: dict, folder_path: str):
     """Save hero portraits to files"""
     os.makedirs(folder_path, exist_ok=True)
@@ -126,20 +174,46 @@ def __save_skills_to_folder(folder_name: str, skills_data: dict):
 
 def __save_hero_id_to_done(hero_id, folder_path, file_name):
     """Save hero ID to completion tracking file"""
+    __save_hero_ids_to_done([hero_id], folder_path, file_name)
+
+
+@instrumentation.timed("csv_write:done_list")
+def __save_hero_ids_to_done(hero_ids, folder_path, file_name):
+    """Save hero IDs to completion tracking file (one write for all of them)"""
     filename = os.path.join(folder_path, file_name)
     
     # The hero_id should now be in the correct icon-based format
     # No need for normalization since get_heroes_to_update handles this
     
-    # Read existing IDs efficiently
-    if os.path.exists(filename):
+    with locked(filename):
+        # Read existing IDs efficiently
+        lines = []
+        if os.path.exists(filename):
+            with open(filename, "r", encoding="utf-8") as f:
+                lines = [line.strip() for line in f if line.strip()]
+        
+        # Save the hero IDs as-is (should be icon-based format)
+        saved = set(lines)
+        new_ids = [hero_id for hero_id in dict.fromkeys(hero_ids) if hero_id not in saved]
+        if new_ids:
+            lines.extend(new_ids)
+            with atomic_write(filename) as f:
+                f.write("\n".join(lines) + "\n")
+
+
+@instrumentation.timed("csv_write:done_list")
+def forget_heroes(hero_ids, folder_path: str, file_name: str) -> int:
+    """Take hero IDs off a completion tracking file so the next update saves them again; returns how many were removed"""
+    filename = os.path.join(folder_path, file_name)
+    forget = set(hero_ids)
+    if not forget or not os.path.exists(filename):
+        return 0
+
+    with locked(filename):
         with open(filename, "r", encoding="utf-8") as f:
-            ids = set(line.strip() for line in f if line.strip())
-    else:
-        ids = set()
-    
-    # Save the hero ID as-is (should be icon-based format)
-    if hero_id not in ids:
-        # Use append mode for efficiency - single write operation
-        with open(filename, "a", encoding="utf-8") as f:
-            f.write(hero_id + "\n")
+            lines = [line.strip() for line in f if line.strip()]
+        kept = [line for line in lines if line not in forget]
+        if len(kept) != len(lines):
+            with atomic_write(filename) as f:
+                f.write("".join(line + "\n" for line in kept))
+    return len(lines) - len(kept)
@@ -0,0 +1,169 @@
+"""
+CSV Index - Byte-offset sidecar indexes for hero tables
+This module maintains a `<table>.csv.idx` file next to a hero skill table that maps each
+Key to the byte ranges of its rows, so a single hero's rows can be read (via mmap) or
+replaced without parsing the rest of the file.
+"""
+
+import os
+import json
+import mmap
+
+from .file_lock import atomic_write
+
+INDEX_SUFFIX = ".idx"
+
+# Version 2: the tables are written with "\n" line endings on every platform. Older indexes may
+# have been built from line lengths for "\r\n" files (Windows) and are rebuilt instead of trusted
+INDEX_VERSION = 2
+
+# Parsed indexes kept between calls: filename -> (size, mtime_ns, keys)
+_index_cache = {}
+
+
+def index_path(filename: str) -> str:
+    """Return the sidecar index path of a CSV file"""
+    return filename + INDEX_SUFFIX
+
+
+def build_index_from_lines(lines: list[str]) -> dict[str, list[list[int]]]:
+    """
+    Compute Key -> [[start, end], ...] byte ranges for lines about to be written
+    with write_lines_to_file (one "\\n" after every line on every platform, first line is the header).
+    """
+    keys = {}
+    offset = 0
+    for i, line in enumerate(lines):
+        length = len(line.encode("utf-8")) + 1
+        if i > 0:
+            __add_range(keys, line.partition(",")[0], offset, offset + length)
+        offset += length
+    return keys
+
+
+def build_index_from_file(filename: str) -> dict[str, list[list[int]]]:
+    """Compute Key -> byte ranges by scanning an existing CSV file once"""
+    keys = {}
+    offset = 0
+    with open(filename, "rb") as f:
+        header = f.readline()
+        offset += len(header)
+        for raw_line in f:
+            key = raw_line.partition(b",")[0].rstrip(b"\r\n").decode("utf-8")
+            __add_range(keys, key, offset, offset + len(raw_line))
+            offset += len(raw_line)
+    return keys
+
+
+def write_index(filename: str, keys: dict[str, list[list[int]]]):
+    """Write the sidecar index of a CSV file, stamped with the file's current size and mtime"""
+    stat = os.stat(filename)
+    data = {"version": INDEX_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "keys": keys}
+    with atomic_write(index_path(filename)) as f:
+        # One write of the serialised index instead of json.dump's many small ones
+        f.write(json.dumps(data, separators=(",", ":")))
+    _index_cache[filename] = (stat.st_size, stat.st_mtime_ns, keys)
+
+
+def load_index(filename: str):
+    """Return Key -> byte ranges if the sidecar index matches the CSV file, else None"""
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    cached = _index_cache.get(filename)
+    if cached is not None and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        return cached[2]
+    try:
+        with open(index_path(filename), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != INDEX_VERSION or data.get("size") != stat.st_size or \
+            data.get("mtime_ns") != stat.st_mtime_ns:
+        return None
+    _index_cache[filename] = (stat.st_size, stat.st_mtime_ns, data["keys"])
+    return data["keys"]
+
+
+def read_header(filename: str) -> str:
+    """Read the header line of a CSV file"""
+    with open(filename, "r", encoding="utf-8") as f:
+        return f.readline().rstrip("\r\n")
+
+
+def read_rows_for_key(filename: str, key: str, rebuild: bool = True) -> list[str]:
+    """
+    Return the data lines of one Key using the sidecar index and mmap.
+    A missing or stale index is rebuilt from the file when rebuild is True,
+    otherwise None is returned so the caller can fall back to a full read.
+    """
+    if not os.path.exists(filename):
+        return []
+    keys = load_index(filename)
+    if keys is None:
+        if not rebuild:
+            return None
+        keys = build_index_from_file(filename)
+        write_index(filename, keys)
+    ranges = keys.get(key)
+    if not ranges:
+        return []
+    with open(filename, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        chunk = b"".join(mapped[start:end] for start, end in ranges)
+    return chunk.decode("utf-8").splitlines()
+
+
+def replace_rows_for_key(filename: str, key: str, new_lines: list[str]) -> bool:
+    """
+    Replace a Key's rows in place using the sidecar index: the file is rebuilt from the
+    byte slices around the Key's ranges and the new lines are appended at the end.
+    Returns False (and changes nothing) if there is no valid index. The caller holds the
+    file's lock (see file_lock.locked).
+    """
+    keys = load_index(filename)
+    if keys is None:
+        return False
+    # The cached index is edited in place below; drop it so a failure forces a reload
+    _index_cache.pop(filename, None)
+
+    removed = sorted(keys.pop(key, []))
+    with open(filename, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return False
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            pieces = []
+            position = 0
+            for start, end in removed:
+                pieces.append(mapped[position:start])
+                position = end
+            pieces.append(mapped[position:])
+    new_data = "".join(line + "\n" for line in new_lines).encode("utf-8")
+
+    # Shift the remaining ranges left by the bytes removed before them
+    for ranges in keys.values():
+        for byte_range in ranges:
+            shift = sum(end - start for start, end in removed if end <= byte_range[0])
+            byte_range[0] -= shift
+            byte_range[1] -= shift
+    offset = size - sum(end - start for start, end in removed)
+    for line in new_lines:
+        length = len(line.encode("utf-8")) + 1
+        __add_range(keys, key, offset, offset + length)
+        offset += length
+
+    with atomic_write(filename, "wb") as f:
+        f.writelines(pieces)
+        f.write(new_data)
+    write_index(filename, keys)
+    return True
+
+
+def __add_range(keys: dict, key: str, start: int, end: int):
+    """Append a byte range to a Key, merging it with the previous range when adjacent"""
+    ranges = keys.setdefault(key, [])
+    if ranges and ranges[-1][1] == start:
+        ranges[-1][1] = end
+    else:
+        ranges.append([start, end])
@@ -5,22 +5,50 @@ This module handles CSV-specific file operations like reading, writing, and merg
 
 import os
 import csv
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
+import instrumentation
+
+from .related_heroes_graph import RelatedHeroesGraph
+from .csv_index import build_index_from_lines, replace_rows_for_key, write_index
+from .skill_index import record_hero_skills
+from .file_lock import locked, atomic_write, file_signature
+
+# Keep a <table>.csv.idx byte-offset index next to every hero skill table
+WRITE_SIDECAR_INDEXES = True
+
 # Cache for file existence checks to reduce filesystem calls
 _file_exists_cache = {}
+_file_exists_lock = threading.Lock()
 
 
 def _file_exists_cached(filename: str) -> bool:
     """Check if file exists with caching to reduce filesystem calls"""
-    if filename not in _file_exists_cache:
-        _file_exists_cache[filename] = os.path.exists(filename)
-    return _file_exists_cache[filename]
+    with _file_exists_lock:
+        exists = _file_exists_cache.get(filename)
+        if exists is None:
+            exists = _file_exists_cache[filename] = os.path.exists(filename)
+        return exists
 
 
 def _invalidate_file_cache(filename: str):
     """Invalidate cache entry when file is modified"""
-    _file_exists_cache.pop(filename, None)
+    with _file_exists_lock:
+        _file_exists_cache.pop(filename, None)
+
+
+@contextmanager
+def _locked_file(filename: str):
+    """Hold a file's lock for a read-modify-write; another process may have created it meanwhile"""
+    with locked(filename):
+        _invalidate_file_cache(filename)
+        yield
+
+
+# Related heroes graphs kept warm between heroes: filename -> (graph, signature)
+_related_heroes_graphs = {}
 
 
 def get_first_field(csv_line: str) -> str:
@@ -44,68 +72,68 @@ def read_lines_excluding_id(filename: str, hero_id: str) -> list:
 
 
 def write_lines_to_file(filename: str, lines: list):
-    """Write lines to a file efficiently"""
-    if not lines:
-        # Create empty file if no lines
-        with open(filename, "w", encoding="utf-8") as f:
-            pass
-    else:
-        # Use join for more efficient writing - single I/O operation
-        with open(filename, "w", encoding="utf-8") as f:
+    """Write lines to a file efficiently (atomic replace, under the file's lock)"""
+    # "\n" on every platform: the sidecar indexes count one byte per line ending
+    with locked(filename), atomic_write(filename, newline="\n") as f:
+        if lines:
+            # Use join for more efficient writing - single I/O operation
             f.write("\n".join(lines) + "\n")
     
     # Invalidate cache since file was modified
     _invalidate_file_cache(filename)
 
 
+@instrumentation.timed("csv_write:related_heroes")
 def related_heroes_csv_to_file(csv_line: str, filename="related_heroes.csv"):
     """Save related heroes CSV line to file"""
-    # Extract hero_id from the CSV line (first field)
-    hero_id = get_first_field(csv_line)
-    
-    # Read existing lines and filter out lines that contain either the hero_id or icon_name
-    if _file_exists_cached(filename):
-        with open(filename, "r", encoding="utf-8") as f:
-            lines = f.read().splitlines()
-        # Use list comprehension for better performance
-        filtered_lines = [line for line in lines if hero_id not in line]
-    else:
-        filtered_lines = []
-    
-    filtered_lines.append(csv_line)
-    write_lines_to_file(filename, filtered_lines)
+    with _locked_file(filename):
+        # The cached graph is reloaded if another process changed the file
+        graph = _get_related_heroes_graph(filename)
+        # O(1) upsert keyed by the row's first field (the hero Key)
+        graph.upsert_csv_line(csv_line)
+        write_lines_to_file(filename, graph.to_csv_lines())
+        _related_heroes_graphs[filename] = (graph, file_signature(filename))
+
 
+def _get_related_heroes_graph(filename: str) -> RelatedHeroesGraph:
+    """Return the cached related heroes graph, reloading it if the file changed"""
+    cached = _related_heroes_graphs.get(filename)
+    signature = file_signature(filename)
+    if cached is None or cached[1] != signature:
+        info_path = os.path.join(os.path.dirname(filename), "info.csv")
+        cached = (RelatedHeroesGraph.from_csv(filename, info_path), signature)
+        _related_heroes_graphs[filename] = cached
+    return cached[0]
 
+
+@instrumentation.timed("csv_write:info")
 def info_dict_to_csv(info_dict, info_path):
     """Convert info dictionary to CSV and merge with existing data using atomic operations"""
-    import tempfile
-    import shutil
-    
-    # Read existing data first
-    header, data_lines = read_csv_header_and_lines(info_path)
-    fields = list(info_dict.keys())
-    merged_header = list(header)
-    for field in fields:
-        if field not in merged_header:
-            merged_header.append(field)
-    value_line = [str(info_dict.get(field, "")) for field in merged_header]
-    
     # Use Key field (which now contains the icon name)
     key_field = "Key"
     new_key = info_dict.get(key_field, "")
-    
-    # Create temporary file in the same directory as target file
-    temp_dir = os.path.dirname(info_path) if os.path.dirname(info_path) else "."
-    temp_fd, temp_path = tempfile.mkstemp(suffix='.csv', dir=temp_dir)
-    
-    try:
-        with os.fdopen(temp_fd, "w", encoding="utf-8", newline="") as f:
+
+    with _locked_file(info_path), atomic_write(info_path, newline="") as f:
+        # Stream the existing rows instead of loading the whole file
+        # (closed before the temporary file replaces it)
+        source = open(info_path, "r", encoding="utf-8", newline="") if _file_exists_cached(info_path) else None
+        try:
+            reader = csv.reader(source) if source is not None else iter(())
+            header = next(reader, [])
+            merged_header = list(header)
+            for field in info_dict.keys():
+                if field not in merged_header:
+                    merged_header.append(field)
+            value_line = [str(info_dict.get(field, "")) for field in merged_header]
+
             writer = csv.writer(f)
             writer.writerow(merged_header)
             found = False
             
             # Write existing data, replacing if key matches
-            for row in data_lines:
+            for row in reader:
+                if not row:
+                    continue
                 row_dict = dict(zip(header, row))
                 if row_dict.get(key_field, "") == new_key:
                     writer.writerow(value_line)
@@ -113,28 +141,26 @@ def info_dict_to_csv(info_dict, info_path):
                 else:
                     padded_row = [row_dict.get(field, "") for field in merged_header]
                     writer.writerow(padded_row)
-            
-            # Add new hero if not found in existing data
-            if not found:
-                writer.writerow(value_line)
-        
-        # Atomic move: replace original file only after successful write
-        shutil.move(temp_path, info_path)
+        finally:
+            if source is not None:
+                source.close()
         
-        # Invalidate cache since file was modified
-        _invalidate_file_cache(info_path)
-        
-    except Exception as e:
-        # Clean up temp file if something goes wrong
-        try:
-            os.unlink(temp_path)
-        except OSError:
-            pass
-        raise e
+        # Add new hero if not found in existing data
+        if not found:
+            writer.writerow(value_line)
+
+    # Invalidate cache since file was modified
+    _invalidate_file_cache(info_path)
 
 
+@instrumentation.timed("csv_write:skills_catalog")
 def csv_to_file(header, lines, filename, key_field):
     """Save CSV data to file with key-based deduplication"""
+    with _locked_file(filename):
+        __csv_to_file(header, lines, filename, key_field)
+
+
+def __csv_to_file(header, lines, filename, key_field):
     existing_map = {}
     if _file_exists_cached(filename):
         with open(filename, "r", encoding="utf-8") as f:
@@ -203,6 +229,7 @@ def get_field_value(header, line, field_name):
     return values[index] if len(values) > index else None
 
 
+@instrumentation.timed("csv_write:hero_skills")
 def hero_skills_to_file(header, lines, filename, key_field):
     """Save hero skills CSV data to file with proper hero-based replacement
     
@@ -210,12 +237,11 @@ def hero_skills_to_file(header, lines, filename, key_field):
     1. Remove all existing entries for the specific hero (by key_field)
     2. Add all new entries for that hero
     """
-    # Read existing data
-    existing_lines = []
-    if _file_exists_cached(filename):
-        with open(filename, "r", encoding="utf-8") as f:
-            existing_lines = f.read().splitlines()
-    
+    with _locked_file(filename):
+        __hero_skills_to_file(header, lines, filename, key_field)
+
+
+def __hero_skills_to_file(header, lines, filename, key_field):
     # Ensure header is a string
     if isinstance(header, list):
         header = ",".join(header)
@@ -225,6 +251,21 @@ def hero_skills_to_file(header, lines, filename, key_field):
     if lines and len(lines) > 1:  # Skip header
         hero_key = get_field_value(header, lines[1], key_field)
     
+    new_lines = [",".join(line) if isinstance(line, list) else line for line in lines[1:]]
+
+    # Fast path: splice the hero's rows using the sidecar byte-offset index
+    if WRITE_SIDECAR_INDEXES and hero_key is not None and get_field_index(header, key_field) == 0:
+        if _file_exists_cached(filename) and replace_rows_for_key(filename, hero_key, new_lines):
+            _invalidate_file_cache(filename)
+            record_hero_skills(filename, hero_key, header, new_lines)
+            return
+    
+    # Read existing data
+    existing_lines = []
+    if _file_exists_cached(filename):
+        with open(filename, "r", encoding="utf-8") as f:
+            existing_lines = f.read().splitlines()
+    
     # Filter out existing entries for this hero, but keep other heroes' data
     filtered_lines = []
     if existing_lines:
@@ -246,10 +287,11 @@ def hero_skills_to_file(header, lines, filename, key_field):
         filtered_lines.append(header)
     
     # Add all new data for this hero
-    for line in lines[1:]:  # Skip header in new data
-        if isinstance(line, list):
-            line = ",".join(line)
-        filtered_lines.append(line)
+    filtered_lines.extend(new_lines)
     
     # Write all data back to file efficiently
     write_lines_to_file(filename, filtered_lines)
+    if WRITE_SIDECAR_INDEXES and get_field_index(header, key_field) == 0:
+        write_index(filename, build_index_from_lines(filtered_lines))
+    if hero_key is not None:
+        record_hero_skills(filename, hero_key, header, new_lines)
@@ -0,0 +1,154 @@
+"""
+File Locks - Advisory per-file locks and atomic writes
+This module lets several threads and processes (overlapping runs, shards on a shared disk)
+write to the same database safely: each database file has its own advisory lock, held
+around the whole read-modify-write of that file, and every write goes to a temporary file
+that atomically replaces the original, so readers never see a half-written file. The
+(mtime, size) signature of a file tells the caches built from it whether it changed.
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+import instrumentation
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+# Seconds between two attempts where the platform has no blocking lock (Windows)
+RETRY_INTERVAL = 0.01
+
+
+class _FileLock:
+    """Lock of one file: reentrant for the thread holding it, exclusive across threads and processes"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.thread_lock = threading.RLock()
+        self.depth = 0
+        self.handle = None
+
+    def acquire(self):
+        start = time.perf_counter()
+        contended = not self.thread_lock.acquire(blocking=False)
+        if contended:
+            self.thread_lock.acquire()
+        if self.depth == 0:
+            try:
+                contended = self.__lock_file() or contended
+            except BaseException:
+                self.thread_lock.release()
+                raise
+            instrumentation.METRICS.record("lock_wait", time.perf_counter() - start)
+            if contended:
+                instrumentation.count("lock_contended")
+        self.depth += 1
+
+    def release(self):
+        self.depth -= 1
+        if self.depth == 0:
+            self.__unlock_file()
+        self.thread_lock.release()
+
+    def __lock_file(self) -> bool:
+        """Take the OS lock; returns whether another holder had to be waited for"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.handle = open(self.path, "a+b")
+        if fcntl is not None:
+            try:
+                fcntl.flock(self.handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return False
+            except OSError:
+                fcntl.flock(self.handle.fileno(), fcntl.LOCK_EX)
+                return True
+        if msvcrt is not None:
+            contended = False
+            while True:
+                try:
+                    self.handle.seek(0)
+                    msvcrt.locking(self.handle.fileno(), msvcrt.LK_NBLCK, 1)
+                    return contended
+                except OSError:
+                    contended = True
+                    time.sleep(RETRY_INTERVAL)
+        return False
+
+    def __unlock_file(self):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self.handle.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                self.handle.seek(0)
+                msvcrt.locking(self.handle.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self.handle.close()
+            self.handle = None
+
+
+# Lock file path -> _FileLock shared by the threads of this process
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def lock_path(filename: str) -> str:
+    """Lock file of a database file: a hidden .<name>.lock next to it (never replaced, unlike the file)"""
+    folder, name = os.path.split(os.path.abspath(filename))
+    return os.path.join(folder, f".{name}.lock")
+
+
+@contextmanager
+def locked(filename: str):
+    """Hold the advisory lock of a database file for the block (time waited recorded as "lock_wait")"""
+    path = lock_path(filename)
+    with _locks_guard:
+        file_lock = _locks.get(path)
+        if file_lock is None:
+            file_lock = _locks[path] = _FileLock(path)
+    file_lock.acquire()
+    try:
+        yield
+    finally:
+        file_lock.release()
+
+
+def file_signature(path: str):
+    """Return (mtime_ns, size) of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+@contextmanager
+def atomic_write(filename: str, mode: str = "w", encoding: str = "utf-8", newline: str = None):
+    """
+    Open a temporary file next to filename for writing; it replaces filename when the block
+    ends without error and is removed otherwise.
+    """
+    folder = os.path.dirname(filename) or "."
+    os.makedirs(folder, exist_ok=True)
+    # Unique per process and thread; opened like any other file so the umask applies (unlike mkstemp)
+    temp_path = os.path.join(folder, f".{os.path.basename(filename)}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        if "b" in mode:
+            f = open(temp_path, mode)
+        else:
+            f = open(temp_path, mode, encoding=encoding, newline=newline)
+        with f:
+            yield f
+        os.replace(temp_path, filename)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
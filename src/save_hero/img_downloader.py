@@ -1,5 +1,7 @@
 import os
-import requests
+import instrumentation
+
+from .file_lock import atomic_write
 
 
 def download_hero_icon(icon_url: str,database_folder:str):
@@ -12,12 +14,17 @@ def download_hero_icon(icon_url: str,database_folder:str):
 
 def download_image(url, filename):
     """Download an image from URL and save it to filename"""
+    import requests
     try:
         os.makedirs(os.path.dirname(filename), exist_ok=True)
-        response = requests.get(url, timeout=30)
+        with instrumentation.stage("image_download"):
+            response = requests.get(url, timeout=30)
+        instrumentation.count("images_downloaded")
+        instrumentation.count("image_bytes_received", len(response.content))
         
         if response.status_code == 200 and len(response.content) > 0:
-            with open(filename, 'wb') as file:
+            # Atomic replace: an interrupted or concurrent download never leaves a truncated image
+            with atomic_write(filename, 'wb') as file:
                 file.write(response.content)
             return True
         return False
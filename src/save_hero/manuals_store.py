@@ -0,0 +1,162 @@
+"""
+Manuals Store - Combat manuals keyed by caption and row
+This module keeps manuals.csv as a single table with one header, each row keyed by the caption
+of its manual and its position in that manual, and manuals_index.json mapping every hero id to
+the captions of the manuals listing that hero. A save diffs the new rows against the stored ones
+and rewrites the files only when something changed, so runs that find the same manuals leave
+them (and their mtime) untouched.
+"""
+
+import io
+import os
+import csv
+import json
+
+import instrumentation
+
+from .file_lock import locked, atomic_write
+
+MANUALS_FILE_NAME = "manuals.csv"
+INDEX_FILE_NAME = "manuals_index.json"
+
+# Last column of every manual table: the ids of the heroes it lists, comma-separated
+HEROES_FIELD = "Heroes"
+
+
+def manual_rows(manuals: list[dict]) -> tuple[list[str], dict]:
+    """Header and {(caption, row): {field: value}} of the manuals collected by the bootstrap"""
+    header, rows = ["Caption"], {}
+    for manual_group in manuals:
+        __parse_records(csv.reader(io.StringIO(manual_group["manual_data"])), header, rows)
+    return __close_header(header), rows
+
+
+def read_manual_rows(filename: str) -> tuple[list[str], dict]:
+    """Header and rows of a manuals.csv (older files repeat a Caption header per manual)"""
+    header, rows = ["Caption"], {}
+    if os.path.exists(filename):
+        with open(filename, "r", encoding="utf-8", newline="") as f:
+            __parse_records(csv.reader(f), header, rows)
+    return __close_header(header), rows
+
+
+def manuals_index(rows: dict) -> dict[str, list[str]]:
+    """Hero id -> captions of the manuals listing the hero, in manual order"""
+    index = {}
+    for (caption, _), row in rows.items():
+        for hero_id in row.get(HEROES_FIELD, "").split(","):
+            hero_id = hero_id.strip()
+            if hero_id:
+                captions = index.setdefault(hero_id, [])
+                if caption not in captions:
+                    captions.append(caption)
+    return dict(sorted(index.items()))
+
+
+@instrumentation.timed("csv_write:manuals")
+def save_manuals(manuals: list[dict], folder_path: str, replace: bool = False) -> dict:
+    """
+    Save the manuals collected by the bootstrap: their rows replace the stored rows of the same
+    caption and position, and with replace the manuals missing from the listing are dropped.
+    Returns the rows added, removed and changed, and whether the files were written.
+    """
+    header, rows = manual_rows(manuals)
+    return __store(header, rows, folder_path, replace)
+
+
+def import_manuals(filename: str, folder_path: str) -> dict:
+    """Replace the manuals of folder_path with the ones of another manuals.csv (e.g. a shard fragment)"""
+    header, rows = read_manual_rows(filename)
+    return __store(header, rows, folder_path, replace=True)
+
+
+def __store(header: list[str], rows: dict, folder_path: str, replace: bool) -> dict:
+    os.makedirs(folder_path, exist_ok=True)
+    filename = os.path.join(folder_path, MANUALS_FILE_NAME)
+    index_filename = os.path.join(folder_path, INDEX_FILE_NAME)
+
+    with locked(filename):
+        existing = ""
+        if os.path.exists(filename):
+            with open(filename, "r", encoding="utf-8", newline="") as f:
+                existing = f.read()
+        old_header, old_rows = read_manual_rows(filename)
+
+        if not replace:
+            merged = dict(old_rows)
+            merged.update(rows)
+            rows = merged
+            header = __close_header(old_header[:-1] + [field for field in header if field not in old_header])
+
+        def values(row):
+            return [row.get(field, "") for field in header]
+
+        summary = {
+            "rows": len(rows),
+            "added": sum(1 for key in rows if key not in old_rows),
+            "removed": sum(1 for key in old_rows if key not in rows),
+            "changed": sum(1 for key, row in rows.items() if key in old_rows and values(old_rows[key]) != values(row)),
+            "written": False,
+        }
+
+        content = __render(header, rows)
+        if content != existing:
+            with atomic_write(filename, newline="") as f:
+                f.write(content)
+            summary["written"] = True
+
+        index = json.dumps(manuals_index(rows), ensure_ascii=False, indent=1)
+        existing_index = None
+        if os.path.exists(index_filename):
+            with open(index_filename, "r", encoding="utf-8") as f:
+                existing_index = f.read()
+        if index != existing_index:
+            with atomic_write(index_filename) as f:
+                f.write(index)
+    return summary
+
+
+def __parse_records(records, header: list[str], rows: dict):
+    """
+    Add the rows of CSV records to rows, keyed by (caption, position in the manual). A record
+    starting with "Caption" is the header of the rows after it; the last field of a row is
+    always its hero ids, whatever its header calls it.
+    """
+    group_header = None
+    positions = {}
+    for key in rows:
+        positions[key[0]] = max(positions.get(key[0], 0), key[1] + 1)
+    for values in records:
+        if not values:
+            continue
+        if values[0] == "Caption":
+            group_header = values
+            for field in values[1:-1]:
+                if field not in header:
+                    header.append(field)
+            continue
+        if group_header is None or len(values) < 2:
+            continue
+        caption = values[0]
+        row = {"Caption": caption}
+        row.update(zip(group_header[1:-1], values[1:-1]))
+        row[HEROES_FIELD] = values[-1]
+        position = positions.get(caption, 0)
+        positions[caption] = position + 1
+        rows[(caption, position)] = row
+
+
+def __close_header(header: list[str]) -> list[str]:
+    """The header with the hero ids column last (and only once)"""
+    return [field for field in header if field != HEROES_FIELD] + [HEROES_FIELD]
+
+
+def __render(header: list[str], rows: dict) -> str:
+    if not rows:
+        return ""
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(header)
+    for row in rows.values():
+        writer.writerow([row.get(field, "") for field in header])
+    return out.getvalue()
@@ -0,0 +1,139 @@
+"""
+Related Heroes Graph - Adjacency store for related heroes
+This module keeps related heroes as an adjacency map keyed by hero Key,
+so rows can be upserted without rescanning related_heroes.csv and alts of
+a character can be looked up through precomputed connected components.
+"""
+
+import os
+import csv
+
+
+class RelatedHeroesGraph:
+    """Adjacency store of related heroes keyed by hero Key"""
+
+    def __init__(self, character_names: dict[str, str] = None):
+        # Key -> related Keys, in the order they appear on the hero page
+        self._adjacency = {}
+        # Key -> Keys whose row lists it (reverse edges)
+        self._incoming = {}
+        # Key -> character name (from info.csv when available)
+        self._character_names = dict(character_names or {})
+        # Lazily rebuilt after upserts: Key -> component, name -> components
+        self._components = None
+        self._characters = None
+
+    @classmethod
+    def from_csv(cls, filename: str, info_path: str = None) -> "RelatedHeroesGraph":
+        """Load a graph from a related_heroes.csv file (and names from info.csv)"""
+        graph = cls(read_character_names(info_path) if info_path else None)
+        if os.path.exists(filename):
+            with open(filename, "r", encoding="utf-8") as f:
+                for line in f:
+                    graph.upsert_csv_line(line.rstrip("\n"))
+        return graph
+
+    def __len__(self):
+        return len(self._adjacency)
+
+    def __contains__(self, hero_key):
+        return hero_key in self._adjacency
+
+    def upsert(self, hero_key: str, related_keys: list[str]):
+        """Insert or replace the related heroes row of a hero"""
+        if not hero_key:
+            return
+        # Rows are kept verbatim (including self references) for CSV export
+        related_keys = [key for key in related_keys if key]
+        for old_key in self._adjacency.get(hero_key, ()):
+            incoming = self._incoming.get(old_key)
+            if incoming is not None:
+                incoming.discard(hero_key)
+        self._adjacency[hero_key] = related_keys
+        for related_key in related_keys:
+            if related_key != hero_key:
+                self._incoming.setdefault(related_key, set()).add(hero_key)
+        self._components = None
+        self._characters = None
+
+    def upsert_csv_line(self, csv_line: str):
+        """Insert or replace a row given as a related_heroes.csv line"""
+        fields = [field.strip() for field in csv_line.split(",")]
+        if fields and fields[0]:
+            self.upsert(fields[0], fields[1:])
+
+    def set_character_name(self, hero_key: str, name: str):
+        """Record the character name of a hero for alts_of() lookups"""
+        if name and self._character_names.get(hero_key) != name:
+            self._character_names[hero_key] = name
+            self._characters = None
+
+    def related(self, hero_key: str) -> list[str]:
+        """Return the heroes related to a hero, its own row first"""
+        related_keys = [key for key in self._adjacency.get(hero_key, ()) if key != hero_key]
+        seen = set(related_keys)
+        for key in sorted(self._incoming.get(hero_key, ())):
+            if key not in seen:
+                related_keys.append(key)
+        return related_keys
+
+    def alts_of(self, character: str) -> list[str]:
+        """Return every alt of a character, given a hero Key or a character name"""
+        self.__ensure_components()
+        if character in self._components:
+            return list(self._components[character])
+        alts = set()
+        for component in self._characters.get(character, ()):
+            alts.update(component)
+        return sorted(alts)
+
+    def components(self) -> list[tuple[str, ...]]:
+        """Return all connected components (one per character family)"""
+        self.__ensure_components()
+        unique = {id(component): component for component in self._components.values()}
+        return sorted(unique.values())
+
+    def to_csv_lines(self) -> list[str]:
+        """Export the graph as related_heroes.csv lines"""
+        return [",".join([hero_key] + related_keys) for hero_key, related_keys in self._adjacency.items()]
+
+    def __ensure_components(self):
+        """Rebuild components and the character name index after upserts"""
+        if self._components is None:
+            self._components = {}
+            for start_key in self._adjacency:
+                if start_key in self._components:
+                    continue
+                members = {start_key}
+                stack = [start_key]
+                while stack:
+                    key = stack.pop()
+                    for neighbour in self._adjacency.get(key, ()):
+                        if neighbour not in members:
+                            members.add(neighbour)
+                            stack.append(neighbour)
+                    for neighbour in self._incoming.get(key, ()):
+                        if neighbour not in members:
+                            members.add(neighbour)
+                            stack.append(neighbour)
+                component = tuple(sorted(members))
+                for key in component:
+                    self._components[key] = component
+        if self._characters is None:
+            self._characters = {}
+            for key, component in self._components.items():
+                name = self._character_names.get(key) or key.split("_")[0]
+                components = self._characters.setdefault(name, [])
+                if component not in components:
+                    components.append(component)
+
+
+def read_character_names(info_path: str) -> dict[str, str]:
+    """Read the Key -> Name mapping from info.csv"""
+    names = {}
+    if info_path and os.path.exists(info_path):
+        with open(info_path, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                if row.get("Key") and row.get("Name"):
+                    names[row["Key"]] = row["Name"]
+    return names
@@ -0,0 +1,65 @@
+"""
+Shard Merge - Combine database fragments into the canonical database
+This module merges the fragments written by --shard runs into the database folder through a
+StreamingStore: every table is merge-joined with the fragments in one streaming pass, rows of
+a fragment replace the rows of the same keys, and when several fragments hold the same key the
+most recently written fragment wins. Done-lists are unioned and images copied over.
+"""
+
+import os
+import shutil
+
+from .streaming_store import StreamingStore, DEFAULT_BUFFER_BYTES
+from .file_lock import atomic_write
+from .manuals_store import import_manuals
+
+# Image folders copied from the fragments
+IMAGE_FOLDERS = ("icons", "portraits")
+
+
+def fragment_order(fragment_paths: list[str]) -> list[str]:
+    """Oldest fragment first, by the time its last hero was saved (newest done-list)"""
+    def saved_at(fragment_path):
+        done_lists = [os.path.join(fragment_path, name) for name in os.listdir(fragment_path) if name.endswith(".txt")]
+        return max((os.path.getmtime(path) for path in done_lists), default=os.path.getmtime(fragment_path))
+    return sorted(fragment_paths, key=lambda path: (saved_at(path), path))
+
+
+def merge_fragments(folder_path: str, fragment_paths: list[str], buffer_bytes: int = DEFAULT_BUFFER_BYTES) -> dict:
+    """
+    Merge database fragments into folder_path; fragments later in the list win conflicts
+    (see fragment_order). Returns the rows written per file, the conflicting keys per file
+    and the number of images copied.
+    """
+    store = StreamingStore(folder_path, buffer_bytes)
+    try:
+        for fragment_path in fragment_paths:
+            store.add_fragment(fragment_path)
+    finally:
+        rows = store.close()
+
+    images = 0
+    for fragment_path in fragment_paths:
+        for image_folder in IMAGE_FOLDERS:
+            images += __copy_tree(os.path.join(fragment_path, image_folder), os.path.join(folder_path, image_folder))
+
+    # Manuals are the same listing in every shard: keep the most recent copy
+    manuals = [os.path.join(path, "manuals.csv") for path in fragment_paths
+               if os.path.exists(os.path.join(path, "manuals.csv"))]
+    if manuals:
+        import_manuals(manuals[-1], folder_path)
+
+    return {"fragments": list(fragment_paths), "rows": rows, "conflicts": store.conflicts, "images": images}
+
+
+def __copy_tree(source: str, destination: str) -> int:
+    """Copy every file of source into destination (overwriting); returns the number of files"""
+    copied = 0
+    for root, _, names in os.walk(source):
+        target = os.path.join(destination, os.path.relpath(root, source))
+        os.makedirs(target, exist_ok=True)
+        for name in names:
+            with open(os.path.join(root, name), "rb") as image, atomic_write(os.path.join(target, name), "wb") as f:
+                shutil.copyfileobj(image, f)
+            copied += 1
+    return copied
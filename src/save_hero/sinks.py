@@ -0,0 +1,178 @@
+"""
+Output Sinks - Destinations of converted heroes
+This module defines where the data produced by hero_table_to_csv_data goes: CsvSink keeps the
+database folder layout (directly, or through a StreamingStore), NdjsonSink streams one JSON
+record per hero to stdout, a file or a FIFO as soon as the hero is converted, and MultiSink
+sends every hero to several sinks, so a run can feed an ingestion job while saving the CSVs.
+"""
+
+import io
+import csv
+import sys
+import json
+import threading
+
+import instrumentation
+
+from .core_saver import write_hero_csv_data, save_hero_images, save_refines, REFINE_HEADER
+from .skill_index import flush_skill_indexes
+
+
+class OutputSink:
+    """Base class: receives converted heroes and refine rows"""
+
+    def write_hero(self, hero_info: dict, hero_csv_data: dict, portraits: dict = None):
+        """A converted hero; portraits are the images to download (None when not downloaded here)"""
+        raise NotImplementedError
+
+    def write_refines(self, refines: list[dict]):
+        """Refine listing entries saved in bulk (see save_refines)"""
+        raise NotImplementedError
+
+    def flush(self):
+        """Persist what is kept in memory between heroes (called after each category or cycle)"""
+        pass
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CsvSink(OutputSink):
+    """The database folder layout: CSV tables, catalogs and done-lists"""
+
+    def __init__(self, folder_path: str, store=None):
+        # Rows go through the StreamingStore when given (written when the store closes)
+        self.folder_path = store.folder_path if store is not None else folder_path
+        self.store = store
+
+    def write_hero(self, hero_info: dict, hero_csv_data: dict, portraits: dict = None):
+        if self.store is None:
+            # Images are downloaded before the hero is marked done
+            write_hero_csv_data(hero_info, hero_csv_data, portraits, self.folder_path,
+                                download_images=portraits is not None)
+            return
+        self.store.add_hero(hero_info, hero_csv_data)
+        if portraits is not None:
+            save_hero_images(hero_info, portraits, self.folder_path)
+
+    def write_refines(self, refines: list[dict]):
+        if self.store is not None:
+            self.store.add_refines(refines)
+        else:
+            save_refines(refines, self.folder_path)
+
+    def flush(self):
+        # The skill index is updated in memory on every hero, written here once per batch
+        flush_skill_indexes()
+
+
+class NdjsonSink(OutputSink):
+    """
+    One JSON line per hero (and per refine), flushed right away. target is "-" for stdout, a
+    path (a FIFO blocks on open until a reader opens it) or an open text stream. If the reader
+    goes away, the sink stops writing and the run carries on with the other sinks.
+    """
+
+    def __init__(self, target="-"):
+        if target == "-":
+            self.stream, self._owned = sys.stdout, False
+        elif isinstance(target, str):
+            self.stream, self._owned = open(target, "w", encoding="utf-8", newline="\n"), True
+        else:
+            self.stream, self._owned = target, False
+        self.records = 0
+        self.broken = False
+        self._lock = threading.Lock()
+
+    def write_hero(self, hero_info: dict, hero_csv_data: dict, portraits: dict = None):
+        self.__emit(hero_record(hero_info, hero_csv_data))
+
+    def write_refines(self, refines: list[dict]):
+        for refine in refines:
+            self.__emit(refine_record(refine))
+
+    def close(self):
+        with self._lock:
+            if not self.broken:
+                try:
+                    self.stream.flush()
+                except (BrokenPipeError, OSError):
+                    self.broken = True
+            if self._owned:
+                try:
+                    self.stream.close()
+                except (BrokenPipeError, OSError):
+                    pass
+
+    def __emit(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self.broken:
+                return
+            try:
+                self.stream.write(line)
+                self.stream.flush()
+            except (BrokenPipeError, OSError) as e:
+                self.broken = True
+                print(f"\nNDJSON output closed ({e}), no more records written to it", file=sys.stderr)
+                return
+            self.records += 1
+        instrumentation.count("ndjson_records")
+
+
+class MultiSink(OutputSink):
+    """Send every hero to each sink, in order"""
+
+    def __init__(self, sinks: list[OutputSink]):
+        self.sinks = list(sinks)
+
+    def write_hero(self, hero_info: dict, hero_csv_data: dict, portraits: dict = None):
+        for sink in self.sinks:
+            sink.write_hero(hero_info, hero_csv_data, portraits)
+
+    def write_refines(self, refines: list[dict]):
+        for sink in self.sinks:
+            sink.write_refines(refines)
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+def hero_record(hero_info: dict, hero_csv_data: dict) -> dict:
+    """The NDJSON record of a converted hero: info, related heroes, skill rows and catalog rows"""
+    info = hero_csv_data["Info"]
+    related = next(csv.reader([hero_csv_data["Related Heroes"]]), []) if hero_csv_data.get("Related Heroes") else []
+    return {
+        "type": "hero",
+        "run": instrumentation.METRICS.run_id,
+        "hero_id": hero_info["hero_id"],
+        "category": hero_info["category"],
+        "key": info.get("Key", hero_info["hero_id"]),
+        "info": info,
+        "related": related[1:],
+        "skills": {table_name: _csv_dicts(lines) for table_name, lines in hero_csv_data["Hero Skills"].items() if lines},
+        "catalog": {skill_type: _csv_dicts(lines) for skill_type, lines in hero_csv_data["Skills"].items() if lines},
+    }
+
+
+def refine_record(refine: dict) -> dict:
+    """The NDJSON record of a refine listing entry (a skills/skill_refines.csv row)"""
+    rows = _csv_dicts([REFINE_HEADER, refine["refine_data"]])
+    return {"type": "refine", "run": instrumentation.METRICS.run_id, "hero_id": refine["hero_id"],
+            "row": rows[0] if rows else {}}
+
+
+def _csv_dicts(lines: list[str]) -> list[dict]:
+    """Rows of a header line followed by CSV data lines (values may span several lines)"""
+    return list(csv.DictReader(io.StringIO("\n".join(lines))))
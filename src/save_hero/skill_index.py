@@ -0,0 +1,309 @@
+"""
+Skill Index - Inverted index from skill Name to the heroes that learn it
+This module keeps skill_index.json next to the hero skill tables. It is updated
+incrementally by hero_skills_to_file and answers exact, prefix and trigram fuzzy
+queries on skill and hero names.
+"""
+
+import os
+import csv
+import json
+import bisect
+
+from .file_lock import locked, atomic_write, file_signature
+
+INDEX_FILE_NAME = "skill_index.json"
+
+# Indexes kept warm between heroes: folder -> SkillIndex
+_skill_indexes = {}
+
+# Files in the database folder that are not hero skill tables
+NON_SKILL_TABLES = {"info.csv", "related_heroes.csv", "manuals.csv"}
+
+
+class SkillIndex:
+    """Inverted index: skill Name -> [(hero Key, table, Default, Unlock), ...]"""
+
+    def __init__(self, folder_path: str):
+        self.folder_path = folder_path
+        # skill Name -> [[hero Key, table, Default, Unlock], ...] (persisted form)
+        self.skills = {}
+        # table -> (size, mtime_ns) of the CSV the entries were taken from
+        self.signatures = {}
+        self.dirty = False
+        # (table, hero Key) -> skill Names, built on the first update
+        self._hero_skills = None
+        # Lazily built lookup structures, dropped on every update
+        self._by_hero = None
+        self._sorted_skills = None
+        self._sorted_heroes = None
+        self._skill_trigrams = None
+        self._hero_trigrams = None
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.folder_path, INDEX_FILE_NAME)
+
+    @classmethod
+    def load(cls, folder_path: str) -> "SkillIndex":
+        """Load the persisted index and rescan only the tables that changed since"""
+        index = cls(folder_path)
+        if os.path.exists(index.path):
+            try:
+                with open(index.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                index.skills = data.get("skills", {})
+                index.signatures = {table: tuple(sig) for table, sig in data.get("signatures", {}).items()}
+            except (OSError, ValueError):
+                index.skills, index.signatures = {}, {}
+        index.refresh_stale_tables()
+        return index
+
+    def refresh_stale_tables(self):
+        """Rescan tables whose CSV no longer matches the recorded signature"""
+        present = set()
+        for table_name in skill_table_names(self.folder_path):
+            present.add(table_name)
+            filename = os.path.join(self.folder_path, f"{table_name}.csv")
+            if self.signatures.get(table_name) != file_signature(filename):
+                self.__drop_table(table_name)
+                for hero_key, entry in _scan_table(filename):
+                    self.__add(table_name, hero_key, entry)
+                self.signatures[table_name] = file_signature(filename)
+                self.__changed()
+        for table_name in set(self.signatures) - present:
+            self.__drop_table(table_name)
+            del self.signatures[table_name]
+            self.__changed()
+
+    def update_hero(self, table_name: str, hero_key: str, header: str, lines: list[str]):
+        """Replace a hero's entries for one table with the given CSV data lines"""
+        self.__ensure_hero_skills()
+        for name in self._hero_skills.pop((table_name, hero_key), ()):
+            remaining = [entry for entry in self.skills.get(name, ())
+                         if entry[0] != hero_key or entry[1] != table_name]
+            if remaining:
+                self.skills[name] = remaining
+            else:
+                self.skills.pop(name, None)
+        for key, entry in _keyed_entries(header, lines):
+            self.__add(table_name, key, entry)
+        self.__changed()
+
+    def mark_written(self, table_name: str):
+        """Record the current signature of a table after its CSV was written"""
+        filename = os.path.join(self.folder_path, f"{table_name}.csv")
+        self.signatures[table_name] = file_signature(filename)
+        self.dirty = True
+
+    def save(self):
+        """Persist the index (atomic replace) if anything changed"""
+        if not self.dirty:
+            return
+        # Another process saving its own view is harmless: tables it did not see have a stale
+        # signature here and are rescanned on the next load
+        with locked(self.path), atomic_write(self.path) as f:
+            f.write(json.dumps({"skills": self.skills, "signatures": self.signatures},
+                               ensure_ascii=False, separators=(",", ":")))
+        self.dirty = False
+
+    # -- Queries ------------------------------------------------------------
+
+    def heroes_with_skill(self, name: str) -> list[tuple]:
+        """Return (hero Key, table, Default, Unlock) for every hero that learns a skill"""
+        entries = self.skills.get(name)
+        if entries is None:
+            # Fall back to a case-insensitive match
+            self.__ensure_sorted_skills()
+            matches = _prefix_matches(self._sorted_skills, name)
+            entries = self.skills.get(matches[0], ()) if matches and matches[0].casefold() == name.casefold() else ()
+        return [tuple(entry) for entry in entries]
+
+    def skills_of_hero(self, hero_key: str) -> list[tuple]:
+        """Return (skill Name, table, Default, Unlock) for every skill of a hero"""
+        if self._by_hero is None:
+            by_hero = {}
+            for name, entries in self.skills.items():
+                for key, table_name, default, unlock in entries:
+                    by_hero.setdefault(key, []).append((name, table_name, default, unlock))
+            self._by_hero = by_hero
+        return self._by_hero.get(hero_key, [])
+
+    def skill_names(self, prefix: str = "") -> list[str]:
+        """Return the skill names starting with prefix (case-insensitive)"""
+        self.__ensure_sorted_skills()
+        return _prefix_matches(self._sorted_skills, prefix)
+
+    def hero_keys(self, prefix: str = "") -> list[str]:
+        """Return the hero Keys starting with prefix (case-insensitive, "_" or " ")"""
+        self.__ensure_sorted_heroes()
+        return _prefix_matches(self._sorted_heroes, _hero_text(prefix))
+
+    def fuzzy_skill_names(self, text: str, limit: int = 10) -> list[tuple[str, float]]:
+        """Return up to limit (skill Name, score) pairs ranked by trigram similarity"""
+        self.__ensure_sorted_skills()
+        if self._skill_trigrams is None:
+            self._skill_trigrams = _trigram_postings(self._sorted_skills)
+        return _fuzzy_matches(self._skill_trigrams, self._sorted_skills, text.casefold(), limit)
+
+    def fuzzy_hero_keys(self, text: str, limit: int = 10) -> list[tuple[str, float]]:
+        """Return up to limit (hero Key, score) pairs ranked by trigram similarity"""
+        self.__ensure_sorted_heroes()
+        if self._hero_trigrams is None:
+            self._hero_trigrams = _trigram_postings(self._sorted_heroes)
+        return _fuzzy_matches(self._hero_trigrams, self._sorted_heroes, _hero_text(text), limit)
+
+    def __add(self, table_name: str, hero_key: str, entry: list):
+        """Add one [Name, Default, Unlock] entry of a hero"""
+        name, default, unlock = entry
+        self.skills.setdefault(name, []).append([hero_key, table_name, default, unlock])
+        if self._hero_skills is not None:
+            self._hero_skills.setdefault((table_name, hero_key), []).append(name)
+
+    def __drop_table(self, table_name: str):
+        """Remove every entry that came from one table"""
+        for name in list(self.skills):
+            remaining = [entry for entry in self.skills[name] if entry[1] != table_name]
+            if remaining:
+                self.skills[name] = remaining
+            else:
+                del self.skills[name]
+        self._hero_skills = None
+
+    def __changed(self):
+        self.dirty = True
+        self._by_hero = None
+        self._sorted_skills = None
+        self._sorted_heroes = None
+        self._skill_trigrams = None
+        self._hero_trigrams = None
+
+    def __ensure_hero_skills(self):
+        """Build the (table, hero Key) -> skill Names map used by incremental updates"""
+        if self._hero_skills is None:
+            hero_skills = {}
+            for name, entries in self.skills.items():
+                for hero_key, table_name, _, _ in entries:
+                    hero_skills.setdefault((table_name, hero_key), []).append(name)
+            self._hero_skills = hero_skills
+
+    def __ensure_sorted_skills(self):
+        # (lookup text, display name) pairs sorted by lookup text for bisect
+        if self._sorted_skills is None:
+            self._sorted_skills = sorted((name.casefold(), name) for name in self.skills)
+
+    def __ensure_sorted_heroes(self):
+        if self._sorted_heroes is None:
+            heroes = {entry[0] for entries in self.skills.values() for entry in entries}
+            self._sorted_heroes = sorted((_hero_text(hero_key), hero_key) for hero_key in heroes)
+
+
+def get_skill_index(folder_path: str) -> SkillIndex:
+    """Return the cached skill index of a database folder, loading it on first use"""
+    index = _skill_indexes.get(folder_path)
+    if index is None:
+        index = SkillIndex.load(folder_path)
+        _skill_indexes[folder_path] = index
+    return index
+
+
+def invalidate_skill_index(folder_path: str):
+    """Forget the cached index of a folder whose tables were rewritten behind its back"""
+    index = _skill_indexes.pop(folder_path, None)
+    if index is not None:
+        index.save()
+
+
+def record_hero_skills(filename: str, hero_key: str, header: str, lines: list[str]):
+    """Update the skill index after a hero's rows were written to a hero skill table"""
+    folder_path = os.path.dirname(filename)
+    table_name = os.path.splitext(os.path.basename(filename))[0]
+    index = get_skill_index(folder_path)
+    index.update_hero(table_name, hero_key, header, lines)
+    index.mark_written(table_name)
+
+
+def flush_skill_indexes():
+    """Persist every skill index that changed since it was last saved"""
+    for index in _skill_indexes.values():
+        index.save()
+
+
+def skill_table_names(folder_path: str) -> list[str]:
+    """Return the stems of the hero skill tables in a database folder"""
+    if not os.path.isdir(folder_path):
+        return []
+    return sorted(
+        entry.name[:-len(".csv")]
+        for entry in os.scandir(folder_path)
+        if entry.is_file() and entry.name.endswith(".csv") and entry.name not in NON_SKILL_TABLES
+    )
+
+
+def _scan_table(filename: str):
+    """Yield (hero Key, [Name, Default, Unlock]) for every row of a hero skill table"""
+    with open(filename, "r", encoding="utf-8", newline="") as f:
+        header = f.readline().rstrip("\r\n")
+        if header:
+            yield from _keyed_entries(header, f)
+
+
+def _keyed_entries(header: str, lines: list[str]):
+    """Yield (Key, [Name, Default, Unlock]) for each data line of a hero skill table"""
+    columns = next(csv.reader([header]), [])
+    key_index = columns.index("Key") if "Key" in columns else 0
+    name_index = columns.index("Name") if "Name" in columns else 1
+    default_index = columns.index("Default") if "Default" in columns else None
+    unlock_index = columns.index("Unlock") if "Unlock" in columns else None
+    for values in csv.reader(lines):
+        if len(values) <= name_index or not values[name_index]:
+            continue
+        default = values[default_index] if default_index is not None and default_index < len(values) else ""
+        unlock = values[unlock_index] if unlock_index is not None and unlock_index < len(values) else ""
+        yield values[key_index], [values[name_index], default, unlock]
+
+
+def _hero_text(hero_key: str) -> str:
+    """Normalise a hero Key or name for matching ("Abel The Panther" == "abel_the_panther")"""
+    return hero_key.replace("_", " ").casefold()
+
+
+def _prefix_matches(sorted_names: list[tuple[str, str]], prefix: str) -> list[str]:
+    """Return display names whose lookup text starts with prefix"""
+    prefix = prefix.casefold()
+    start = bisect.bisect_left(sorted_names, (prefix,))
+    matches = []
+    for text, display in sorted_names[start:]:
+        if not text.startswith(prefix):
+            break
+        matches.append(display)
+    return matches
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _trigram_postings(sorted_names: list[tuple[str, str]]) -> dict[str, list[int]]:
+    """Map each trigram to the positions of the names containing it"""
+    postings = {}
+    for position, (text, _) in enumerate(sorted_names):
+        for trigram in _trigrams(text):
+            postings.setdefault(trigram, []).append(position)
+    return postings
+
+
+def _fuzzy_matches(postings: dict, sorted_names: list[tuple[str, str]], text: str, limit: int) -> list[tuple[str, float]]:
+    """Rank names by trigram Jaccard similarity with text"""
+    query = _trigrams(text)
+    shared = {}
+    for trigram in query:
+        for position in postings.get(trigram, ()):
+            shared[position] = shared.get(position, 0) + 1
+    scored = []
+    for position, count in shared.items():
+        name_trigrams = len(_trigrams(sorted_names[position][0]))
+        scored.append((count / (len(query) + name_trigrams - count), position))
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return [(sorted_names[position][1], round(score, 3)) for score, position in scored[:limit]]
@@ -0,0 +1,431 @@
+"""
+Streaming Store - Bounded-memory table writes through sorted runs
+This module buffers converted hero rows per database file, spills them to disk as runs
+sorted by Key once the buffer is full, and on close merge-joins the runs with the existing
+files (themselves read as sorted runs) in a single streaming pass. Memory stays bounded by
+the buffer size whatever the size of the roster or of the tables; files written this way
+end up sorted by Key (skills catalogs by Name).
+"""
+
+import os
+import csv
+import json
+import heapq
+import shutil
+import tempfile
+from itertools import groupby
+
+import instrumentation
+
+from . import csv_operations
+from .csv_index import build_index_from_file, write_index
+from .skill_index import invalidate_skill_index
+from .core_saver import REFINE_HEADER
+from .file_lock import locked, atomic_write
+
+DEFAULT_BUFFER_BYTES = 64 * 1024 * 1024
+
+# Runs merged at once; more runs are first merged in passes of this width
+MERGE_WIDTH = 64
+
+# Rough per-entry cost of a buffered [key, batch, position, value] list beyond its strings
+ENTRY_OVERHEAD = 200
+
+
+def _entry_order(entry: list):
+    return (entry[0], entry[1], entry[2])
+
+
+class _SortedRuns:
+    """Entries [key, batch, position, value] of one file, buffered and spilled as sorted runs"""
+
+    def __init__(self, directory: str, name: str):
+        self.directory = directory
+        self.name = name
+        self.buffer = []
+        self.runs = []
+        # Runs written so far, numbering the run files (merged runs are deleted, so never reuse a count)
+        self.written = 0
+        # Keys written by more than one batch (a hero saved twice, or by several shards)
+        self.conflicts = 0
+
+    def add(self, key: str, batch: int, position: int, value):
+        self.buffer.append([key, batch, position, value])
+
+    def spill(self):
+        """Write the buffered entries as one sorted run"""
+        if not self.buffer:
+            return
+        self.buffer.sort(key=_entry_order)
+        self.runs.append(self.__write_run(self.buffer))
+        self.buffer = []
+
+    def merged(self, sources=(), last_only: bool = False):
+        """
+        Yield the values of every key in key order, merge-joining the runs with other sorted
+        entry sources (the existing file as batch 0, shard fragments). Only the entries of the
+        last batch written for a key are kept (last_only keeps only its very last entry).
+        """
+        self.spill()
+        while len(self.runs) > MERGE_WIDTH:
+            group, self.runs = self.runs[:MERGE_WIDTH], self.runs[MERGE_WIDTH:]
+            self.runs.append(self.__write_run(self.__merge_files(group)))
+        files = [open(path, "r", encoding="utf-8") for path in self.runs]
+        try:
+            entries = heapq.merge(*sources, *(map(json.loads, f) for f in files), key=_entry_order)
+            for _, group in groupby(entries, key=lambda entry: entry[0]):
+                group = list(group)
+                if group[-1][1] and len(set(entry[1] for entry in group if entry[1])) > 1:
+                    self.conflicts += 1
+                if last_only:
+                    yield group[-1][3]
+                else:
+                    last_batch = group[-1][1]
+                    for entry in group:
+                        if entry[1] == last_batch:
+                            yield entry[3]
+        finally:
+            for f in files:
+                f.close()
+
+    def __merge_files(self, paths: list[str]):
+        files = [open(path, "r", encoding="utf-8") for path in paths]
+        try:
+            yield from heapq.merge(*(map(json.loads, f) for f in files), key=_entry_order)
+        finally:
+            for f in files:
+                f.close()
+            for path in paths:
+                os.remove(path)
+
+    def __write_run(self, entries) -> str:
+        path = os.path.join(self.directory, f"{self.name}.{self.written}.run")
+        self.written += 1
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+        return path
+
+
+class StreamingStore:
+    """Collect hero rows during a run and merge them into the database files on close()"""
+
+    def __init__(self, folder_path: str, buffer_bytes: int = DEFAULT_BUFFER_BYTES, temp_dir: str = None):
+        self.folder_path = folder_path
+        self.buffer_bytes = buffer_bytes
+        os.makedirs(folder_path, exist_ok=True)
+        self._temp_dir = tempfile.mkdtemp(prefix="stream_", dir=temp_dir or folder_path)
+        self._buffered = 0
+        self._batches = 0
+        # filename -> _SortedRuns, header line and key field of the file
+        self._runs = {}
+        self._headers = {}
+        self._key_fields = {}
+        # filename -> [(fragment file, batch), ...] merged along with the runs
+        self._fragments = {}
+        # info.csv columns in first-seen order
+        self._info_fields = {}
+        # done-list file -> files of the ids to add to it (this run's temp file, fragments)
+        self._done = {}
+        self._done_temp = {}
+        # filename -> keys written by more than one batch, filled by close()
+        self.conflicts = {}
+        self.closed = False
+
+    def add_hero(self, hero_info: dict, hero_csv_data: dict):
+        """Queue a converted hero (hero_table_to_csv_data output) for the final merge"""
+        self._batches += 1
+        batch = self._batches
+        info = hero_csv_data["Info"]
+        key = info.get("Key", hero_info["hero_id"])
+        for field in info:
+            self._info_fields.setdefault(field, None)
+        self.__add(os.path.join(self.folder_path, "info.csv"), None, "Key", key, batch, 0,
+                   {field: str(value) for field, value in info.items()})
+
+        related_line = hero_csv_data["Related Heroes"]
+        self.__add(os.path.join(self.folder_path, "related_heroes.csv"), None, None,
+                   csv_operations.get_first_field(related_line), batch, 0, related_line)
+
+        for table_name, table_lines in hero_csv_data["Hero Skills"].items():
+            if not table_lines:
+                continue
+            filename = os.path.join(self.folder_path, f"{table_name.lower()}.csv")
+            for position, line in enumerate(table_lines[1:]):
+                self.__add(filename, table_lines[0], "Key", csv_operations.get_first_field(line), batch, position, line)
+
+        skills = hero_csv_data["Skills"]
+        if hero_info["category"] == "refines":
+            skills = dict(skills, Refines=[REFINE_HEADER, hero_info["refine_data"]])
+        for skill_type, skill_lines in skills.items():
+            if not skill_lines:
+                continue
+            filename = os.path.join(self.folder_path, "skills", f"skill_{skill_type.lower()}.csv")
+            for position, line in enumerate(skill_lines[1:]):
+                header = self.__header(filename, skill_lines[0])
+                name = csv_operations.get_field_value(header, line, "Name")
+                if name:
+                    self.__add(filename, skill_lines[0], "Name", name, batch, position, line)
+
+        self.__mark_done(hero_info["category"], [hero_info["hero_id"]])
+
+        if self._buffered > self.buffer_bytes:
+            self.spill()
+
+    def add_refines(self, refines: list[dict]):
+        """Queue the refine rows of refines listing entries in one batch (save_refines in streaming mode)"""
+        self._batches += 1
+        batch = self._batches
+        filename = os.path.join(self.folder_path, "skills", "skill_refines.csv")
+        header = self.__header(filename, REFINE_HEADER)
+        for position, refine in enumerate(refines):
+            name = csv_operations.get_field_value(header, refine["refine_data"], "Name")
+            if name:
+                self.__add(filename, REFINE_HEADER, "Name", name, batch, position, refine["refine_data"])
+        self.__mark_done("refines", [refine["hero_id"] for refine in refines])
+
+        if self._buffered > self.buffer_bytes:
+            self.spill()
+
+    def add_fragment(self, fragment_path: str):
+        """
+        Queue a database fragment (the folder written by a --shard run) for the final merge:
+        its rows replace the rows of the same keys, like a hero added at this point would.
+        """
+        self._batches += 1
+        batch = self._batches
+        for source in fragment_tables(fragment_path):
+            relative = os.path.relpath(source, fragment_path)
+            filename = os.path.join(self.folder_path, relative)
+            with open(source, "r", encoding="utf-8") as f:
+                header = f.readline().rstrip("\r\n")
+            if relative == "info.csv":
+                for field in next(csv.reader([header]), []):
+                    self._info_fields.setdefault(field, None)
+                self.__target(filename, None, "Key")
+            elif relative == "related_heroes.csv":
+                self.__target(filename, None, None)
+            elif os.path.dirname(relative) == "skills":
+                self.__target(filename, header, "Name")
+            else:
+                self.__target(filename, header, "Key")
+            self._fragments.setdefault(filename, []).append((source, batch))
+        for name in sorted(os.listdir(fragment_path)):
+            if name.endswith(".txt"):
+                self._done.setdefault(os.path.join(self.folder_path, name), []).append(os.path.join(fragment_path, name))
+
+    def spill(self):
+        """Write every buffered entry to sorted runs"""
+        for runs in self._runs.values():
+            runs.spill()
+        self._buffered = 0
+
+    @instrumentation.timed("csv_write:stream_merge")
+    def close(self) -> dict:
+        """Merge the runs into the database files; returns the number of rows written per file"""
+        if self.closed:
+            return {}
+        self.closed = True
+        written = {}
+        try:
+            self.spill()
+            info_path = os.path.join(self.folder_path, "info.csv")
+            for filename, runs in self._runs.items():
+                # One file locked at a time: overlapping runs wait per file, never on the whole merge
+                with locked(filename):
+                    if filename == info_path:
+                        written[filename] = self.__merge_info(filename, runs)
+                    else:
+                        written[filename] = self.__merge_lines(filename, runs)
+                    csv_operations._invalidate_file_cache(filename)
+                    if self._key_fields[filename] == "Key" and filename != info_path and csv_operations.WRITE_SIDECAR_INDEXES:
+                        write_index(filename, build_index_from_file(filename))
+                if runs.conflicts:
+                    self.conflicts[os.path.relpath(filename, self.folder_path)] = runs.conflicts
+            invalidate_skill_index(self.folder_path)
+            # Done-lists last, so a hero is only marked done once its rows are in place
+            for done_path, sources in self._done.items():
+                self.__merge_done_list(done_path, sources)
+        finally:
+            shutil.rmtree(self._temp_dir, ignore_errors=True)
+        return {os.path.relpath(filename, self.folder_path): rows for filename, rows in written.items()}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        # Heroes are added whole, so whatever was collected is merged even after an error
+        self.close()
+
+    def __mark_done(self, category: str, hero_ids: list[str]):
+        """Queue hero ids for the done-list of a category (merged into it last, on close)"""
+        done_path = os.path.join(self.folder_path, category + ".txt")
+        temp_path = self._done_temp.get(done_path)
+        if temp_path is None:
+            temp_path = os.path.join(self._temp_dir, f"done.{len(self._done_temp)}.txt")
+            self._done_temp[done_path] = temp_path
+            self._done.setdefault(done_path, []).append(temp_path)
+        with open(temp_path, "a", encoding="utf-8") as f:
+            f.writelines(hero_id + "\n" for hero_id in hero_ids)
+
+    def __target(self, filename: str, header: str, key_field: str) -> _SortedRuns:
+        """Runs of a database file, created with its key field and header on first use"""
+        runs = self._runs.get(filename)
+        if runs is None:
+            runs = _SortedRuns(self._temp_dir, f"{len(self._runs)}")
+            self._runs[filename] = runs
+            self._key_fields[filename] = key_field
+            if header is not None:
+                self.__header(filename, header)
+        return runs
+
+    def __add(self, filename: str, header: str, key_field: str, key: str, batch: int, position: int, value):
+        self.__target(filename, header, key_field).add(key, batch, position, value)
+        self._buffered += _entry_size(key, value)
+
+    def __header(self, filename: str, header: str) -> str:
+        """Header the file will be written with: the existing one, else the first one seen"""
+        if filename not in self._headers:
+            existing = None
+            if os.path.exists(filename):
+                with open(filename, "r", encoding="utf-8") as f:
+                    existing = f.readline().rstrip("\r\n") or None
+            self._headers[filename] = existing or header
+        return self._headers[filename]
+
+    def __sources(self, filename: str, entries, name: str) -> list:
+        """Sorted entry sources of a database file: its existing rows (batch 0) and the fragments"""
+        sources = [(filename, 0)] + self._fragments.get(filename, [])
+        return [self.__sorted_entries(path, batch, entries, f"{name}.{number}")
+                for number, (path, batch) in enumerate(sources) if os.path.exists(path)]
+
+    def __sorted_entries(self, path: str, batch: int, entries, name: str):
+        """
+        Sorted [key, batch, position, value] entries of a file. A file that is already sorted
+        (as written by a previous streaming run or merge) is read straight through; otherwise
+        it is cut into sorted runs of at most the buffer size.
+        """
+        if _is_sorted(entries(path, batch)):
+            return entries(path, batch)
+        runs = _SortedRuns(self._temp_dir, name)
+        buffered = 0
+        for key, _, position, value in entries(path, batch):
+            runs.add(key, batch, position, value)
+            buffered += _entry_size(key, value)
+            if buffered > self.buffer_bytes:
+                runs.spill()
+                buffered = 0
+        return _entries_of(runs)
+
+    def __merge_lines(self, filename: str, runs: _SortedRuns) -> int:
+        """Write the header, then the merge-join of the existing rows, the fragments and the runs"""
+        header = self._headers.get(filename)
+        key_field = self._key_fields[filename]
+
+        def entries(path, batch):
+            with open(path, "r", encoding="utf-8") as f:
+                # Each file is read with its own header (fragments may have been written before a column was added)
+                source_header = f.readline().rstrip("\r\n") if header is not None else None
+                for position, line in enumerate(f):
+                    line = line.rstrip("\r\n")
+                    if not line:
+                        continue
+                    key = (csv_operations.get_first_field(line) if key_field in (None, "Key")
+                           else csv_operations.get_field_value(source_header, line, key_field))
+                    yield [key or "", batch, position, line]
+
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        sources = self.__sources(filename, entries, runs.name + ".source")
+        rows = 0
+        # "\n" on every platform, like write_lines_to_file (the sidecar indexes are spliced with "\n" lines)
+        with atomic_write(filename, newline="\n") as out:
+            if header is not None:
+                out.write(header + "\n")
+            for line in runs.merged(sources, last_only=key_field != "Key"):
+                out.write(line + "\n")
+                rows += 1
+        return rows
+
+    def __merge_info(self, filename: str, runs: _SortedRuns) -> int:
+        """Write info.csv with the union header from the merge-join of the existing rows, the fragments and the runs"""
+        header = []
+        if os.path.exists(filename):
+            with open(filename, "r", encoding="utf-8", newline="") as f:
+                header = next(csv.reader(f), [])
+        merged_header = list(header) + [field for field in self._info_fields if field not in header]
+
+        def entries(path, batch):
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                reader = csv.reader(f)
+                source_header = next(reader, [])
+                for position, row in enumerate(reader):
+                    if row:
+                        row_dict = dict(zip(source_header, row))
+                        yield [row_dict.get("Key", ""), batch, position, row_dict]
+
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+        sources = self.__sources(filename, entries, runs.name + ".source")
+        rows = 0
+        with atomic_write(filename, newline="") as out:
+            writer = csv.writer(out)
+            writer.writerow(merged_header)
+            for info in runs.merged(sources, last_only=True):
+                writer.writerow([info.get(field, "") for field in merged_header])
+                rows += 1
+        return rows
+
+    def __merge_done_list(self, done_path: str, sources: list[str]):
+        """Append the ids saved during the run (or by the fragments) that the done-list does not hold yet"""
+        with locked(done_path), atomic_write(done_path) as out:
+            ids = set()
+            if os.path.exists(done_path):
+                with open(done_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        hero_id = line.strip()
+                        if hero_id and hero_id not in ids:
+                            ids.add(hero_id)
+                            out.write(hero_id + "\n")
+            for source_path in sources:
+                with open(source_path, "r", encoding="utf-8") as source:
+                    for line in source:
+                        hero_id = line.strip()
+                        if hero_id and hero_id not in ids:
+                            ids.add(hero_id)
+                            out.write(hero_id + "\n")
+
+
+def fragment_tables(fragment_path: str) -> list[str]:
+    """Table files of a database fragment merged by add_fragment (manuals are not sharded)"""
+    tables = [os.path.join(fragment_path, name) for name in sorted(os.listdir(fragment_path))
+              if name.endswith(".csv") and name != "manuals.csv"]
+    skills_folder = os.path.join(fragment_path, "skills")
+    if os.path.isdir(skills_folder):
+        tables.extend(os.path.join(skills_folder, name) for name in sorted(os.listdir(skills_folder))
+                      if name.startswith("skill_") and name.endswith(".csv"))
+    return tables
+
+
+def _entry_size(key: str, value) -> int:
+    """Approximate memory taken by a buffered entry"""
+    size = len(value) if isinstance(value, str) else sum(map(len, value.values()))
+    return len(key) + size + ENTRY_OVERHEAD
+
+
+def _is_sorted(entries) -> bool:
+    """Check in one streaming pass whether entries are in key order"""
+    previous = None
+    for entry in entries:
+        if previous is not None and entry[0] < previous:
+            return False
+        previous = entry[0]
+    return True
+
+
+def _entries_of(runs: _SortedRuns):
+    """Yield the raw sorted entries of a set of runs (every batch, every position)"""
+    runs.spill()
+    files = [open(path, "r", encoding="utf-8") for path in runs.runs]
+    try:
+        yield from heapq.merge(*(map(json.loads, f) for f in files), key=_entry_order)
+    finally:
+        for f in files:
+            f.close()
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+FEH Data Fetcher - Database query server
+Serves hero and skill lookups over HTTP from an in-memory copy of the database folder,
+reloading the changed tables whenever a launcher run finishes.
+"""
+
+import argparse
+
+from query_server import serve
+from query_server.server import DEFAULT_HOST, DEFAULT_PORT
+from query_server.cache import DEFAULT_MAX_ENTRIES, DEFAULT_MAX_BYTES
+
+
+FOLDER_NAME = "database"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve read-only lookups over the database folder")
+    parser.add_argument("--folder", default=FOLDER_NAME, help="Database folder")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument("--cache-entries", type=int, default=DEFAULT_MAX_ENTRIES,
+                        help="Responses kept in the LRU cache (0 disables it)")
+    parser.add_argument("--cache-mb", type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                        help="Bytes of responses kept in the LRU cache (MB)")
+    parser.add_argument("--watch-interval", type=float, default=2.0,
+                        help="Seconds between checks for a finished launcher run (0 only reloads on POST /reload)")
+    args = parser.parse_args()
+
+    serve(args.folder, args.host, args.port, cache_entries=args.cache_entries,
+          cache_bytes=int(args.cache_mb * 1024 * 1024), watch_interval=args.watch_interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Sharding - Deterministic partitioning of the heroes to update
+This module splits the output of get_heroes_to_update into N shards by a stable hash of the
+hero id, so several machines (or containers) can each refresh one shard into their own
+database fragment, later combined by merge_shards.py.
+"""
+
+import os
+import hashlib
+
+# Fragments are written to <database>/shards/<shard folder> unless told otherwise
+SHARDS_FOLDER_NAME = "shards"
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    """Parse "i/N" (0 <= i < N) into (i, N)"""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard {value!r}, expected i/N (e.g. 0/4)")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard {value!r}, expected 0 <= i < N")
+    return index, count
+
+
+def shard_of(hero_id: str, count: int) -> int:
+    """Shard of a hero id: stable across machines, runs and Python versions (unlike hash())"""
+    digest = hashlib.sha1(hero_id.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+def shard_heroes(hero_ids: list[str], index: int, count: int) -> list[str]:
+    """Keep the hero ids of shard index out of count, in their original order"""
+    return [hero_id for hero_id in hero_ids if shard_of(hero_id, count) == index]
+
+
+def shard_folder_name(index: int, count: int) -> str:
+    return f"shard-{index}-of-{count}"
+
+
+def default_shard_folder(folder_path: str, index: int, count: int) -> str:
+    return os.path.join(folder_path, SHARDS_FOLDER_NAME, shard_folder_name(index, count))
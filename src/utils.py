@@ -1,14 +1,58 @@
-from bs4 import BeautifulSoup
-import requests
 import csv
 import io
+import os
+import threading
+from typing import TYPE_CHECKING
+import instrumentation
 
+# bs4 and requests are imported on first use: runs served from the listing snapshot never need them
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
 
-def open_page(page_link:str) -> BeautifulSoup:
-    return BeautifulSoup(requests.get(page_link).content, "html.parser")
+# Base URL of the wiki; point it at a local mock server (benchmarks/mock_wiki.py) to run offline
+WIKI_URL = os.environ.get("FEHTCHER_WIKI_URL", "https://feheroes.fandom.com/wiki")
 
+# One HTTP session per thread: connections to the wiki are kept alive between requests
+_local = threading.local()
 
-def table_to_list(table:BeautifulSoup) -> list:
+
+def wiki_page_url(page: str) -> str:
+    return f"{WIKI_URL}/{page}"
+
+
+def api_url() -> str:
+    """MediaWiki API endpoint of the wiki (FEHTCHER_API_URL, else api.php next to WIKI_URL)"""
+    return os.environ.get("FEHTCHER_API_URL") or WIKI_URL.rsplit("/wiki", 1)[0] + "/api.php"
+
+
+def http_session():
+    """The requests.Session of the calling thread"""
+    session = getattr(_local, "session", None)
+    if session is None:
+        import requests
+        session = _local.session = requests.Session()
+    return session
+
+
+def open_page(page_link:str) -> "BeautifulSoup":
+    return parse_page(download_page(page_link))
+
+
+def download_page(page_link:str) -> bytes:
+    with instrumentation.stage("http_wait"):
+        content = http_session().get(page_link).content
+    instrumentation.count("http_requests")
+    instrumentation.count("bytes_received", len(content))
+    return content
+
+
+def parse_page(content:bytes) -> "BeautifulSoup":
+    from bs4 import BeautifulSoup
+    with instrumentation.stage("html_parse"):
+        return BeautifulSoup(content, "html.parser")
+
+
+def table_to_list(table:"BeautifulSoup") -> list:
     rows = []
     for row in table.find_all('tr'):
         cols = [cell.get_text(strip=True) for cell in row.find_all(['td', 'th'])]
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+FEH Data Fetcher - Database integrity command
+Checks every table of the database folder in a single pass (unique Keys and skill Names,
+hero skill rows, related heroes, manuals and done-lists pointing at known heroes and skills)
+and exits with status 1 when a violation is found, so publishing can be gated on it.
+"""
+
+import argparse
+import json
+import sys
+
+from hero_database import validate_database
+
+
+FOLDER_NAME = "database"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the integrity of the database folder")
+    parser.add_argument("--folder", default=FOLDER_NAME, help="Database folder")
+    parser.add_argument("--limit", type=int, default=10, help="Violations printed per check (0 for all)")
+    parser.add_argument("--json", help="Write the full report to this JSON file")
+    args = parser.parse_args()
+
+    report = validate_database(args.folder)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+
+    rows = sum(report["files"].values())
+    print(f"Checked {rows} rows in {len(report['files'])} files in {report['duration_s']:.2f}s")
+    for check, count in report["counts"].items():
+        print(f"\n{check}: {count}")
+        violations = [violation for violation in report["violations"] if violation["check"] == check]
+        for violation in violations[:args.limit or None]:
+            location = f"{violation['file']}:{violation['line']}" if violation["line"] else violation["file"]
+            detail = f" ({violation['detail']})" if violation["detail"] else ""
+            print(f"  {location} {violation['key']}{detail}")
+        if args.limit and count > args.limit:
+            print(f"  ... {count - args.limit} more")
+
+    if not report["valid"]:
+        print(f"\n❌ {len(report['violations'])} violations")
+        sys.exit(1)
+    print("✅ No violations")
+
+
+if __name__ == "__main__":
+    main()
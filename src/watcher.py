@@ -0,0 +1,281 @@
+"""
+Wiki Watcher - Daemon mode refreshing the heroes edited on the wiki
+This module polls the recent changes API of the wiki on an interval, maps the edited page
+titles to hero ids through the bootstrap listings and pushes only those heroes through
+fetch, extract and save. An edit of a listing page re-collects that listing and refreshes its
+new and changed heroes. The listings, the HTTP session and the save caches stay warm in the
+process between cycles, so an edit reaches the database within one poll interval.
+"""
+
+import os
+import json
+import time
+import threading
+
+import utils
+import instrumentation
+from bootstrap import LISTING_PAGES, SNAPSHOT_TTL, bootstrap_database, collect_listing, save_snapshot
+from fetcher import fetch_hero_data, get_heroes_to_update
+from listing_diff import ListingDiffer, diff_listing, stale_heroes, default_baseline_path, HERO_CATEGORIES
+from save_hero import save_hero_to_files, save_manuals, forget_heroes
+from save_hero.file_lock import atomic_write
+
+# Seconds between two polls of the recent changes
+DEFAULT_POLL_INTERVAL = 120
+
+# Watermark of the recent changes already applied, in the cache folder of the database
+STATE_FILE_NAME = "watch_state.json"
+
+# Changes requested per API call (the MediaWiki maximum for anonymous clients)
+CHANGES_PER_REQUEST = 500
+
+# Listings whose entries are hero pages
+PAGE_CATEGORIES = ("heroes", "resplendents")
+
+
+class RecentChanges:
+    """
+    Titles of the main namespace pages edited since the last poll (list=recentchanges).
+    The watermark (last timestamp and the change ids seen at it) is only saved by commit(),
+    once the changes are applied: the changes of an interrupted cycle are polled again.
+    """
+
+    def __init__(self, state_path: str, api_url: str = None):
+        self.state_path = state_path
+        self.api_url = api_url or utils.api_url()
+        self.state = self.__load()
+        self._pending = None
+
+    def poll(self) -> list[str]:
+        """Titles changed since the watermark, oldest first (none on the very first poll, which only sets it)"""
+        if self.state is None:
+            latest = self.__query({"rcdir": "older", "rclimit": 1}, follow=False)
+            since = latest[0]["timestamp"] if latest else "1970-01-01T00:00:00Z"
+            self._pending = {"api_url": self.api_url, "since": since, "rcids": [change["rcid"] for change in latest]}
+            return []
+
+        since, seen = self.state["since"], set(self.state["rcids"])
+        changes = self.__query({"rcdir": "newer", "rcstart": since, "rclimit": CHANGES_PER_REQUEST})
+        # rcstart is inclusive: the changes at the watermark timestamp were seen by the previous poll
+        changes = [change for change in changes if not (change["timestamp"] == since and change["rcid"] in seen)]
+        if changes:
+            last = max(change["timestamp"] for change in changes)
+            rcids = [change["rcid"] for change in changes if change["timestamp"] == last]
+            if last == since:
+                rcids += self.state["rcids"]
+            self._pending = {"api_url": self.api_url, "since": last, "rcids": rcids}
+        return list(dict.fromkeys(change["title"] for change in changes))
+
+    def commit(self):
+        """Save the watermark of the last poll"""
+        if self._pending is None:
+            return
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        with atomic_write(self.state_path) as f:
+            json.dump(self._pending, f)
+        self.state, self._pending = self._pending, None
+
+    def __query(self, params: dict, follow: bool = True) -> list[dict]:
+        """Recent changes of the main namespace, following the continuation"""
+        params = dict(params, action="query", list="recentchanges", rcprop="title|timestamp|ids",
+                      rctype="edit|new", rcnamespace="0", format="json", formatversion="2")
+        changes = []
+        while True:
+            with instrumentation.stage("http_wait"):
+                response = utils.http_session().get(self.api_url, params=params, timeout=30)
+            instrumentation.count("http_requests")
+            response.raise_for_status()
+            data = response.json()
+            changes.extend(data["query"]["recentchanges"])
+            if not follow or "continue" not in data:
+                return changes
+            params.update(data["continue"])
+
+    def __load(self) -> dict | None:
+        """The saved watermark, unless missing or of another wiki"""
+        if not os.path.exists(self.state_path):
+            return None
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return state if state.get("api_url") == self.api_url else None
+
+
+class WikiWatcher:
+    """
+    Long-running refresh loop: bootstrap the listings once, save the heroes not saved yet,
+    then every poll_interval seconds save the heroes whose page (or listing) was edited.
+    """
+
+    def __init__(self, folder_path: str, snapshot_path: str, sink, poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 download_images: bool = True, on_cycle=None, api_url: str = None,
+                 listings_ttl: float = SNAPSHOT_TTL, refresh_listings: bool = False,
+                 differ: ListingDiffer = None, on_bootstrap=None):
+        """
+        Args:
+            folder_path: Database folder
+            snapshot_path: Listing snapshot, reused at start and rewritten when a listing changes
+            sink: Where converted heroes and refines go (see save_hero.sinks)
+            poll_interval: Seconds between two polls
+            download_images: Download the icons and portraits of the saved heroes
+            on_cycle: Called with the summary of every cycle (e.g. to write the change feed)
+            api_url: MediaWiki API endpoint (default: utils.api_url())
+            listings_ttl, refresh_listings: How the listings are bootstrapped at start (see bootstrap_database)
+            differ: Diffs the startup listings against the baseline of the last run (default: one over
+                folder_path, as a normal run does)
+            on_bootstrap: Called with the differ once the startup listings are diffed (e.g. to report it)
+        """
+        self.folder_path = folder_path
+        self.snapshot_path = snapshot_path
+        self.sink = sink
+        self.poll_interval = poll_interval
+        self.download_images = download_images
+        self.on_cycle = on_cycle
+        self.listings_ttl = listings_ttl
+        self.refresh_listings = refresh_listings
+        self.differ = differ
+        self.on_bootstrap = on_bootstrap
+        self.changes = RecentChanges(os.path.join(folder_path, "cache", STATE_FILE_NAME), api_url)
+        self.listings = None
+        self.cycles = 0
+        # url_id -> [(category, hero_id)] of the hero listings
+        self._pages = {}
+        # Heroes that failed to save, retried by the next cycle
+        self._retry = {}
+        self._stop = threading.Event()
+
+    def run(self, cycles: int = None):
+        """Start (bootstrap and catch up), then poll until stop() is called or after cycles polls"""
+        self.listings = bootstrap_database(self.snapshot_path, self.listings_ttl, self.refresh_listings)
+        self.__diff_startup_listings()
+        self.__index_pages()
+        self.cycle(catch_up=True)
+        polls = 0
+        while cycles is None or polls < cycles:
+            if self._stop.wait(self.poll_interval):
+                return
+            polls += 1
+            try:
+                self.cycle()
+            except Exception as e:
+                # The watermark is not committed: the same changes are polled again next cycle
+                instrumentation.count("watch_errors")
+                print(f"\nWatch cycle failed: {e}")
+
+    def stop(self):
+        self._stop.set()
+
+    def cycle(self, catch_up: bool = False) -> dict:
+        """
+        Poll once and save what changed; returns the cycle summary. With catch_up, the heroes,
+        refines and manuals not saved yet are saved as well (the first cycle).
+        """
+        instrumentation.METRICS.reset()
+        start = time.perf_counter()
+        with instrumentation.stage("poll"):
+            titles = self.changes.poll()
+
+        # (category, hero_id) to save, in order
+        heroes = dict(self._retry)
+        listing_pages = {page: category for category, page in LISTING_PAGES.items()}
+        changed_listings = []
+        for title in titles:
+            page = title.replace(" ", "_")
+            if page in listing_pages:
+                changed_listings.append(listing_pages[page])
+            for key in self._pages.get(page, ()):
+                heroes[key] = None
+        with instrumentation.stage("bootstrap"):
+            for category in changed_listings:
+                self.__refresh_listing(category)
+
+        refines = []
+        for category in (HERO_CATEGORIES if catch_up else changed_listings):
+            if category not in HERO_CATEGORIES:
+                continue
+            update = get_heroes_to_update(self.listings[category], self.folder_path, f"{category}.txt")
+            if category == "refines":
+                refines = [self.listings[category][hero_id] for hero_id in update]
+            else:
+                heroes.update(((category, hero_id), None) for hero_id in update)
+
+        saved, errors = self.__save_heroes(heroes)
+        if refines:
+            with instrumentation.stage("save"):
+                self.sink.write_refines(refines)
+        with instrumentation.stage("save"):
+            self.sink.flush()
+        manuals = None
+        if catch_up or "manuals" in changed_listings:
+            manuals = save_manuals(self.listings["manuals"], self.folder_path, replace=True)
+        self.changes.commit()
+
+        summary = {
+            "cycle": self.cycles,
+            "changes": len(titles),
+            "listings": changed_listings,
+            "saved": saved,
+            "refines": len(refines),
+            "manuals_written": bool(manuals and manuals["written"]),
+            "errors": errors,
+            "duration_s": time.perf_counter() - start,
+        }
+        self.cycles += 1
+        if self.on_cycle is not None:
+            self.on_cycle(summary)
+        return summary
+
+    def __save_heroes(self, heroes: dict) -> tuple[list[str], list[str]]:
+        """Fetch and save each (category, hero_id); returns the hero ids saved and failed"""
+        saved, errors = [], []
+        self._retry = {}
+        for category, hero_id in heroes:
+            hero_info = self.listings[category].get(hero_id)
+            if hero_info is None:
+                continue
+            try:
+                with instrumentation.hero(hero_id):
+                    save_hero_to_files(hero_info, fetch_hero_data(hero_info), self.folder_path, self.download_images,
+                                       sink=self.sink)
+                saved.append(hero_id)
+            except Exception as e:
+                instrumentation.count("hero_errors")
+                print(f"\nError processing {hero_id}: {e}")
+                self._retry[(category, hero_id)] = None
+                errors.append(hero_id)
+        return saved, errors
+
+    def __diff_startup_listings(self):
+        """
+        Take the heroes changed since the last run off the done-lists before the catch-up, and make
+        these listings the baseline (__refresh_listing diffs the later edits against them).
+        """
+        differ = self.differ or ListingDiffer(default_baseline_path(self.folder_path), [self.folder_path])
+        try:
+            for category, listing in self.listings.items():
+                differ.add(category, listing)
+        finally:
+            differ.close()
+        if self.on_bootstrap is not None:
+            self.on_bootstrap(differ)
+
+    def __refresh_listing(self, category: str):
+        """Collect an edited listing again; its stale heroes are taken off the done-list"""
+        listing = collect_listing(category)
+        if category in HERO_CATEGORIES:
+            forget_heroes(stale_heroes(diff_listing(self.listings[category], listing)), self.folder_path,
+                          f"{category}.txt")
+        self.listings[category] = listing
+        # The next runs start from these listings, and diff against them
+        if self.snapshot_path:
+            save_snapshot(self.snapshot_path, self.listings)
+        save_snapshot(default_baseline_path(self.folder_path), self.listings)
+        self.__index_pages()
+
+    def __index_pages(self):
+        self._pages = {}
+        for category in PAGE_CATEGORIES:
+            for hero_id, hero_info in self.listings[category].items():
+                self._pages.setdefault(hero_info["url_id"], []).append((category, hero_id))